@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+
+# ---------------- AIS CODE TABLES ----------------
+NAV_STATUS_DESCRIPTIONS = {
+    0: "Under way using engine", 1: "At anchor", 2: "Not under command", 3: "Restricted maneuverability",
+    4: "Constrained by draft", 5: "Moored", 6: "Aground", 7: "Engaged in fishing",
+    8: "Under way sailing", 9: "Reserved for future use", 10: "Reserved for future use",
+    11: "Power-driven vessel towing astern", 12: "Power-driven vessel pushing ahead/towing alongside",
+    14: "AIS-SART, MOB-AIS, EPIRB-AIS", 15: "Undefined"
+}
+
+MESSAGE_TYPE_DESCRIPTIONS = {
+    1: "Position Report (Class A)", 2: "Position Report (Class A, Assigned Schedule)",
+    3: "Position Report (Class A, Special)", 4: "Base Station Report",
+    5: "Static and Voyage Related Data", 6: "Binary Addressed Message",
+    7: "Binary Acknowledge", 8: "Binary Broadcast Message",
+    9: "Standard SAR Aircraft Position Report", 10: "UTC and Date Inquiry",
+    11: "UTC and Date Response", 12: "Addressed Safety-Related Message",
+    13: "Safety-Related Acknowledge", 14: "Safety-Related Broadcast Message",
+    15: "Interrogation", 16: "Assignment Mode Command",
+    17: "DGNSS Binary Broadcast Message", 18: "Standard Class B CS Position Report",
+    19: "Extended Class B Equipment Position Report", 20: "Data Link Management Message",
+    21: "Aid-to-Navigation Report", 22: "Channel Management",
+    23: "Group Assignment Command", 24: "Static Data Report",
+    25: "Single Slot Binary Message", 26: "Multiple Slot Binary Message with Communication State",
+    27: "Long Range AIS Broadcast Message"
+}
+
+
+# ---------------- RUN-LENGTH STATE INTERVALS ----------------
+def state_intervals(times, codes, descriptions):
+    # Collapse consecutive pings with the same code into one interval. A state
+    # lasts until the next state starts (or until the last ping for the final one).
+    times = np.asarray(times, dtype="datetime64[ns]")
+    codes = np.asarray(codes)
+    n = len(codes)
+    if n == 0:
+        return pd.DataFrame(columns=["Code", "Description", "Start", "End", "Duration", "Pings"])
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    stops = np.r_[starts[1:], n]
+    ends = np.r_[times[starts[1:]], times[-1]]
+
+    start_times = times[starts]
+    return pd.DataFrame({
+        "Code": codes[starts],
+        "Description": pd.Series(codes[starts]).map(descriptions).fillna("Unknown").to_numpy(),
+        "Start": start_times,
+        "End": ends,
+        "Duration": pd.to_timedelta(ends - start_times),
+        "Pings": stops - starts,
+    })
+
+
+def state_summary(intervals):
+    # Intervals, pings and total time spent per code
+    summary = intervals.groupby(["Code", "Description"], sort=True).agg(
+        Intervals=("Pings", "size"),
+        Pings=("Pings", "sum"),
+        Duration=("Duration", "sum"),
+    )
+    return summary.reset_index()
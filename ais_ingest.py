@@ -0,0 +1,182 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from ais_codes import NAV_STATUS_DESCRIPTIONS, MESSAGE_TYPE_DESCRIPTIONS
+
+
+# ---------------- AIS CSV SCHEMA ----------------
+# Declared compact dtypes for the AIS columns the dashboard reads: MMSIs fit
+# in 32 bits, headings in 16 and status/message codes in 8, and float32 keeps
+# ~1 m of position precision. Anything else in the CSV is kept as the parser
+# infers it.
+AIS_SCHEMA = {
+    "MMSI": "uint32",
+    "Latitude": "float32",
+    "Longitude": "float32",
+    "Speed_over_ground": "float32",
+    "Course_over_ground": "float32",
+    "True_heading": "uint16",
+    "Rate_of_turn": "float32",
+    "Navigation_Status": "uint8",
+    "Message_Type": "uint8",
+}
+
+# Parsed once at load; pages and reports use them as datetimes directly
+TIMESTAMP_COLUMNS = ["Timestamp", "Timestamp_IST"]
+
+# Timestamp is UTC; Timestamp_IST is filled from it where a source has no local time
+IST_OFFSET = pd.Timedelta(hours=5, minutes=30)
+
+# Rows missing any of these after coercion are dropped
+REQUIRED_COLUMNS = ["MMSI", "Timestamp", "Latitude", "Longitude", "Message_Type"]
+
+# AIS default for "not defined" when a report carries no navigation status
+NAV_STATUS_UNDEFINED = 15
+
+# AIS "not available" heading; also stands in for missing headings, which an
+# integer column cannot hold as NaN
+HEADING_NOT_AVAILABLE = 511
+
+# Code column -> categorical description column added at load
+CODE_DESCRIPTIONS = {
+    "Navigation_Status": ("Navigation_Status_Description", NAV_STATUS_DESCRIPTIONS),
+    "Message_Type": ("Message_Type_Description", MESSAGE_TYPE_DESCRIPTIONS),
+}
+
+DEFAULT_CHUNKSIZE = 250_000
+
+
+# ---------------- CODE DESCRIPTIONS ----------------
+def description_dtype(descriptions):
+    return pd.CategoricalDtype(sorted(set(descriptions.values())) + ["Unknown"])
+
+
+def describe_codes(codes, descriptions):
+    # Categorical descriptions (one byte per row) via a lookup over all uint8 codes
+    dtype = description_dtype(descriptions)
+    table = np.full(256, dtype.categories.get_loc("Unknown"), dtype=np.int8)
+    for code, description in descriptions.items():
+        table[code] = dtype.categories.get_loc(description)
+    return pd.Categorical.from_codes(table[np.asarray(codes, dtype=np.uint8)], dtype=dtype)
+
+
+def compact_ais_frame(df):
+    # Schema dtypes, parsed timestamps and code descriptions for a frame from
+    # any source (e.g. an older dataset cache); returns df itself when it is
+    # already compact
+    columns = {}
+    changed = False
+    for col in df.columns:
+        values = df[col]
+        if col in TIMESTAMP_COLUMNS and not pd.api.types.is_datetime64_any_dtype(values):
+            values = pd.to_datetime(values, errors="coerce")
+        elif col in AIS_SCHEMA and values.dtype != np.dtype(AIS_SCHEMA[col]):
+            if col == "True_heading":
+                values = values.where(values.between(0, HEADING_NOT_AVAILABLE), HEADING_NOT_AVAILABLE)
+            values = values.astype(AIS_SCHEMA[col])
+        changed |= values is not df[col]
+        columns[col] = values
+
+    for code_col, (description_col, descriptions) in CODE_DESCRIPTIONS.items():
+        if code_col in columns and description_col not in columns:
+            columns[description_col] = describe_codes(columns[code_col], descriptions)
+            changed = True
+
+    return pd.DataFrame(columns) if changed else df
+
+
+def frame_memory(df):
+    # Bytes held by a frame, including the contents of object (string) columns
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+# ---------------- CHUNK VALIDATION ----------------
+def clean_ais_chunk(chunk):
+    missing = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"CSV is missing required AIS columns: {', '.join(missing)}")
+
+    for col in TIMESTAMP_COLUMNS:
+        if col in chunk.columns:
+            chunk[col] = pd.to_datetime(chunk[col], errors="coerce")
+    # Feeds and NMEA logs carry UTC only; pages and reports read local time
+    local = chunk["Timestamp"] + IST_OFFSET
+    chunk["Timestamp_IST"] = chunk["Timestamp_IST"].fillna(local) if "Timestamp_IST" in chunk.columns else local
+
+    numeric = {col: pd.to_numeric(chunk[col], errors="coerce") for col in AIS_SCHEMA if col in chunk.columns}
+
+    valid = chunk["Timestamp"].notna().to_numpy()
+    for col in REQUIRED_COLUMNS:
+        if col in numeric:
+            valid &= numeric[col].notna().to_numpy()
+
+    # MMSI is a 9-digit identifier; 91/181 are the AIS "position not available" markers
+    valid &= ((numeric["MMSI"] >= 100_000_000) & (numeric["MMSI"] <= 999_999_999)).to_numpy()
+    valid &= numeric["Latitude"].between(-90, 90).to_numpy()
+    valid &= numeric["Longitude"].between(-180, 180).to_numpy()
+    valid &= numeric["Message_Type"].between(1, 27).to_numpy()
+
+    if "Navigation_Status" in numeric:
+        status = numeric["Navigation_Status"]
+        numeric["Navigation_Status"] = status.where(status.between(0, 15), NAV_STATUS_UNDEFINED)
+
+    if "True_heading" in numeric:
+        heading = numeric["True_heading"]
+        numeric["True_heading"] = heading.where(heading.between(0, HEADING_NOT_AVAILABLE), HEADING_NOT_AVAILABLE)
+
+    columns = {}
+    for col in chunk.columns:
+        if col in numeric:
+            columns[col] = numeric[col].to_numpy()[valid].astype(AIS_SCHEMA[col])
+        else:
+            columns[col] = chunk[col].to_numpy()[valid]
+    return compact_ais_frame(pd.DataFrame(columns))
+
+
+# ---------------- STREAMING CSV READER ----------------
+def read_ais_csv(source, chunksize=DEFAULT_CHUNKSIZE, progress_callback=None):
+    # `source` is a path or a binary file-like object (e.g. a Streamlit UploadedFile).
+    # Returns the typed frame and the number of rows that failed validation.
+    # df.attrs["raw_bytes"] records what the rows took in memory as plain
+    # pandas parsed them, before compaction.
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return read_ais_csv(f, chunksize=chunksize, progress_callback=progress_callback)
+
+    total_bytes = getattr(source, "size", None)
+    if total_bytes is None:
+        try:
+            total_bytes = os.fstat(source.fileno()).st_size
+        except (AttributeError, OSError):
+            total_bytes = None
+
+    chunks = []
+    rows_read = 0
+    rows_dropped = 0
+    raw_bytes = 0
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        rows_read += len(chunk)
+        raw_bytes += frame_memory(chunk)
+        clean = clean_ais_chunk(chunk)
+        rows_dropped += len(chunk) - len(clean)
+        chunks.append(clean)
+
+        if progress_callback is not None:
+            fraction = min(source.tell() / total_bytes, 1.0) if total_bytes else None
+            progress_callback(fraction, rows_read, rows_dropped)
+
+    if not chunks:
+        empty = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in AIS_SCHEMA.items()})
+        empty["Timestamp"] = pd.Series(dtype="datetime64[ns]")
+        return compact_ais_frame(empty), 0
+
+    df = pd.concat(chunks, ignore_index=True)
+    # concat falls back to object/float64 when a chunk was empty; re-assert the schema
+    for col, dtype in AIS_SCHEMA.items():
+        if col in df.columns and df[col].dtype != np.dtype(dtype):
+            df[col] = df[col].astype(dtype)
+
+    df.attrs["raw_bytes"] = raw_bytes
+    return df, rows_dropped
@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+
+from vessel_index import VesselIndex
+from ais_ingest import compact_ais_frame
+from kinematics import compute_kinematics, ANOMALY_COLUMNS
+from spatial_index import SpatialGridIndex
+from segmentation import compute_segments, update_segments
+from ais_nmea import STATIC_COLUMNS, latest_static
+from profiling import stage
+
+
+# ---------------- PER-MMSI AIS STORE ----------------
+# One loaded dataset and everything derived from it: the (MMSI, Timestamp)
+# sorted frame with its vessel index, kinematics, spatial grid and voyage/stop
+# segments. A store is immutable once built, so sessions can share it by
+# reference. New rows produce a new store instead of a reload: each column
+# gets the new rows inserted at binary-searched positions (no re-sort), and
+# kinematics and segments are recomputed for the touched vessels only. Every
+# vessel has a revision that is bumped when it receives rows, so caches keyed
+# by cache_id() stay valid for the vessels that did not change. Static data
+# decoded from NMEA (name, callsign, ...) is kept per MMSI in vessel_info.
+
+DEDUP_COLUMNS = ["MMSI", "Timestamp", "Message_Type"]
+
+SUMMARY_COLUMNS = [
+    "MMSI", "Name", "Pings", "First_seen", "Last_seen", "Distance_nm", "Max_speed_kn",
+    "Voyages", "Stops", "Stopped_hours",
+] + ANOMALY_COLUMNS
+
+
+def _placeholder(dtype, n):
+    # Fill for a column that the appended rows do not carry
+    kind = dtype.kind
+    if kind in "iu":
+        return np.zeros(n, dtype=dtype)
+    if kind == "b":
+        return np.zeros(n, dtype=bool)
+    if kind == "f":
+        return np.full(n, np.nan, dtype=dtype)
+    if kind in "mM":
+        return np.full(n, np.datetime64("NaT") if kind == "M" else np.timedelta64("NaT"), dtype=dtype)
+    return np.full(n, None, dtype=object)
+
+
+def _insert_column(column, positions, new_values):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Insert the category codes, not the decoded values
+        new_codes = pd.Categorical(new_values, dtype=column.dtype).codes
+        return pd.Categorical.from_codes(np.insert(column.cat.codes.to_numpy(), positions, new_codes), dtype=column.dtype)
+    return np.insert(column.to_numpy(), positions, new_values)
+
+
+class AISStore:
+    def __init__(self, dataset_id, df, static=None):
+        self.dataset_id = dataset_id
+        with stage("vessel index"):
+            self.vessel_index = VesselIndex(compact_ais_frame(df))
+        with stage("kinematics"):
+            self.kinematics = compute_kinematics(self.df)
+        with stage("spatial index"):
+            self.spatial_index = SpatialGridIndex(self.df)
+        with stage("segments"):
+            self.segments = compute_segments(self.df, self.kinematics)
+        self.revisions = {}
+        self.vessel_info = latest_static(static if static is not None else pd.DataFrame(columns=STATIC_COLUMNS))
+        self._nbytes = None
+
+    @property
+    def df(self):
+        return self.vessel_index.df
+
+    @property
+    def mmsi_list(self):
+        return self.vessel_index.mmsi_list
+
+    def __len__(self):
+        return len(self.vessel_index)
+
+    @property
+    def nbytes(self):
+        # Memory held by the frame and everything derived from it (measured once)
+        if self._nbytes is None:
+            self._nbytes = int(
+                self.df.memory_usage(deep=True).sum()
+                + self.kinematics.memory_usage(deep=True).sum()
+                + self.segments.memory_usage(deep=True).sum()
+                + self.vessel_info.memory_usage(deep=True).sum()
+                + self.spatial_index.order.nbytes + self.spatial_index.sorted_cells.nbytes
+            )
+        return self._nbytes
+
+    def cache_id(self, mmsi):
+        # Dataset id for per-vessel caches; changes only when this vessel gets new rows
+        revision = self.revisions.get(mmsi, 0)
+        return self.dataset_id if revision == 0 else f"{self.dataset_id}+{revision}"
+
+    def vessel_name(self, mmsi):
+        name = self.vessel_info["Name"].get(mmsi) if len(self.vessel_info) else None
+        return name if isinstance(name, str) else None
+
+    def _replace(self, **parts):
+        # Stores are shared between sessions and never modified; changes make a new one
+        store = object.__new__(AISStore)
+        store.__dict__.update(self.__dict__)
+        store.__dict__.update(parts)
+        store._nbytes = None
+        return store
+
+    def append(self, new_rows, static=None):
+        # Merge validated rows (see ais_ingest.clean_ais_chunk) and decoded static
+        # rows (see ais_nmea). Returns (new store, rows added, duplicates skipped,
+        # MMSIs that received rows); self is left unchanged.
+        vessel_info = self.vessel_info
+        if static is not None and len(static):
+            if len(vessel_info):
+                static = pd.concat([vessel_info.reset_index(), static], ignore_index=True)
+            vessel_info = latest_static(static)
+
+        received = len(new_rows)
+        new_rows = new_rows.drop_duplicates(subset=DEDUP_COLUMNS)
+        new_rows = new_rows.sort_values(["MMSI", "Timestamp"], kind="mergesort").reset_index(drop=True)
+        new_rows = new_rows[~self.vessel_index.existing_rows(new_rows)]
+        if len(new_rows) == 0:
+            store = self if vessel_info is self.vessel_info else self._replace(vessel_info=vessel_info)
+            return store, 0, received, []
+
+        index = self.vessel_index
+        positions = index.insert_positions(new_rows)
+        # np.insert needs the batch in positional order; ties keep time order
+        by_position = np.argsort(positions, kind="stable")
+        positions = positions[by_position]
+        new_rows = new_rows.iloc[by_position]
+
+        columns = {}
+        for col in index.df.columns:
+            column = index.df[col]
+            if col in new_rows.columns:
+                values = new_rows[col].to_numpy()
+            else:
+                values = _placeholder(column.dtype, len(new_rows))
+            columns[col] = _insert_column(column, positions, values)
+        merged = VesselIndex(pd.DataFrame(columns), presorted=True)
+
+        # Kinematics: shift the old rows, then recompute the touched vessels
+        mmsis = sorted(set(new_rows["MMSI"].tolist()))
+        derived = {}
+        for col in self.kinematics.columns:
+            values = self.kinematics[col].to_numpy()
+            derived[col] = np.insert(values, positions, _placeholder(values.dtype, len(new_rows)))
+        touched = merged.positions(mmsis)
+        fresh = compute_kinematics(merged.df.iloc[touched])
+        for col in derived:
+            derived[col][touched] = fresh[col].to_numpy()
+        kinematics = pd.DataFrame(derived)
+
+        revisions = dict(self.revisions)
+        for mmsi in mmsis:
+            revisions[mmsi] = revisions.get(mmsi, 0) + 1
+
+        store = self._replace(
+            vessel_index=merged,
+            kinematics=kinematics,
+            spatial_index=self.spatial_index.with_inserted_rows(merged.df, positions),
+            segments=update_segments(self.segments, merged, kinematics, mmsis),
+            revisions=revisions,
+            vessel_info=vessel_info,
+        )
+        return store, len(new_rows), received - len(new_rows), mmsis
+
+
+# ---------------- PER-VESSEL SUMMARY ----------------
+def vessel_summary(store, mmsis=None):
+    # One row per vessel: track extent, distance, top speed, voyage/stop counts
+    # and anomaly counts. Reduced over the vessel index's row ranges in one pass.
+    index = store.vessel_index
+    if len(index) == 0:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    df = store.df
+    starts = index.starts
+    stops = np.r_[starts[1:], len(df)]
+    times = df["Timestamp"].to_numpy()
+    speed = np.nan_to_num(df["Speed_over_ground"].to_numpy(dtype=np.float64))
+    distance = np.nan_to_num(store.kinematics["Segment_distance_nm"].to_numpy(dtype=np.float64))
+
+    summary = pd.DataFrame({
+        "MMSI": index.mmsi_list,
+        "Name": [store.vessel_name(mmsi) or "" for mmsi in index.mmsi_list],
+        "Pings": stops - starts,
+        "First_seen": times[starts],
+        "Last_seen": times[stops - 1],
+        # A vessel's first ping has no predecessor, so its distance is NaN (0 here)
+        "Distance_nm": np.add.reduceat(distance, starts).round(2),
+        "Max_speed_kn": np.maximum.reduceat(speed, starts).round(2),
+    })
+
+    segments = store.segments
+    kinds = segments.groupby(["MMSI", "Kind"]).size().unstack(fill_value=0)
+    stopped = segments[segments["Kind"] == "Stop"].groupby("MMSI")["Duration"].sum()
+    for kind, column in (("Voyage", "Voyages"), ("Stop", "Stops")):
+        counts = kinds[kind] if kind in kinds.columns else pd.Series(dtype=np.int64)
+        summary[column] = counts.reindex(summary["MMSI"], fill_value=0).to_numpy()
+    summary["Stopped_hours"] = (stopped.reindex(summary["MMSI"]).dt.total_seconds().fillna(0) / 3600).round(2).to_numpy()
+
+    for col in ANOMALY_COLUMNS:
+        summary[col] = np.add.reduceat(store.kinematics[col].to_numpy(dtype=np.int64), starts)
+
+    if mmsis is not None:
+        summary = summary[summary["MMSI"].isin(list(mmsis))].reset_index(drop=True)
+    return summary[SUMMARY_COLUMNS]
@@ -0,0 +1,45 @@
+import threading
+from collections import OrderedDict
+
+
+# ---------------- IN-MEMORY ARTIFACT CACHE ----------------
+# Process-wide LRU of rendered bytes (PNGs, PDFs) bounded by total size.
+# Streamlit runs every session as a thread of one process, so one instance
+# is shared by all sessions; the lock makes that safe.
+
+class BytesLRUCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = value
+            self._bytes += len(value)
+            # Always keep the newest entry, even if it alone exceeds the bound
+            while len(self._items) > 1 and self._bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._items)
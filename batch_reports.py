@@ -0,0 +1,114 @@
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+
+from pdf_report import report_cache_key, get_cached_report, store_cached_report
+from profiling import add_records
+
+
+# ---------------- BATCH PDF REPORTS ----------------
+# Renders many vessel reports in parallel across a process pool and streams
+# the PDFs into a zip as they finish. Each job is sent only its own vessel's
+# track, at most two jobs per worker are in flight, and workers are recycled
+# every MAX_TASKS_PER_WORKER reports so per-worker memory stays bounded.
+# Workers send their stage timings back with each PDF, so the caller's
+# profile (debug panel, Prometheus file, --profile) includes the rendering.
+# From the command line: `python ships_cli.py report <source> --mmsi all`.
+
+MAX_TASKS_PER_WORKER = 50
+JOBS_IN_FLIGHT_PER_WORKER = 2
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def render_pool(max_workers):
+    # Spawned workers never inherit the Streamlit server's threads or state
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, max_tasks_per_child=MAX_TASKS_PER_WORKER)
+
+
+def _render_report(mmsi, track, include_details=False, segments=None, charts=None):
+    # Runs in a worker; returns (PDF bytes, the worker's stage records)
+    from pdf_report import generate_pdf_report
+    from profiling import start_run, run_records
+    start_run("worker")
+    pdf_bytes = generate_pdf_report(track, mmsi, include_details=include_details, segments=segments, charts=charts)
+    return pdf_bytes, run_records()
+
+
+def generate_batch_reports(index, mmsis, zip_target, max_workers=None, progress_callback=None, pool=None):
+    # Writes one Ship_Report_MMSI_<mmsi>.pdf per vessel into zip_target (a path
+    # or binary file-like object). Returns {mmsi: error message} for failed reports.
+    # pool: a render_pool() shared with other work (max_workers is then its
+    # size); a pool of max_workers is started for this batch otherwise.
+    mmsis = [mmsi for mmsi in mmsis if mmsi in index]
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_workers * JOBS_IN_FLIGHT_PER_WORKER
+
+    failures = {}
+    done = 0
+    pending = {}
+    remaining = iter(mmsis)
+
+    with zipfile.ZipFile(zip_target, "w", compression=zipfile.ZIP_DEFLATED) as zf, \
+            (nullcontext(pool) if pool is not None else render_pool(max_workers)) as pool:
+
+        def report_done(mmsi, error):
+            nonlocal done
+            done += 1
+            if error is not None:
+                failures[mmsi] = error
+            if progress_callback is not None:
+                progress_callback(done, len(mmsis), mmsi, error)
+
+        def submit_next():
+            # Unchanged reports come straight from the content-addressed cache
+            for mmsi in remaining:
+                track = index.track(mmsi)
+                key = report_cache_key(track, mmsi)
+                pdf_bytes = get_cached_report(key)
+                if pdf_bytes is None:
+                    pending[pool.submit(_render_report, mmsi, track)] = (mmsi, key)
+                    return
+                zf.writestr(f"Ship_Report_MMSI_{mmsi}.pdf", pdf_bytes)
+                report_done(mmsi, None)
+
+        try:
+            for _ in range(max_in_flight):
+                submit_next()
+
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    mmsi, key = pending.pop(future)
+                    error = None
+                    try:
+                        pdf_bytes, records = future.result()
+                        add_records(records)
+                        store_cached_report(key, pdf_bytes)
+                        zf.writestr(f"Ship_Report_MMSI_{mmsi}.pdf", pdf_bytes)
+                    except Exception as e:
+                        error = str(e)
+
+                    report_done(mmsi, error)
+                    submit_next()
+        finally:
+            # A shared pool outlives the batch; don't leave it our queued work
+            for future in pending:
+                future.cancel()
+
+    return failures
+
+
+def generate_batch_reports_zip(index, mmsis, max_workers=None, progress_callback=None, pool=None):
+    # In-memory variant for st.download_button; returns (zip bytes, failures)
+    buffer = io.BytesIO()
+    failures = generate_batch_reports(index, mmsis, buffer, max_workers=max_workers,
+                                      progress_callback=progress_callback, pool=pool)
+    return buffer.getvalue(), failures
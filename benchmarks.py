@@ -0,0 +1,397 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # generated CSVs are written by pandas instead (~10x slower)
+    pa = None
+    pa_csv = None
+
+
+# ---------------- PIPELINE BENCHMARKS ----------------
+# Reproducible timings for the hot paths, from CSV load to PDF build, over
+# synthetic AIS data at several scales:
+#
+#   python benchmarks.py --rows 10k,100k,1M -o results.json
+#   python benchmarks.py --rows 10k,100k,1M --compare baseline.json
+#
+# Every stage is timed over --repeat runs (best and median), then run once
+# more under tracemalloc for its peak allocation, so the memory probe never
+# slows the timed runs. Results are one JSON document: run metadata (git
+# commit, library versions, machine) plus a record per (rows, stage).
+# Generated CSVs are kept in --data-dir and reused across runs; 50M rows
+# are written in chunks of vessels, so generation memory stays bounded.
+# Shared state (module imports, the port gazetteer) is warmed up before the
+# first scale, so the 10k numbers are not dominated by one-off costs.
+
+DEFAULT_SCALES = "10k,100k,1M"
+DEFAULT_START = "2025-03-01"
+DEFAULT_DATA_DIR = os.environ.get("SHIPS_BENCH_DIR", ".bench_data")
+
+# Average track length; actual lengths vary per vessel (log-normal)
+ROWS_PER_VESSEL = 2_000
+GENERATE_CHUNK_ROWS = 2_000_000
+
+# Mean pings per moving/stopped phase, and reporting intervals (seconds)
+PHASE_PINGS = 400
+MOVING_INTERVAL_S = (2, 12)
+STOPPED_INTERVAL_S = 180
+SILENCE_PROBABILITY = 0.0005
+GLITCH_PROBABILITY = 0.0001
+
+MMSI_LOOKUPS = 1_000
+
+# Slowdowns smaller than this are timer noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.01
+
+CSV_COLUMNS = [
+    "MMSI", "Timestamp", "Timestamp_IST", "Latitude", "Longitude", "Speed_over_ground",
+    "Rate_of_turn", "True_heading", "Course_over_ground", "Navigation_Status", "Message_Type",
+]
+
+
+# ---------------- SYNTHETIC AIS TRACKS ----------------
+def parse_scale(value):
+    # "10k" / "1M" / "50000" -> int
+    value = value.strip().lower()
+    factor = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * factor)
+
+
+def _track_lengths(rng, n_rows, n_vessels):
+    weights = rng.lognormal(0.0, 0.75, n_vessels)
+    counts = np.maximum(np.floor(weights / weights.sum() * n_rows).astype(np.int64), 1)
+    # Hand the rounding remainder to the longest tracks
+    remainder = n_rows - counts.sum()
+    order = np.argsort(-counts)
+    counts[order[:abs(remainder)]] += np.sign(remainder)
+    return counts
+
+
+def _vessel_tracks(rng, mmsis, counts, start):
+    # Dead-reckoned tracks that alternate voyages and stops, with the report
+    # intervals, AIS silences and position glitches of a real feed
+    n = int(counts.sum())
+    n_vessels = len(mmsis)
+    vessel = np.repeat(np.arange(n_vessels), counts)
+    first = np.r_[0, np.cumsum(counts)[:-1]]
+    is_first = np.zeros(n, dtype=bool)
+    is_first[first] = True
+
+    # Phases: runs of pings that are either under way or stopped
+    phase = np.cumsum(is_first | (rng.random(n) < 1.0 / PHASE_PINGS)) - 1
+    n_phases = int(phase[-1]) + 1
+    phase_moving = rng.random(n_phases) < 0.8
+    phase_course = rng.uniform(0, 360, n_phases)
+    phase_status = rng.choice([1, 5], n_phases)  # At anchor / Moored
+    moving = phase_moving[phase]
+
+    cruise = rng.uniform(8, 22, n_vessels)[vessel]
+    speed = np.where(moving, cruise + rng.normal(0, 0.5, n), np.abs(rng.normal(0, 0.1, n)))
+    speed = np.clip(speed, 0, 102.2)
+    course = (phase_course[phase] + np.cumsum(rng.normal(0, 0.5, n))) % 360
+
+    interval = np.where(moving, rng.uniform(*MOVING_INTERVAL_S, n), STOPPED_INTERVAL_S)
+    interval += (rng.random(n) < SILENCE_PROBABILITY) * rng.uniform(1_800, 7_200, n)
+    interval[is_first] = rng.uniform(0, 3_600, n_vessels)
+    elapsed = np.cumsum(interval)
+    elapsed -= np.repeat(elapsed[first] - interval[first], counts)
+
+    # Position: per-vessel cumulative sum of each step's displacement
+    start_lat = rng.uniform(-40, 55, n_vessels)[vessel]
+    step_nm = speed * interval / 3600.0
+    step_nm[is_first] = 0.0
+    radians = np.radians(course)
+    dlat = np.cumsum(step_nm * np.cos(radians) / 60.0)
+    dlon = np.cumsum(step_nm * np.sin(radians) / 60.0 / np.cos(np.radians(start_lat)))
+    dlat -= np.repeat(dlat[first], counts)
+    dlon -= np.repeat(dlon[first], counts)
+    lat = np.clip(start_lat + dlat, -85, 85)
+    lon = (rng.uniform(-170, 170, n_vessels)[vessel] + dlon + 180) % 360 - 180
+    glitch = rng.random(n) < GLITCH_PROBABILITY
+    lat[glitch] = np.clip(lat[glitch] + rng.uniform(-2, 2, glitch.sum()), -85, 85)
+
+    turn = np.zeros(n)
+    turn[1:] = (np.diff(course) + 180) % 360 - 180
+    turn[is_first] = 0.0
+    rot = np.clip(turn / (interval / 60.0), -720, 720)
+
+    heading = np.round(course + rng.normal(0, 3, n)).astype(np.int64) % 360
+    heading[rng.random(n) < 0.01] = 511
+
+    class_b = rng.random(n_vessels) < 0.2
+    message_type = np.where(class_b[vessel], 18, rng.choice([1, 1, 1, 3], n))
+
+    timestamps = pd.Timestamp(start) + pd.to_timedelta(np.round(elapsed), unit="s")
+    frame = pd.DataFrame({
+        "MMSI": np.asarray(mmsis)[vessel],
+        "Timestamp": timestamps,
+        "Timestamp_IST": timestamps + pd.Timedelta(hours=5, minutes=30),
+        "Latitude": lat.round(6),
+        "Longitude": lon.round(6),
+        "Speed_over_ground": speed.round(1),
+        "Rate_of_turn": rot.round(1),
+        "True_heading": heading,
+        "Course_over_ground": course.round(1),
+        "Navigation_Status": np.where(moving, 0, phase_status[phase]),
+        "Message_Type": message_type,
+    })
+    # Receivers deliver interleaved vessels in time order
+    return frame.sort_values("Timestamp", kind="mergesort").reset_index(drop=True)
+
+
+def _vessel_chunks(n_rows, n_vessels, seed):
+    rng = np.random.default_rng(seed)
+    n_vessels = n_vessels or max(1, min(n_rows // ROWS_PER_VESSEL, n_rows))
+    counts = _track_lengths(rng, n_rows, n_vessels)
+    mmsis = 200_000_000 + rng.choice(575_000_000, n_vessels, replace=False)
+
+    bounds = np.searchsorted(np.cumsum(counts), np.arange(GENERATE_CHUNK_ROWS, n_rows, GENERATE_CHUNK_ROWS))
+    for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, n_vessels]):
+        if hi > lo:
+            yield rng, mmsis[lo:hi], counts[lo:hi]
+
+
+def synthetic_ais_frame(n_rows, n_vessels=None, seed=0, start=DEFAULT_START):
+    # In-memory synthetic AIS rows with the columns of an uploaded CSV
+    frames = [_vessel_tracks(rng, mmsis, counts, start) for rng, mmsis, counts in _vessel_chunks(n_rows, n_vessels, seed)]
+    return pd.concat(frames, ignore_index=True)[CSV_COLUMNS]
+
+
+def _write_csv_chunk(frame, f, header):
+    if pa_csv is None:
+        frame.to_csv(f, header=header, index=False, date_format="%Y-%m-%d %H:%M:%S")
+        return
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    for col in ("Timestamp", "Timestamp_IST"):
+        position = table.schema.get_field_index(col)
+        table = table.set_column(position, col, table[col].cast(pa.timestamp("s")))
+    pa_csv.write_csv(table, f, pa_csv.WriteOptions(include_header=header, quoting_style="needed"))
+
+
+def write_synthetic_csv(path, n_rows, n_vessels=None, seed=0, start=DEFAULT_START):
+    # Same data as synthetic_ais_frame, written chunk by chunk (each chunk is a
+    # group of vessels in time order)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    mode = "wb" if pa_csv is not None else "w"
+    with open(tmp_path, mode) as f:
+        for i, (rng, mmsis, counts) in enumerate(_vessel_chunks(n_rows, n_vessels, seed)):
+            _write_csv_chunk(_vessel_tracks(rng, mmsis, counts, start)[CSV_COLUMNS], f, header=i == 0)
+    os.replace(tmp_path, path)
+    return path
+
+
+def synthetic_csv(data_dir, n_rows, seed=0):
+    # Path of the generated CSV for this scale, generating it on first use
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic_ais_{n_rows}_{seed}.csv")
+    if not os.path.exists(path):
+        write_synthetic_csv(path, n_rows, seed=seed)
+    return path
+
+
+# ---------------- STAGE MEASUREMENT ----------------
+def measure(stage, fn, repeat=1, memory=True):
+    # Runs fn repeat times (plus once under tracemalloc); returns (last result, record)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+
+    record = {"stage": stage, "seconds": min(timings), "seconds_median": float(np.median(timings)), "repeat": repeat}
+    if memory:
+        tracemalloc.start()
+        try:
+            result = fn()
+            record["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        finally:
+            tracemalloc.stop()
+    return result, record
+
+
+def _route_map(track):
+    import folium
+    from trajectory import simplify_track
+
+    lat = track["Latitude"].to_numpy()
+    lon = track["Longitude"].to_numpy()
+    keep = simplify_track(lat, lon, 6)
+    m = folium.Map(location=[float(lat[0]), float(lon[0])], zoom_start=6)
+    folium.PolyLine(np.column_stack([lat[keep], lon[keep]]).tolist()).add_to(m)
+    return m.get_root().render()
+
+
+def _fleet_map(vessels):
+    import folium
+    from folium.plugins import FastMarkerCluster
+
+    m = folium.Map(location=[float(vessels["Latitude"].mean()), float(vessels["Longitude"].mean())], zoom_start=4)
+    FastMarkerCluster(vessels[["Latitude", "Longitude"]].to_numpy(dtype=np.float64).tolist()).add_to(m)
+    return m.get_root().render()
+
+
+def warm_up():
+    # Imports and the gazetteer, so the first scale measures steady-state work
+    import matplotlib
+    matplotlib.use("Agg")
+    import charts  # noqa: F401
+    import pdf_report  # noqa: F401
+    from geocode import load_gazetteer
+
+    load_gazetteer()
+    try:
+        import folium.plugins  # noqa: F401
+        import reportlab.platypus  # noqa: F401
+    except ImportError:
+        pass
+
+
+def run_pipeline(csv_path, repeat=1, memory=True, seed=0):
+    # Every stage of the app's pipeline over one CSV; returns the stage records
+    from ais_ingest import read_ais_csv
+    from vessel_index import VesselIndex
+    from kinematics import compute_kinematics
+    from spatial_index import SpatialGridIndex, latest_positions, latest_rows_per_vessel
+    from segmentation import compute_segments, vessel_segments
+    from search import structured_query, build_text_index, text_search
+    from charts import CHART_SPECS, render_chart_png
+    from pdf_report import generate_pdf_report
+
+    records = []
+
+    def stage(name, fn, **extra):
+        result, record = measure(name, fn, repeat, memory)
+        record.update(extra)
+        records.append(record)
+        print(f"  {name:<18} {record['seconds']:9.3f}s" +
+              (f"  peak {record['peak_mb']:9.1f} MB" if "peak_mb" in record else ""), file=sys.stderr)
+        return result
+
+    df, _ = stage("csv_load", lambda: read_ais_csv(csv_path), bytes=os.path.getsize(csv_path))
+    index = stage("vessel_index", lambda: VesselIndex(df))
+    kinematics = stage("kinematics", lambda: compute_kinematics(index.df))
+    spatial_index = stage("spatial_index", lambda: SpatialGridIndex(index.df))
+    segments = stage("segments", lambda: compute_segments(index.df, kinematics))
+
+    # Per-vessel work runs on the longest track, the worst case a user can pick
+    rng = np.random.default_rng(seed)
+    lookups = rng.choice(index.mmsi_list, MMSI_LOOKUPS)
+    stage("mmsi_filter", lambda: [index.track(mmsi) for mmsi in lookups], lookups=MMSI_LOOKUPS)
+    mmsi = max(index.mmsi_list, key=index.track_size)
+    track = index.track(mmsi)
+    track_rows = len(track)
+
+    times = track["Timestamp"]
+    window = (times.iloc[track_rows // 4], times.iloc[track_rows * 3 // 4])
+    stage("structured_query", lambda: structured_query(track, *window, speed_range=(1.0, 30.0), statuses=[0]),
+          track_rows=track_rows)
+    text_index = stage("text_index", lambda: build_text_index(track), track_rows=track_rows)
+    needle = f"{track['Latitude'].iloc[track_rows // 2]:.2f}"
+    stage("text_search", lambda: text_search(track, needle, text_index, track), track_rows=track_rows)
+
+    lat, lon = float(df["Latitude"].median()), float(df["Longitude"].median())
+    bbox = (lat - 10, lon - 20, lat + 10, lon + 20)
+    stage("spatial_query", lambda: latest_rows_per_vessel(index.df, spatial_index.query(bbox)))
+    vessels = stage("latest_positions", lambda: latest_positions(index))
+
+    try:
+        import folium  # noqa: F401
+        stage("route_map", lambda: _route_map(track), track_rows=track_rows)
+        stage("fleet_map", lambda: _fleet_map(vessels), vessels=len(vessels))
+    except ImportError:
+        print("  folium not installed; map stages skipped", file=sys.stderr)
+
+    chart_frame = pd.concat([track, index.rows(kinematics, mmsi)], axis=1)
+    stage("charts", lambda: [render_chart_png(chart_frame, chart_type) for chart_type in CHART_SPECS],
+          track_rows=track_rows, charts=len(CHART_SPECS))
+    stage("pdf_report", lambda: generate_pdf_report(track, mmsi, segments=vessel_segments(segments, mmsi)),
+          track_rows=track_rows)
+
+    for record in records:
+        record.update(rows=len(df), vessels=len(index.mmsi_list))
+    return records
+
+
+# ---------------- RESULTS ----------------
+def run_metadata(seed):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "created": pd.Timestamp.now(tz="UTC").isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+    }
+
+
+def compare_results(results, baseline, threshold=1.2):
+    # Per (rows, stage) time ratio against a baseline document; returns the regressions
+    base = {(r["rows"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    for record in results["results"]:
+        before = base.get((record["rows"], record["stage"]))
+        if before is None or before["seconds"] <= 0:
+            continue
+        ratio = record["seconds"] / before["seconds"]
+        regressed = ratio > threshold and record["seconds"] - before["seconds"] > MIN_REGRESSION_SECONDS
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{record['rows']:>12,} {record['stage']:<18} {before['seconds']:9.3f}s -> {record['seconds']:9.3f}s "
+              f"({ratio:5.2f}x){flag}")
+        if regressed:
+            regressions.append({"rows": record["rows"], "stage": record["stage"], "ratio": ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the AIS pipeline stages on synthetic data.")
+    parser.add_argument("--rows", default=DEFAULT_SCALES, help=f"Comma-separated scales, e.g. 10k,1M,50M (default: {DEFAULT_SCALES})")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per stage (default: 1)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Where generated CSVs are kept")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    warm_up()
+    results = {"meta": run_metadata(args.seed), "results": []}
+    for n_rows in (parse_scale(value) for value in args.rows.split(",")):
+        print(f"{n_rows:,} rows", file=sys.stderr)
+        started = time.perf_counter()
+        csv_path = synthetic_csv(args.data_dir, n_rows, args.seed)
+        print(f"  {'generate':<18} {time.perf_counter() - started:9.3f}s  ({csv_path})", file=sys.stderr)
+        results["results"].extend(run_pipeline(csv_path, args.repeat, not args.no_memory, args.seed))
+
+        # Written after every scale, so a long run keeps what it has measured
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+
+    print(f"Wrote {len(results['results'])} results to {args.output}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
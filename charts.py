@@ -0,0 +1,172 @@
+import io
+
+import numpy as np
+
+from artifact_cache import BytesLRUCache
+from ais_ingest import HEADING_NOT_AVAILABLE
+from timeseries import lttb_indices, window_aggregate
+
+
+# ---------------- SHARED CHART PIPELINE ----------------
+# Every time-series chart in the app and in the PDF report is built here, on
+# a real datetime axis, from at most MAX_CHART_POINTS points however long the
+# track is. Each chart type picks how a long series is reduced (see
+# timeseries.py):
+#   - "envelope": per-time-bucket mean as the line, min..max as a band, for
+#     signals where spikes matter (speed);
+#   - "lttb": the samples that keep the line's shape, for angles, where a
+#     bucket mean of 359° and 1° would be meaningless;
+#   - "minmax": each bucket's extreme samples, for status codes, so no code
+#     that occurred is dropped.
+# Rendered PNGs are cached by (dataset, MMSI, chart type, filters) so reruns
+# and the PDF reuse them. Matplotlib is imported on first render.
+
+MAX_CHART_POINTS = 2_000
+
+CHART_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# chart type -> title, y label, [(column, legend label)], extra options
+CHART_SPECS = {
+    "rate_of_turn": {
+        "title": "Ship's Rate of Turn Over Time",
+        "ylabel": "Rate of Turn (°/min)",
+        "series": [("Rate_of_turn", None)],
+        "marker": "o",
+        "downsample": "lttb",
+    },
+    "speed": {
+        "title": "Ship Speed Over Time",
+        "ylabel": "Speed (knots)",
+        "series": [("Speed_over_ground", None)],
+        "downsample": "envelope",
+    },
+    "heading_cog": {
+        "title": "True Heading vs. Course Over Ground Over Time",
+        "ylabel": "Angle (°)",
+        "series": [("True_heading", "True Heading (TH)"), ("Course_over_ground", "Course Over Ground (COG)")],
+        "downsample": "lttb",
+    },
+    "implied_speed": {
+        "title": "Reported vs Implied Speed Over Time",
+        "ylabel": "Speed (knots)",
+        "series": [("Speed_over_ground", "Reported SOG"), ("Implied_speed_kn", "Implied from positions")],
+        "downsample": "envelope",
+    },
+    "drift": {
+        "title": "Course Over Ground minus True Heading",
+        "ylabel": "Drift (°)",
+        "series": [("Heading_COG_drift", None)],
+        "zero_line": True,
+        "downsample": "lttb",
+    },
+    "navigation_status": {
+        "title": "Navigation Status Changes Over Time",
+        "ylabel": "Navigation Status Code",
+        "series": [("Navigation_Status", None)],
+        "marker": "o",
+        "step": True,
+        "downsample": "minmax",
+    },
+    "message_type": {
+        "title": "Message Code Changes Over Time",
+        "ylabel": "Message Type Code",
+        "series": [("Message_Type", None)],
+        "marker": "o",
+        "step": True,
+        "downsample": "minmax",
+    },
+}
+
+_chart_cache = BytesLRUCache(CHART_CACHE_MAX_BYTES)
+
+
+def time_column(frame):
+    # Local (IST) time when the data has it, UTC otherwise; both are parsed at load
+    return "Timestamp_IST" if "Timestamp_IST" in frame.columns else "Timestamp"
+
+
+def time_axis(frame):
+    return frame[time_column(frame)].to_numpy()
+
+
+def minmax_decimate(values, max_points=MAX_CHART_POINTS):
+    # Indices keeping the min and max of each bucket, so spikes survive
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+
+    n_buckets = max(max_points // 2, 1)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    filled = np.nan_to_num(np.asarray(values, dtype=np.float64), nan=0.0)
+
+    # First position of each bucket's min and last of its max, in O(n)
+    sizes = np.diff(edges)
+    is_min = np.flatnonzero(filled == np.repeat(np.minimum.reduceat(filled, edges[:-1]), sizes))
+    is_max = np.flatnonzero(filled == np.repeat(np.maximum.reduceat(filled, edges[:-1]), sizes))
+    lo = is_min[np.searchsorted(is_min, edges[:-1])]
+    hi = is_max[np.searchsorted(is_max, edges[1:]) - 1]
+    return np.unique(np.concatenate([lo, hi]))
+
+
+def build_chart(frame, chart_type, max_points=MAX_CHART_POINTS):
+    import matplotlib.dates as mdates
+    from matplotlib.figure import Figure
+
+    spec = CHART_SPECS[chart_type]
+    times = time_axis(frame)
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+
+    for column, label in spec["series"]:
+        values = frame[column].to_numpy(dtype=np.float64)
+        if column == "True_heading":
+            values[values == HEADING_NOT_AVAILABLE] = np.nan
+        method = spec.get("downsample", "minmax")
+        if len(values) > max_points and method == "envelope":
+            buckets = window_aggregate(times, values, max_points)
+            line, = ax.plot(buckets["Time"].to_numpy(), buckets["Mean"].to_numpy(), label=label)
+            ax.fill_between(buckets["Time"].to_numpy(), buckets["Min"].to_numpy(), buckets["Max"].to_numpy(),
+                            color=line.get_color(), alpha=0.25, linewidth=0)
+            continue
+
+        keep = lttb_indices(times, values, max_points) if method == "lttb" else minmax_decimate(values, max_points)
+        ax.plot(
+            times[keep], values[keep],
+            label=label,
+            marker=spec.get("marker"),
+            markersize=3,
+            drawstyle="steps-post" if spec.get("step") else "default",
+        )
+
+    if spec.get("zero_line"):
+        ax.axhline(0, color="gray", linewidth=1)
+
+    locator = mdates.AutoDateLocator(maxticks=8)
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+    ax.set_xlabel("Time (IST)")
+    ax.set_ylabel(spec["ylabel"])
+    ax.set_title(spec["title"])
+    if any(label for _, label in spec["series"]):
+        ax.legend()
+
+    return fig
+
+
+def render_chart_png(frame, chart_type, dataset_id=None, mmsi=None, filters=()):
+    # PNG bytes of the chart; cached when the dataset is identified
+    key = (dataset_id, mmsi, chart_type, filters) if dataset_id is not None else None
+    if key is not None:
+        png = _chart_cache.get(key)
+        if png is not None:
+            return png
+
+    fig = build_chart(frame, chart_type)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    png = buffer.getvalue()
+
+    if key is not None:
+        _chart_cache.put(key, png)
+    return png
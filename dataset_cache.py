@@ -0,0 +1,269 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # the cache is simply disabled without pyarrow
+    pa = None
+    pq = None
+
+
+# ---------------- COLUMNAR DATASET CACHE ----------------
+# Parsed uploads are written once as Parquet under CACHE_DIR, keyed by a hash
+# of the raw file contents. Re-uploading the same file (or picking it from the
+# recent datasets list) memory-maps the Parquet file instead of re-parsing CSV.
+# A dataset that received appended rows (live feeds) is written again under a
+# derived id, with the original upload's id as its "base"; only the newest
+# copy per base is kept, and resolve_dataset_id() maps a base id to it, so a
+# dataset always reloads with its appended rows.
+#
+# Only the first append writes a whole copy. Later ones add their rows to the
+# copy as a small delta file (append_cached_rows), and every MAX_APPEND_FILES
+# deltas the dataset is written out as a fresh copy again. Static vessel data
+# decoded from NMEA (names, callsigns, ...) is kept next to its entry, so it
+# survives a reload too. Deltas and vessel data live in <id>.d/.
+
+CACHE_DIR = os.environ.get("SHIPS_CACHE_DIR", ".dataset_cache")
+MAX_CACHE_BYTES = int(os.environ.get("SHIPS_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+MAX_APPEND_FILES = int(os.environ.get("SHIPS_CACHE_MAX_APPEND_FILES", 50))
+
+
+def cache_enabled():
+    return pq is not None
+
+
+def file_digest(fileobj):
+    # Content hash of a binary file-like object; rewinds it afterwards
+    h = hashlib.blake2b(digest_size=16)
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(HASH_BLOCK_SIZE), b""):
+        h.update(block)
+    fileobj.seek(0)
+    return h.hexdigest()
+
+
+def _data_path(dataset_id):
+    return os.path.join(CACHE_DIR, f"{dataset_id}.parquet")
+
+
+def _meta_path(dataset_id):
+    return os.path.join(CACHE_DIR, f"{dataset_id}.json")
+
+
+def _extra_dir(dataset_id):
+    return os.path.join(CACHE_DIR, f"{dataset_id}.d")
+
+
+def _vessel_info_path(dataset_id):
+    return os.path.join(_extra_dir(dataset_id), "vessels.parquet")
+
+
+def _append_path(dataset_id, n):
+    return os.path.join(_extra_dir(dataset_id), f"rows-{n:05d}.parquet")
+
+
+def _replace_file(path, write):
+    # write(tmp_path) fills a temp file that then replaces path in one step, so
+    # a concurrent reader never sees a partial file. The temp name is unique per
+    # write: sessions append to the same dataset from several threads.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _write_parquet(df, path):
+    _replace_file(path, lambda tmp_path: pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path))
+
+
+def _write_meta(dataset_id, meta):
+    def write(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+    _replace_file(_meta_path(dataset_id), write)
+
+
+def _read_meta(dataset_id):
+    try:
+        with open(_meta_path(dataset_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _remove_entry(dataset_id):
+    for path in (_data_path(dataset_id), _meta_path(dataset_id)):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    shutil.rmtree(_extra_dir(dataset_id), ignore_errors=True)
+
+
+def _extra_bytes(dataset_id):
+    try:
+        with os.scandir(_extra_dir(dataset_id)) as files:
+            return sum(f.stat().st_size for f in files)
+    except OSError:
+        return 0
+
+
+def _appended_copies(base_id):
+    # Ids of the appended copies of base_id, newest first
+    if not cache_enabled() or not os.path.isdir(CACHE_DIR):
+        return []
+    copies = []
+    for file_name in os.listdir(CACHE_DIR):
+        if file_name.endswith(".json"):
+            meta = _read_meta(file_name[: -len(".json")])
+            if meta.get("base") == base_id:
+                copies.append((meta.get("created", 0), file_name[: -len(".json")]))
+    return [dataset_id for _, dataset_id in sorted(copies, reverse=True)
+            if os.path.exists(_data_path(dataset_id))]
+
+
+def resolve_dataset_id(dataset_id):
+    # Cache id holding the dataset's latest rows: its newest appended copy, if any
+    copies = _appended_copies(dataset_id)
+    return copies[0] if copies else dataset_id
+
+
+def load_cached_dataset(dataset_id, columns=None):
+    # Returns the cached frame (optionally only `columns`), or None on a miss
+    if not cache_enabled():
+        return None
+    path = _data_path(dataset_id)
+    if not os.path.exists(path):
+        return None
+
+    table = pq.read_table(path, columns=columns, memory_map=True)
+    os.utime(path)  # mtime doubles as the LRU clock
+    return table.to_pandas()
+
+
+def load_cached_appends(dataset_id):
+    # Rows appended to a cached copy since it was written, one frame per
+    # append in order, and the version id of the copy with them applied
+    meta = _read_meta(dataset_id)
+    appends = meta.get("appends", 0) if cache_enabled() else 0
+    frames = [pq.read_table(_append_path(dataset_id, n)).to_pandas() for n in range(1, appends + 1)]
+    return frames, meta.get("version", dataset_id)
+
+
+def load_cached_vessel_info(dataset_id):
+    # Static vessel rows kept with a cached entry, or None
+    if not cache_enabled() or not os.path.exists(_vessel_info_path(dataset_id)):
+        return None
+    return pq.read_table(_vessel_info_path(dataset_id)).to_pandas()
+
+
+def store_cached_dataset(dataset_id, df, name=None, base=None, vessel_info=None):
+    # base: id of the upload this is an appended copy of; older copies are dropped.
+    # vessel_info: AISStore.vessel_info, kept for the names of NMEA vessels.
+    if not cache_enabled():
+        return
+    if name is None:
+        name = _read_meta(base or dataset_id).get("name", base or dataset_id)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    _write_parquet(df, _data_path(dataset_id))
+    if vessel_info is not None and len(vessel_info):
+        os.makedirs(_extra_dir(dataset_id), exist_ok=True)
+        _write_parquet(vessel_info.reset_index(), _vessel_info_path(dataset_id))
+
+    meta = {"name": name, "rows": len(df), "created": time.time()}
+    if base is not None:
+        meta["base"] = base
+    _write_meta(dataset_id, meta)
+
+    if base is not None:
+        for old_id in _appended_copies(base):
+            if old_id != dataset_id:
+                _remove_entry(old_id)
+    evict_cached_datasets()
+
+
+def append_cached_rows(dataset_id, new_rows, version, rows, vessel_info=None):
+    # Add one append's rows to the appended copy dataset_id as a delta file.
+    # version: id the dataset reloads under; rows: its row count after the
+    # append. Returns False, writing nothing, if dataset_id is not an appended
+    # copy or already has MAX_APPEND_FILES deltas: the caller writes a new copy.
+    meta = _read_meta(dataset_id)
+    appends = meta.get("appends", 0)
+    if not cache_enabled() or "base" not in meta or appends >= MAX_APPEND_FILES:
+        return False
+    if not os.path.exists(_data_path(dataset_id)):
+        return False
+
+    os.makedirs(_extra_dir(dataset_id), exist_ok=True)
+    _write_parquet(new_rows, _append_path(dataset_id, appends + 1))
+    if vessel_info is not None and len(vessel_info):
+        _write_parquet(vessel_info.reset_index(), _vessel_info_path(dataset_id))
+    meta.update(rows=rows, appends=appends + 1, version=version)
+    _write_meta(dataset_id, meta)
+    os.utime(_data_path(dataset_id))
+    evict_cached_datasets()
+    return True
+
+
+def _cache_entries():
+    # Every cached file, most recently used first
+    if not cache_enabled() or not os.path.isdir(CACHE_DIR):
+        return []
+
+    entries = []
+    for file_name in os.listdir(CACHE_DIR):
+        if not file_name.endswith(".parquet"):
+            continue
+        dataset_id = file_name[: -len(".parquet")]
+        try:
+            stat = os.stat(_data_path(dataset_id))
+            with open(_meta_path(dataset_id)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        entries.append({
+            "dataset_id": meta.get("base", dataset_id),
+            "cache_id": dataset_id,
+            "name": meta.get("name", dataset_id),
+            "rows": meta.get("rows", 0),
+            "bytes": stat.st_size + _extra_bytes(dataset_id),
+            "last_used": stat.st_mtime,
+        })
+    return sorted(entries, key=lambda e: e["last_used"], reverse=True)
+
+
+def list_cached_datasets():
+    # Most recently used first. An appended copy is listed under its base id,
+    # with the copy's rows, since that is what opening the base id loads.
+    newest = {}
+    for entry in _cache_entries():
+        current = newest.get(entry["dataset_id"])
+        if current is None or current["cache_id"] == current["dataset_id"]:
+            newest[entry["dataset_id"]] = entry
+    return sorted(newest.values(), key=lambda e: e["last_used"], reverse=True)
+
+
+def evict_cached_datasets(max_bytes=None):
+    # Drop least recently used entries until the cache fits in max_bytes,
+    # always keeping the most recent one
+    if max_bytes is None:
+        max_bytes = MAX_CACHE_BYTES
+
+    entries = _cache_entries()
+    total = sum(e["bytes"] for e in entries)
+    while len(entries) > 1 and total > max_bytes:
+        oldest = entries.pop()
+        _remove_entry(oldest["cache_id"])
+        total -= oldest["bytes"]
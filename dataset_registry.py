@@ -0,0 +1,186 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from itertools import groupby
+
+import pandas as pd
+
+from ais_store import AISStore
+from live_feed import LiveFeed
+from dataset_cache import (cache_enabled, load_cached_dataset, load_cached_appends, load_cached_vessel_info,
+                           resolve_dataset_id, store_cached_dataset, append_cached_rows)
+
+
+# ---------------- SHARED DATASET REGISTRY ----------------
+# Process-wide map of dataset id -> AISStore. Streamlit runs every session as
+# a thread of one process, so a dataset opened by several analysts is held
+# once and shared by reference; sessions keep only the dataset id. Stores are
+# immutable, and appends swap in a new store under the dataset's lock, so a
+# session mid-render keeps a consistent snapshot.
+#
+# Memory is accounted per store (AISStore.nbytes). Past MAX_REGISTRY_BYTES the
+# least recently used datasets are evicted; a session whose dataset was
+# evicted reloads it from the Parquet dataset cache on its next access.
+# Sessions keep the id of the original upload. Each append is also persisted
+# to the dataset cache under a derived version id (a hash of the parent
+# version and the new rows): the first as a full appended copy, later ones as
+# small delta files on that copy (see dataset_cache). So an appended dataset
+# can be evicted like any other and reloads, here or after a restart, with its
+# appended rows and vessel names.
+#
+# Live feeds are process-wide too: at most one LiveFeed per dataset, appending
+# to it through append_to_dataset whichever sessions are open.
+
+MAX_REGISTRY_BYTES = int(os.environ.get("SHIPS_REGISTRY_MAX_BYTES", 4 * 1024 ** 3))
+
+_stores = OrderedDict()
+# dataset id -> cache id of the version held in _stores
+_versions = {}
+_registry_lock = threading.Lock()
+# One lock per dataset id, so a dataset is built once however many sessions ask
+_dataset_locks = {}
+# dataset id -> LiveFeed appending to it
+_feeds = {}
+
+
+def _dataset_lock(dataset_id):
+    with _registry_lock:
+        return _dataset_locks.setdefault(dataset_id, threading.Lock())
+
+
+def _evict(max_bytes):
+    # Caller holds _registry_lock; always keeps the most recently used store
+    total = sum(store.nbytes for store in _stores.values())
+    for dataset_id in list(_stores)[:-1]:
+        if total <= max_bytes:
+            break
+        if _stores[dataset_id].revisions and not cache_enabled():
+            continue  # without the dataset cache, appended rows exist only in memory
+        total -= _stores.pop(dataset_id).nbytes
+
+
+def register_dataset(dataset_id, df, static=None):
+    # Build (or reuse) the shared store for a freshly parsed dataset
+    with _dataset_lock(dataset_id):
+        store = get_dataset(dataset_id, load=False)
+        if store is None:
+            store = _put(dataset_id, AISStore(dataset_id, df, static), dataset_id)
+        return store
+
+
+def _put(dataset_id, store, version):
+    store.nbytes  # measure outside the registry lock
+    with _registry_lock:
+        _stores[dataset_id] = store
+        _stores.move_to_end(dataset_id)
+        _versions[dataset_id] = version
+        _evict(MAX_REGISTRY_BYTES)
+    return store
+
+
+def load_cached_store(cache_id):
+    # Store for a dataset cache entry, with the rows appended to it since it
+    # was written and its vessel data; None if it is not cached. The store is
+    # built under the entry's version id, so per-vessel caches never mix up
+    # dataset versions.
+    df = load_cached_dataset(cache_id)
+    if df is None:
+        return None
+    appended, version = load_cached_appends(cache_id)
+    store = AISStore(version, df, load_cached_vessel_info(cache_id))
+    # Consecutive appends from the same source share columns and merge as one
+    for _, frames in groupby(appended, key=lambda frame: tuple(frame.columns)):
+        store, _, _, _ = store.append(pd.concat(list(frames), ignore_index=True))
+    return store
+
+
+def _load(dataset_id):
+    # Caller holds the dataset's lock
+    store = get_dataset(dataset_id, load=False)
+    if store is None:
+        store = load_cached_store(resolve_dataset_id(dataset_id))
+        if store is not None:
+            store = _put(dataset_id, store, store.dataset_id)
+    return store
+
+
+def _appended_version(parent, new_rows):
+    # Cache id of a parent version plus appended rows
+    h = hashlib.blake2b(digest_size=16)
+    h.update(parent.encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(new_rows, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def get_dataset(dataset_id, load=True):
+    # Shared store for dataset_id; reloaded from the dataset cache if it was
+    # evicted (when load is set). None if it is nowhere to be found.
+    if dataset_id is None:
+        return None
+    with _registry_lock:
+        store = _stores.get(dataset_id)
+        if store is not None:
+            _stores.move_to_end(dataset_id)
+            return store
+    if not load:
+        return None
+
+    # Another session may be loading it already; wait for that instead of loading twice
+    with _dataset_lock(dataset_id):
+        return _load(dataset_id)
+
+
+def append_to_dataset(dataset_id, new_rows, static=None):
+    # Merge rows into a shared dataset; returns (rows added, duplicates skipped, MMSIs touched)
+    with _dataset_lock(dataset_id):
+        store = _load(dataset_id)
+        if store is None:
+            raise KeyError(f"Dataset {dataset_id} is not loaded")
+        store, added, duplicates, mmsis = store.append(new_rows, static)
+        with _registry_lock:
+            version = _versions.get(dataset_id, dataset_id)
+        if added:
+            version = _appended_version(version, new_rows)
+            vessel_info = store.vessel_info if static is not None and len(static) else None
+            if not append_cached_rows(resolve_dataset_id(dataset_id), new_rows, version, len(store), vessel_info):
+                # First append, or enough deltas piled up: one new full copy
+                store_cached_dataset(version, store.df, base=dataset_id, vessel_info=store.vessel_info)
+        _put(dataset_id, store, version)
+    return added, duplicates, mmsis
+
+
+def start_feed(dataset_id, drop_dir=None, port=None):
+    # Start the dataset's live feed, replacing (and stopping) any earlier one.
+    # Raises OSError if the port is taken.
+    with _dataset_lock(dataset_id):
+        stop_feed(dataset_id)
+        feed = LiveFeed(lambda new_rows, static: append_to_dataset(dataset_id, new_rows, static), drop_dir, port)
+        with _registry_lock:
+            _feeds[dataset_id] = feed
+    return feed
+
+
+def get_feed(dataset_id):
+    with _registry_lock:
+        return _feeds.get(dataset_id)
+
+
+def stop_feed(dataset_id):
+    with _registry_lock:
+        feed = _feeds.pop(dataset_id, None)
+    if feed is not None:
+        feed.stop()
+
+
+def registry_stats():
+    # Datasets held, their total size and the configured bound
+    with _registry_lock:
+        sizes = [(dataset_id, store.nbytes, len(store)) for dataset_id, store in _stores.items()]
+    return {
+        "datasets": len(sizes),
+        "bytes": sum(size for _, size, _ in sizes),
+        "max_bytes": MAX_REGISTRY_BYTES,
+        "entries": [{"dataset_id": dataset_id, "bytes": size, "rows": rows} for dataset_id, size, rows in sizes],
+    }
+
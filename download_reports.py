@@ -1,55 +1,80 @@
 import streamlit as st
 import pandas as pd
-import folium
-from geopy.geocoders import Nominatim
-from streamlit_folium import folium_static
-import matplotlib.pyplot as plt
-import seaborn as sns
+import numpy as np
 import base64
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Image, Spacer
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-
-
-
-
-# ---------------- SETUP PAGE CONFIGURATION ----------------
-st.set_page_config(page_title="Ships Data Tracker", page_icon="🚢", layout="wide")
+import os
+import time
+import math
+import uuid
+import datetime
+import threading
+from dataset_registry import (get_dataset, register_dataset, append_to_dataset, registry_stats,
+                              start_feed, get_feed, stop_feed)
+from ais_ingest import frame_memory
+from ais_nmea import read_ais_file
+from live_feed import DEFAULT_DROP_DIR, DEFAULT_FEED_PORT, FEED_POLL_SECONDS
+from trajectory import simplify_track, key_event_indices, MAX_EVENT_MARKERS
+from geocode import location_labels
+from kinematics import anomaly_summary, ANOMALY_COLUMNS
+from ais_codes import NAV_STATUS_DESCRIPTIONS
+from charts import render_chart_png, time_axis, time_column, MAX_CHART_POINTS
+from segmentation import vessel_segments
+from spatial_index import latest_positions, latest_rows_per_vessel
+from search import structured_query, get_text_index, text_search, time_slice, paginate, PAGE_SIZE
+from pdf_report import report_cache_key, get_cached_report, LOGO_PATH
+from job_queue import get_job_queue
+from dataset_cache import file_digest, store_cached_dataset, list_cached_datasets
+from profiling import (stage, profiled, start_run, run_records, stage_totals, memory_tracing,
+                       set_memory_tracing, write_prometheus_file, prometheus_text, records_json_lines, METRICS_FILE)
+
+
+# Streamlit UI only. Loading, analytics, charts and reports live in the
+# modules imported above and run headless too (see ships_cli.py); importing
+# this module has no side effects, the app starts from main().
+# Folium loads with the first map page.
 
 
 # ---------------- SESSION STATE FOR AUTHENTICATION ----------------
-if 'authenticated' not in st.session_state:
-    st.session_state.authenticated = False
-if 'df' not in st.session_state:
-    st.session_state.df = None
-if 'selected_mmsi' not in st.session_state:
-    st.session_state.selected_mmsi = None
+def init_session_state():
+    if 'authenticated' not in st.session_state:
+        st.session_state.authenticated = False
+    if 'dataset_id' not in st.session_state:
+        st.session_state.dataset_id = None
+    if 'selected_mmsi' not in st.session_state:
+        st.session_state.selected_mmsi = None
+    if 'upload_key' not in st.session_state:
+        st.session_state.upload_key = None
+    if 'feed_seen' not in st.session_state:
+        st.session_state.feed_seen = None
+    if 'username' not in st.session_state:
+        st.session_state.username = None
+    if 'job_owner' not in st.session_state:
+        st.session_state.job_owner = None
 
 # ---------------- USER CREDENTIALS (For Demo) ----------------
 USER_CREDENTIALS = {"admin": "password123"}
 
+# Users who see the profiling debug panel
+ADMIN_USERS = {"admin"}
+
 # ---------------- FUNCTION TO CONVERT IMAGE TO BASE64 ----------------
 def get_base64_image(image_path):
     with open(image_path, "rb") as img_file:
         base64_str = base64.b64encode(img_file.read()).decode("utf-8")
     return base64_str
 
-# Convert logo to Base64
-logo_base64 = get_base64_image(r"C:\Users\RSDSOffice\Downloads\Dfy Graviti Logo.png")
-
 # ---------------- LOGIN FUNCTION ----------------
 def login():
-    # Display logo at the top
-    st.markdown(
-        f"""
-        <div style="text-align: center;">
-            <img src="data:image/png;base64,{logo_base64}" width="150">
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+    # Display the bundled logo at the top
+    if os.path.exists(LOGO_PATH):
+        st.markdown(
+            f"""
+            <div style="text-align: center;">
+                <img src="data:image/png;base64,{get_base64_image(LOGO_PATH)}" width="150">
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
 
 
 
@@ -62,6 +87,7 @@ def login():
     if st.button("Login"):
         if username in USER_CREDENTIALS and USER_CREDENTIALS[username] == password:
             st.session_state.authenticated = True
+            st.session_state.username = username
             st.success(f"Welcome, {username}!")
             st.rerun()
         else:
@@ -75,117 +101,398 @@ def logout():
 
 
 
+# ---------------- SHARED DATASET ACCESSOR ----------------
+# The session holds only the dataset id; the data lives once in the
+# process-wide registry. One snapshot is taken per script run, so every
+# section of a page reads the same version even while rows are appended.
+# Thread-local: every session's script runs on its own thread; main() starts
+# each run with no snapshot.
+_run_store = threading.local()
+
+
+def get_store():
+    if getattr(_run_store, "store", None) is None:
+        _run_store.store = get_dataset(st.session_state.dataset_id)
+    return _run_store.store
+
+
+# ---------------- VESSEL TRACK ACCESSOR ----------------
+def get_vessel_track(mmsi=None):
+    # Every page reads a vessel's rows through the index built at upload time
+    if mmsi is None:
+        mmsi = st.session_state.selected_mmsi
+    return get_store().vessel_index.track(mmsi)
+
+
+def get_vessel_kinematics(mmsi=None):
+    # Derived speed/distance/drift and anomaly flags, row-aligned with get_vessel_track()
+    if mmsi is None:
+        mmsi = st.session_state.selected_mmsi
+    store = get_store()
+    return store.vessel_index.rows(store.kinematics, mmsi)
+
+
+def get_vessel_segments(mmsi=None):
+    # Voyage/stop table for one vessel, derived once per dataset
+    if mmsi is None:
+        mmsi = st.session_state.selected_mmsi
+    return vessel_segments(get_store().segments, mmsi)
+
+
+def chart_window(frame):
+    # 📅 Date range for a page's charts, as (start, end) IST, or None for the whole track
+    times = time_axis(frame)
+    if len(times) == 0:
+        return None
+    first, last = (pd.Timestamp(t).date() for t in (times[0], times[-1]))
+    if first == last:
+        return None
+
+    # Keyed by vessel: the range follows the user across the chart pages, and
+    # switching vessels never keeps a range outside the new track
+    picked = st.date_input("📅 Chart dates (IST)", value=(first, last), min_value=first, max_value=last,
+                           key=f"chart_dates_{st.session_state.selected_mmsi}")
+    if not isinstance(picked, (tuple, list)) or len(picked) != 2 or tuple(picked) == (first, last):
+        return None
+    return pd.Timestamp(picked[0]), pd.Timestamp(picked[1] + datetime.timedelta(days=1))
+
+
+def show_chart(frame, chart_type, window=None):
+    # Shared, cached chart pipeline; the PDF report draws from the same cache
+    mmsi = st.session_state.selected_mmsi
+    if window is not None:
+        frame = time_slice(frame, *window, column=time_column(frame), end_inclusive=False)
+        if len(frame) == 0:
+            st.info("No data in the selected dates.")
+            return
+    with stage(f"chart:{chart_type}"):
+        st.image(render_chart_png(frame, chart_type, get_store().cache_id(mmsi), mmsi, filters=window or ()))
+    if len(frame) > MAX_CHART_POINTS:
+        st.caption(f"{len(frame):,} pings reduced to at most {MAX_CHART_POINTS:,} points for display.")
+
+
+def set_active_dataset(dataset_id, df, static=None):
+    # Index the dataset and derive kinematics, spatial grid and segments once
+    _run_store.store = register_dataset(dataset_id, df, static)
+    st.session_state.dataset_id = dataset_id
+
+
+# Decoded AIS CSVs, or raw !AIVDM/!AIVDO logs decoded on upload
+UPLOAD_TYPES = ["csv", "nmea", "ais", "txt", "log"]
+
+
+# ---------------- 📡 LIVE FEED / APPEND MODE ----------------
+def append_rows(new_rows, source_label, static=None):
+    added, duplicates, mmsis = append_to_dataset(st.session_state.dataset_id, new_rows, static)
+    _run_store.store = get_dataset(st.session_state.dataset_id)
+    if added:
+        st.success(f"{source_label}: added {added:,} new rows for {len(mmsis):,} vessels ({duplicates:,} duplicates skipped).")
+    else:
+        st.info(f"{source_label}: no new rows ({duplicates:,} duplicates skipped).")
+
+
+def live_feed_panel():
+    # Merge newer rows into the loaded dataset instead of re-uploading the history
+    dataset_id = st.session_state.dataset_id
+    with st.expander("📡 Live Feed / Append New Data"):
+        append_file = st.file_uploader("Append a CSV or NMEA log with newer rows", type=UPLOAD_TYPES, key="append_file")
+        if append_file is not None and st.button("➕ Append File"):
+            try:
+                new_rows, _, static = read_ais_file(append_file)
+                append_rows(new_rows, append_file.name, static)
+            except ValueError as e:
+                st.error(str(e))
+
+        # One feed per dataset for the whole app; it keeps appending, for every
+        # session, until someone stops it
+        feed = get_feed(dataset_id)
+        if feed is None:
+            drop_dir = st.text_input("📁 File-drop directory", value=DEFAULT_DROP_DIR)
+            col1, col2 = st.columns(2)
+            port = col1.number_input("🔌 Local socket port", min_value=1024, max_value=65535, value=DEFAULT_FEED_PORT)
+            use_socket = col2.checkbox("Listen on the socket too")
+            if st.button("▶️ Start Live Feed"):
+                try:
+                    start_feed(dataset_id, drop_dir, int(port) if use_socket else None)
+                    st.rerun()
+                except OSError as e:
+                    st.error(f"Could not listen on port {port}: {e}")
+        else:
+            sources = []
+            if feed.drop_source is not None:
+                sources.append(f"📁 {feed.drop_source.directory}")
+            if feed.socket_source is not None:
+                sources.append(f"🔌 port {feed.socket_source.port}")
+            st.write(f"📡 Live feed polling {' and '.join(sources)} every {feed.poll_seconds:g} s "
+                     f"({feed.rows_added:,} rows added so far).")
+            if feed.last_message:
+                st.caption(feed.last_message)
+            if st.button("⏹️ Stop Live Feed"):
+                stop_feed(dataset_id)
+                st.rerun()
+
+
+@st.fragment(run_every=FEED_POLL_SECONDS)
+def live_feed_status():
+    # Re-runs by itself every poll; the whole page re-runs only when the feed added rows
+    feed = get_feed(st.session_state.dataset_id)
+    if feed is None:
+        return
+    st.caption(f"📡 Live feed: {feed.rows_added:,} rows added")
+    if feed.last_error:
+        st.caption(f"⚠️ Live feed error: {feed.last_error}")
+    seen = (id(feed), feed.rows_added)
+    previous, st.session_state.feed_seen = st.session_state.feed_seen, seen
+    if previous is not None and previous[0] == seen[0] and previous[1] != seen[1]:
+        st.rerun()
+
+
 # ---------------- 1️⃣ UPLOAD & SELECT MMSI PAGE ----------------
 
+@profiled("page:upload")
 def upload_page():
     st.title("🚢 Ship Data & Select MMSI ")
 
-    uploaded_file = st.file_uploader("Upload a Ship Data CSV", type=["csv"])
+    uploaded_file = st.file_uploader("Upload a Ship Data CSV or raw AIS NMEA log", type=UPLOAD_TYPES)
     
     if uploaded_file:
-        st.session_state.df = pd.read_csv(uploaded_file)
-        st.session_state.df["Timestamp"] = pd.to_datetime(st.session_state.df["Timestamp"])
+        # Only re-parse and re-index when a different file is uploaded
+        upload_key = (uploaded_file.name, uploaded_file.size)
+        if st.session_state.upload_key != upload_key:
+            dataset_id = file_digest(uploaded_file)
+
+            # Already open in another session, or in the columnar cache: share it
+            if get_dataset(dataset_id) is None:
+                progress_bar = st.progress(0.0, text="Loading AIS data...")
+
+                def update_progress(fraction, rows_read, rows_dropped):
+                    if fraction is not None:
+                        progress_bar.progress(fraction, text=f"Loaded {rows_read:,} rows ({rows_dropped:,} invalid rows dropped)")
+
+                try:
+                    with stage("parse upload"):
+                        df, rows_dropped, static = read_ais_file(uploaded_file, progress_callback=update_progress)
+                except ValueError as e:
+                    progress_bar.empty()
+                    st.error(str(e))
+                    return
+                progress_bar.empty()
+
+                if rows_dropped:
+                    st.warning(f"Dropped {rows_dropped:,} rows with missing or invalid MMSI, timestamp, position or message type.")
+                raw_bytes = df.attrs.get("raw_bytes")
+                with stage("build store"):
+                    set_active_dataset(dataset_id, df, static)
+
+                # 💾 Footprint of the compact frame vs. the same rows as plain pandas
+                compact_bytes = frame_memory(get_store().df)
+                if raw_bytes and compact_bytes:
+                    st.caption(f"💾 Memory: {raw_bytes / 1024 ** 2:,.1f} MB as parsed → {compact_bytes / 1024 ** 2:,.1f} MB compact "
+                               f"({raw_bytes / compact_bytes:,.1f}x smaller)")
+                with stage("dataset cache write"):
+                    store_cached_dataset(dataset_id, get_store().df, uploaded_file.name, vessel_info=get_store().vessel_info)
+            else:
+                st.session_state.dataset_id = dataset_id
+                _run_store.store = None
+            st.session_state.upload_key = upload_key
+    else:
+        # 📂 Reopen a previously uploaded dataset from the columnar cache
+        recent = {entry["dataset_id"]: entry for entry in list_cached_datasets()}
+        if recent:
+            choice = st.selectbox(
+                "📂 Or open a recent dataset:",
+                [None] + list(recent),
+                format_func=lambda d: "—" if d is None else f"{recent[d]['name']} ({recent[d]['rows']:,} rows)",
+            )
+            if choice is not None and choice != st.session_state.dataset_id:
+                # Shared with any session that already has it open
+                if get_dataset(choice) is not None:
+                    st.session_state.dataset_id = choice
+                    _run_store.store = None
+                    st.session_state.upload_key = None
     
-    if st.session_state.df is not None:
-        unique_mmsi = st.session_state.df["MMSI"].unique().tolist()
-        st.session_state.selected_mmsi = st.selectbox("Select Ship (MMSI):", unique_mmsi)
+    if get_store() is not None:
+        live_feed_panel()
+
+        store = get_store()
+        unique_mmsi = store.mmsi_list
+        st.session_state.selected_mmsi = st.selectbox(
+            "Select Ship (MMSI):", unique_mmsi,
+            format_func=lambda mmsi: f"{mmsi} – {store.vessel_name(mmsi)}" if store.vessel_name(mmsi) else str(mmsi),
+        )
         
-        # Filter data based on selected MMSI
-        df_selected = st.session_state.df[st.session_state.df["MMSI"] == st.session_state.selected_mmsi]
+        # Slice the selected vessel out of the MMSI index
+        df_selected = get_vessel_track()
 
         st.subheader(f"📍 Ship Data for MMSI: {st.session_state.selected_mmsi}")
 
+        # 🧭 Structured filters, applied as vectorized predicates on the typed columns
+        query = {}
+        with st.expander("🧭 Filter by time, area, speed and status"):
+            if len(df_selected) > 1:
+                t_min = df_selected["Timestamp"].iloc[0].to_pydatetime()
+                t_max = df_selected["Timestamp"].iloc[-1].to_pydatetime()
+                if t_min < t_max:
+                    time_range = st.slider("Time range (UTC)", min_value=t_min, max_value=t_max, value=(t_min, t_max))
+                    if time_range != (t_min, t_max):
+                        query["start"], query["end"] = time_range
+
+                lat_bounds = (math.floor(df_selected["Latitude"].min() * 100) / 100, math.ceil(df_selected["Latitude"].max() * 100) / 100)
+                lon_bounds = (math.floor(df_selected["Longitude"].min() * 100) / 100, math.ceil(df_selected["Longitude"].max() * 100) / 100)
+                col1, col2 = st.columns(2)
+                lat_range = col1.slider("Latitude", lat_bounds[0], max(lat_bounds[1], lat_bounds[0] + 0.01), lat_bounds)
+                lon_range = col2.slider("Longitude", lon_bounds[0], max(lon_bounds[1], lon_bounds[0] + 0.01), lon_bounds)
+                if lat_range != lat_bounds or lon_range != lon_bounds:
+                    query["bbox"] = (lat_range[0], lon_range[0], lat_range[1], lon_range[1])
+
+                speed_max = math.ceil(np.nan_to_num(df_selected["Speed_over_ground"].max())) or 1.0
+                speed_range = st.slider("Speed (knots)", 0.0, float(speed_max), (0.0, float(speed_max)))
+                if speed_range != (0.0, float(speed_max)):
+                    query["speed_range"] = speed_range
+
+                query["statuses"] = st.multiselect(
+                    "Navigation Status:",
+                    sorted(df_selected["Navigation_Status"].unique().tolist()),
+                    format_func=lambda code: f"{code} – {NAV_STATUS_DESCRIPTIONS.get(code, 'Unknown')}",
+                )
+
+        with stage("filter"):
+            df_selected = structured_query(df_selected, **query)
+
         # Search bar to find specific records
         search_query = st.text_input("🔍 Search within extracted data (e.g., Timestamp, Latitude, Longitude)")
         
         if search_query:
-            df_selected = df_selected[df_selected.astype(str).apply(lambda x: x.str.contains(search_query, case=False)).any(axis=1)]
-        
-        st.write(df_selected)
+            with stage("text search"):
+                track = get_vessel_track()
+                text_index = get_text_index(track, (get_store().cache_id(st.session_state.selected_mmsi), st.session_state.selected_mmsi))
+                df_selected = text_search(df_selected, search_query, text_index, track)
+
+        # Paginated display instead of sending the whole frame to the browser
+        n_pages = max((len(df_selected) + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+        page = st.number_input(f"Page (of {n_pages:,}, {len(df_selected):,} rows)", min_value=1, max_value=n_pages, value=1)
+        with stage("table"):
+            page_rows, _ = paginate(df_selected, page)
+            st.write(page_rows)
 
         # Download button for extracted data
-        csv = df_selected.to_csv(index=False).encode("utf-8")
+        with stage("csv export"):
+            csv = df_selected.to_csv(index=False).encode("utf-8")
         st.download_button(label="📥 Download Extracted Data as CSV", data=csv, file_name=f"MMSI_{st.session_state.selected_mmsi}_data.csv", mime="text/csv")
 # ---------------- 2️⃣ SHIP ROUTE PAGE ----------------
 
+@profiled("page:route")
 def ship_route():
     st.title("🚢 Ship Route Map ")
 
-    if st.session_state.df is None or st.session_state.selected_mmsi is None:
+    if get_store() is None or st.session_state.selected_mmsi is None:
         st.warning("Please upload data and select an MMSI on the first page.")
         return
 
-    df_selected = st.session_state.df[st.session_state.df["MMSI"] == st.session_state.selected_mmsi].sort_values(by="Timestamp")
+    import folium
+    from folium.plugins import MarkerCluster
+    from streamlit_folium import folium_static
+
+    df_selected = get_vessel_track()
 
     # 🗺️ Ship Route Map
+    zoom = st.select_slider("🔎 Route detail (map zoom level)", options=list(range(3, 15)), value=6)
+
     start_location = [df_selected.iloc[0]["Latitude"], df_selected.iloc[0]["Longitude"]]
-    m = folium.Map(location=start_location, zoom_start=6)
-    
-    path = df_selected[["Latitude", "Longitude"]].values.tolist()
+    m = folium.Map(location=start_location, zoom_start=zoom)
+
+    # Simplified polyline so the page size stays bounded for long tracks
+    lat = df_selected["Latitude"].to_numpy()
+    lon = df_selected["Longitude"].to_numpy()
+    with stage("simplify track"):
+        keep = simplify_track(lat, lon, zoom)
+    path = np.column_stack([lat[keep], lon[keep]]).tolist()
     folium.PolyLine(path, color="red", weight=2.5, opacity=0.7).add_to(m)
 
-    for i, row in df_selected.iterrows():
-        color, label = ("green", "Start") if i == 0 else ("red", "End") if i == len(df_selected) - 1 else ("blue", "")
+    # Markers only on key events; stops come from the voyage/stop segmentation
+    events = key_event_indices(df_selected["Speed_over_ground"], df_selected["Course_over_ground"], stops=False)
+    event_colors = {"Start": "green", "End": "red", "Stop": "orange", "Turn": "blue"}
+    event_cluster = MarkerCluster().add_to(m)
+
+    # Offline nearest-port labels for the event markers
+    event_rows = list(events)
+    with stage("geocode events"):
+        event_places = location_labels(lat[event_rows], lon[event_rows])
+
+    for (i, label), place in zip(events.items(), event_places):
+        row = df_selected.iloc[i]
         folium.Marker(
             location=[row["Latitude"], row["Longitude"]],
             popup=f"<b>MMSI:</b> {st.session_state.selected_mmsi}<br>"
                   f"<b>Time:</b> {row['Timestamp_IST']}<br>"
+                  f"<b>Location:</b> {place}<br>"
                   f"<b>Speed:</b> {row['Speed_over_ground']} knots<br>"
                   f"<b>TH:</b> {row['True_heading']}°<br>"
                   f"<b>COG:</b> {row['Course_over_ground']}°<br>"
                   f"<b>{label}</b>",
-            icon=folium.Icon(color=color, icon="info-sign")
-        ).add_to(m)
+            icon=folium.Icon(color=event_colors[label], icon="info-sign")
+        ).add_to(m if label in ("Start", "End") else event_cluster)
+
+    # Longest stops only, so the page stays bounded like the event markers
+    stops = get_vessel_segments()
+    stops = stops[stops["Kind"] == "Stop"]
+    total_stops = len(stops)
+    if total_stops > MAX_EVENT_MARKERS:
+        stops = stops.nlargest(MAX_EVENT_MARKERS, "Duration").sort_values("Start")
+    for stop in stops.itertuples(index=False):
+        folium.Marker(
+            location=[stop.Latitude, stop.Longitude],
+            popup=f"<b>MMSI:</b> {st.session_state.selected_mmsi}<br>"
+                  f"<b>Stop:</b> {stop.Start:%Y-%m-%d %H:%M} → {stop.End:%Y-%m-%d %H:%M} UTC<br>"
+                  f"<b>Duration:</b> {stop.Duration}<br>"
+                  f"<b>Location:</b> {stop.Location}",
+            icon=folium.Icon(color="orange", icon="anchor", prefix="fa")
+        ).add_to(event_cluster)
 
-    folium_static(m)
+    with stage("folium render"):
+        folium_static(m)
+    st.caption(f"Showing {len(keep):,} of {len(df_selected):,} track points, {len(events)} key events and {len(stops)} of {total_stops} stops.")
 
     # 📊 **Rate of Turn (ROT) vs. Time Analysis**
     st.subheader("📈 Rate of Turn (ROT) Over Time")
-    
-    df_selected["Timestamp_IST"] = pd.to_datetime(df_selected["Timestamp_IST"])
-    df_selected["Formatted_Time"] = df_selected["Timestamp_IST"].dt.strftime("%H:%M:%S")
-
-    # Plot ROT vs. Time
-    fig, ax = plt.subplots(figsize=(10, 5))
-    sns.lineplot(x=df_selected["Formatted_Time"], y=df_selected["Rate_of_turn"], ax=ax, marker="o", color="blue")
+    show_chart(df_selected, "rate_of_turn", chart_window(df_selected))
 
-    ax.set_xlabel("Time (HH:MM:SS)")
-    ax.set_ylabel("Rate of Turn (°/min)")
-    ax.set_title("Ship's Rate of Turn Over Time")
 
-    plt.xticks(rotation=45, ha="right")  
-    ax.xaxis.set_major_locator(plt.MaxNLocator(nbins=8))  
-
-    st.pyplot(fig)
-    
-   
 
 # ---------------- 3️⃣ SPEED ANALYSIS PAGE ----------------
+@profiled("page:speed")
 def speed_analysis():
     st.title("📊 Ship Data Analysis")
-    if st.session_state.df is None or st.session_state.selected_mmsi is None:
+    if get_store() is None or st.session_state.selected_mmsi is None:
         st.warning("Please upload data and select an MMSI on the first page.")
         return
 
-    df_selected = st.session_state.df[st.session_state.df["MMSI"] == st.session_state.selected_mmsi]
-
-    # Convert timestamps to a readable format
-    df_selected["Timestamp_IST"] = pd.to_datetime(df_selected["Timestamp_IST"])
-    df_selected["Formatted_Time"] = df_selected["Timestamp_IST"].dt.strftime("%H:%M:%S")
+    df_selected = get_vessel_track()
+    window = chart_window(df_selected)
 
     st.subheader("⏳ Time vs Speed Analysis")
-    fig, ax = plt.subplots(figsize=(10, 5))  # Adjust figure size
-    
-    sns.lineplot(x=df_selected["Formatted_Time"], y=df_selected["Speed_over_ground"], ax=ax)
-    
-    ax.set_xlabel("Time (HH:MM)")
-    ax.set_ylabel("Speed (knots)")
-    ax.set_title("Ship Speed Over Time")
-    
-    plt.xticks(rotation=45, ha="right")  # Rotate & align labels
-    ax.xaxis.set_major_locator(plt.MaxNLocator(nbins=8))  # Limit the number of labels
+    show_chart(df_selected, "speed", window)
+
+    # 📐 Speed derived from position deltas, to cross-check the reported SOG
+    kinematics = get_vessel_kinematics()
+    df_kinematics = pd.concat([df_selected, kinematics], axis=1)
 
-    st.pyplot(fig)
+    st.subheader("📐 Reported vs Position-Derived Speed")
+    show_chart(df_kinematics, "implied_speed", window)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Distance Travelled", f"{kinematics['Segment_distance_nm'].sum():,.1f} NM")
+    col2.metric("Max Implied Speed", f"{kinematics['Implied_speed_kn'].max():,.1f} knots")
+    col3.metric("Longest AIS Gap", f"{kinematics['Time_gap_s'].max() / 60:,.0f} min")
+
+    # 🧭 Voyages between stops
+    st.subheader("🧭 Voyages")
+    voyages = get_vessel_segments()
+    voyages = voyages[voyages["Kind"] == "Voyage"]
+    hours = voyages["Duration"].dt.total_seconds() / 3600
+    st.write(voyages[["Start", "End", "Duration", "Pings", "Distance_nm", "Max_speed_kn"]].assign(
+        Avg_speed_kn=(voyages["Distance_nm"] / hours.where(hours > 0)).round(1)
+    ))
 
 
 
@@ -205,27 +512,21 @@ def speed_analysis():
     
         
     # Plot True Heading vs. COG
-    fig, ax = plt.subplots(figsize=(10, 5))
-    sns.lineplot(x=df_selected["Formatted_Time"], y=df_selected["True_heading"], label="True Heading (TH)", ax=ax)
-    sns.lineplot(x=df_selected["Formatted_Time"], y=df_selected["Course_over_ground"], label="Course Over Ground (COG)", ax=ax)
-        
-    ax.set_xlabel("Time")
-    ax.set_ylabel("Angle (°)")
-    ax.set_title("True Heading vs. Course Over Ground Over Time")
-    
-    plt.xticks(rotation=45, ha="right")  # Rotate & align labels
-    ax.xaxis.set_major_locator(plt.MaxNLocator(nbins=8))  # Limit the number of labels 
-        
-    st.pyplot(fig)
+    show_chart(df_selected, "heading_cog", window)
+
+    # Drift angle COG - TH, wrapped so 359° vs 1° reads as 2° rather than 358°
+    st.subheader("🧭 Drift Angle (COG − TH)")
+    show_chart(df_kinematics, "drift", window)
 
 
 
 # ---------------- 4️⃣ SHIP CODES PAGE ----------------
 
+@profiled("page:codes")
 def ship_codes():
     st.title("📄 Ship Codes")
 
-    if st.session_state.df is None or st.session_state.selected_mmsi is None:
+    if get_store() is None or st.session_state.selected_mmsi is None:
         st.warning("Please upload data and select an MMSI on the first page.")
         return
 
@@ -234,33 +535,18 @@ def ship_codes():
 
     st.subheader("🚦 Navigation Status Codes")
 
-    df_selected = st.session_state.df[st.session_state.df["MMSI"] == st.session_state.selected_mmsi].copy()
+    df_selected = get_vessel_track().copy()
+    window = chart_window(df_selected)
 
-    # Convert timestamps for better readability
-    df_selected["Timestamp_IST"] = pd.to_datetime(df_selected["Timestamp_IST"])
-    df_selected["Formatted_Time"] = df_selected["Timestamp_IST"].dt.strftime("%H:%M:%S")
+    # Timestamps were parsed once at load; only format them for display
+    df_selected["Formatted_Time"] = df_selected["Timestamp_IST"].dt.strftime("%Y-%m-%d %H:%M:%S")
 
-    # Keep only valid Navigation Status codes
-    nav_status_dict = {
-        0: "Under way using engine", 1: "At anchor", 2: "Not under command", 3: "Restricted maneuverability",
-        4: "Constrained by draft", 5: "Moored", 6: "Aground", 7: "Engaged in fishing",
-        8: "Under way sailing", 9: "Reserved for future use", 10: "Reserved for future use",
-        11: "Power-driven vessel towing astern", 12: "Power-driven vessel pushing ahead/towing alongside",
-        14: "AIS-SART, MOB-AIS, EPIRB-AIS", 15: "Undefined"
-    }
-    
-    # Replace numeric codes with descriptions
-    df_selected["Navigation Status Description"] = df_selected["Navigation_Status"].map(nav_status_dict)
+    # Descriptions are categorical columns built at load
+    df_selected["Navigation Status Description"] = df_selected["Navigation_Status_Description"]
 
 # ---------- 🚦 Navigation Status Analysis ----------
     
-    fig2, ax2 = plt.subplots(figsize=(10, 5))
-    sns.lineplot(x=df_selected["Formatted_Time"], y=df_selected["Navigation_Status"], marker="o", ax=ax2)
-    ax2.set_xlabel("Time (HH:MM)")
-    ax2.set_ylabel("Navigation Status Code")
-    ax2.set_title("Navigation Status Changes Over Time")
-    plt.xticks(rotation=45, ha="right")
-    st.pyplot(fig2)
+    show_chart(df_selected, "navigation_status", window)
 
     # Show Data Table
     st.write(df_selected[["Formatted_Time", "Navigation_Status", "Navigation Status Description"]])
@@ -271,254 +557,288 @@ def ship_codes():
     st.subheader("📡 AIS Message Type Over Time")
 
 
-    # Keep only valid AIS Message Type codes
-    msg_type_dict = {
-        1: "Position Report (Class A)", 2: "Position Report (Class A, Assigned Schedule)",
-        3: "Position Report (Class A, Special)", 4: "Base Station Report",
-        5: "Static and Voyage Related Data", 6: "Binary Addressed Message",
-        7: "Binary Acknowledge", 8: "Binary Broadcast Message",
-        9: "Standard SAR Aircraft Position Report", 10: "UTC and Date Inquiry",
-        11: "UTC and Date Response", 12: "Addressed Safety-Related Message",
-        13: "Safety-Related Acknowledge", 14: "Safety-Related Broadcast Message",
-        15: "Interrogation", 16: "Assignment Mode Command",
-        17: "DGNSS Binary Broadcast Message", 18: "Standard Class B CS Position Report",
-        19: "Extended Class B Equipment Position Report", 20: "Data Link Management Message",
-        21: "Aid-to-Navigation Report", 22: "Channel Management",
-        23: "Group Assignment Command", 24: "Static Data Report",
-        25: "Single Slot Binary Message", 26: "Multiple Slot Binary Message with Communication State",
-        27: "Long Range AIS Broadcast Message"
-    }
-
-    # Replace numeric codes with descriptions
-    df_selected["Message Type Description"] = df_selected["Message_Type"].map(msg_type_dict)
+    df_selected["Message Type Description"] = df_selected["Message_Type_Description"]
 
 # ---------- 🚦 AIS Message Status Analysis ----------
     
-    fig2, ax2 = plt.subplots(figsize=(10, 5))
-    sns.lineplot(x=df_selected["Formatted_Time"], y=df_selected["Message_Type"], marker="o", ax=ax2)
-    ax2.set_xlabel("Time (HH:MM:SS)")
-    ax2.set_ylabel("Message Type Code")
-    ax2.set_title("Message Code Changes Over Time")
-    plt.xticks(rotation=45, ha="right")
-    st.pyplot(fig2)
+    show_chart(df_selected, "message_type", window)
 
     # Show Data Table
     st.write(df_selected[["Formatted_Time", "Message_Type", "Message Type Description"]])
 
+    ### ⚓ Detected Stops (speed, dwell and status combined)
+    st.subheader("⚓ Detected Stops")
+    st.write("Stops derived from speed, position dwell and status together, since reported Navigation Status is often stale.")
+    stops = get_vessel_segments()
+    stops = stops[stops["Kind"] == "Stop"]
+    if len(stops):
+        st.write(stops[["Start", "End", "Duration", "Pings", "Location"]])
+    else:
+        st.write("No stops detected for this vessel.")
+
+    ### ⚠️ Kinematic Anomalies
+    st.subheader("⚠️ Kinematic Anomalies")
+    kinematics = get_vessel_kinematics()
+
+    counts = anomaly_summary(kinematics)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Teleport Jumps", counts["Teleport_jump"])
+    col2.metric("Implied Speed Anomalies", counts["Implied_speed_anomaly"])
+    col3.metric("AIS Silences", counts["AIS_silence"])
+
+    flagged = kinematics[ANOMALY_COLUMNS].any(axis=1)
+    if flagged.any():
+        anomalies = pd.concat([df_selected[["Formatted_Time", "Latitude", "Longitude", "Navigation_Status"]], kinematics], axis=1)[flagged]
+        st.write(anomalies)
+    else:
+        st.write("No kinematic anomalies detected for this vessel.")
+
     ### 📥 Download Report as CSV
-    report_csv = df_selected[["MMSI", "Formatted_Time", "Navigation_Status", "Navigation Status Description", "Message_Type", "Message Type Description"]].to_csv(index=False).encode("utf-8")
+    with stage("csv export"):
+        report_csv = df_selected[["MMSI", "Formatted_Time", "Navigation_Status", "Navigation Status Description", "Message_Type", "Message Type Description"]].to_csv(index=False).encode("utf-8")
     st.download_button(label="📥 Download Report as CSV", data=report_csv, file_name=f"Ship_Report_MMSI_{st.session_state.selected_mmsi}.csv", mime="text/csv")
 
 # ---------------- Download PDF ----------------
 
 
+@profiled("page:report")
 def report():
     st.title("📄 Download Ship Report")
 
-    if st.session_state.df is None or st.session_state.selected_mmsi is None:
+    if get_store() is None or st.session_state.selected_mmsi is None:
         st.warning("Please upload data and select an MMSI first.")
         return
     
-    df_selected = st.session_state.df[st.session_state.df["MMSI"] == st.session_state.selected_mmsi].copy()
+    df_selected = get_vessel_track()
+
+    include_details = st.checkbox("Include full per-ping status and message tables (slow for long tracks)")
+    mmsi = st.session_state.selected_mmsi
 
-    # Generate and Download PDF
+    # Reports render in the background; a report generated before is served at once
     if st.button("📄 Generate PDF Report"):
-        pdf_filename = generate_pdf_report(df_selected, st.session_state.selected_mmsi)
-        
-        with open(pdf_filename, "rb") as pdf_file:
+        pdf_bytes = get_cached_report(report_cache_key(df_selected, mmsi, include_details))
+        if pdf_bytes is not None:
             st.download_button(
                 label="📥 Download PDF Report", 
-                data=pdf_file, 
-                file_name=pdf_filename, 
+                data=pdf_bytes, 
+                file_name=f"Ship_Report_MMSI_{mmsi}.pdf", 
                 mime="application/pdf"
             )
+        else:
+            submit_job("report", (df_selected, mmsi, include_details, get_vessel_segments(), get_store().cache_id(mmsi)),
+                       f"PDF report – MMSI {mmsi}")
 
+    # ---------- 📦 Batch Reports for Many Vessels ----------
+    st.subheader("📦 Batch PDF Reports")
 
+    all_vessels = st.checkbox("All vessels in the dataset")
+    if all_vessels:
+        batch_mmsis = get_store().mmsi_list
+    else:
+        batch_mmsis = st.multiselect("Select Ships (MMSI):", get_store().mmsi_list)
 
-def generate_pdf_report(df_selected, mmsi):
-    pdf_filename = f"Ship_Report_MMSI_{mmsi}.pdf"
-    
-    # Create PDF document
-    doc = SimpleDocTemplate(pdf_filename, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-
-    # 🔹 **Custom Subtitle Style (Centered)**
-    subtitle_style = ParagraphStyle(
-        name="SubtitleStyle",
-        parent=styles["Normal"],
-        fontSize=12,
-        textColor="navy",
-        alignment=1,  # 1 = Centered
-        spaceAfter=10  # Add space below
-    )
-
-    tagline_style = ParagraphStyle(
-        name="TaglineStyle",
-        parent=styles["Normal"],
-        fontSize=10,
-        textColor="gray",
-        alignment=1,
-        spaceAfter=20
-    )
-
-    # 🔹 **Add Logo (Centered)**
-
-
-
-    
-
-    # Convert logo 
-    logo_path = r"C:\Users\RSDSOffice\Downloads\Dfy Graviti Logo.png"
-    
-    try:
-        logo = Image(logo_path, width=80, height=80)  # Adjust size
-        logo.hAlign = "CENTER"  
-        elements.append(logo)
-
-        # Space after logo
-        elements.append(Spacer(1, 10))
-
-        # 🔹 **Add Subtitle (Now Centered & Styled)**
-        elements.append(Paragraph("🚢 Navigating the Vastness of Oceans and the Cosmos", subtitle_style))
-        elements.append(Paragraph("Uncover critical maritime and space anomalies with precision", tagline_style))
-
-        # Space after subtitle
-        elements.append(Spacer(1, 20))
-
-    except Exception as e:
-        print("Error loading logo:", e)  # Handle missing image gracefully
-
-    # 🔹 **Main Title**
-    elements.append(Paragraph(f"📄 Ship Report for MMSI: {mmsi}", styles['Title']))
-    elements.append(Spacer(1, 20))  # Space before next section
-
-
-    df_selected = st.session_state.df[st.session_state.df["MMSI"] == st.session_state.selected_mmsi].copy()
-
-    # Convert timestamps for better readability
-    df_selected["Timestamp_IST"] = pd.to_datetime(df_selected["Timestamp_IST"])
-    df_selected["Formatted_Time"] = df_selected["Timestamp_IST"].dt.strftime("%H:%M:%S")
-
-  
-    # Save and Add Rate of Turn Over Time Chart
-    rate_path = "rate.png"
-    plt.figure(figsize=(10, 5))
-    sns.lineplot(x=df_selected["Formatted_Time"], y=df_selected["Rate_of_turn"], marker="o")
-    plt.xlabel("Time (HH:MM:SS)")
-    plt.ylabel("Rate of Turn")
-    plt.title("Rate of Turn Changes Over Time")
-    plt.xticks(rotation=45, ha="right")
-    plt.savefig(rate_path, bbox_inches="tight")
-    plt.close()
-    elements.append(Image(rate_path, width=400, height=200))
-
-
-    
-    # Save and Add Time Vs Speed Chart
-    speed_path = "speed.png"
-    plt.figure(figsize=(10, 5))
-    sns.lineplot(x=df_selected["Formatted_Time"], y=df_selected["Speed_over_ground"], marker="o")
-    plt.xlabel("Time (HH:MM:SS)")
-    plt.ylabel("Speed")
-    plt.title("Speed Changes Over Time")
-    plt.xticks(rotation=45, ha="right")
-    plt.savefig(speed_path, bbox_inches="tight")
-    plt.close()
-    elements.append(Image(speed_path, width=400, height=200))
-
-   # Save and Add True Heading Vs Course over Ground Chart
-    headingcog_path = "headingcog.png"
-    fig, ax = plt.subplots(figsize=(10, 5))
-    sns.lineplot(x=df_selected["Formatted_Time"], y=df_selected["True_heading"], label="True Heading (TH)", ax=ax)
-    sns.lineplot(x=df_selected["Formatted_Time"], y=df_selected["Course_over_ground"], label="Course Over Ground (COG)", ax=ax)
-        
-    ax.set_xlabel("Time")
-    ax.set_ylabel("Angle (°)")
-    ax.set_title("True Heading vs. Course Over Ground Over Time")
-    
-    plt.xticks(rotation=45, ha="right")  # Rotate & align labels
-    plt.savefig(headingcog_path, bbox_inches="tight")
-    plt.close()
-    elements.append(Image(headingcog_path, width=400, height=200))
-
-
- # Keep only valid Navigation Status codes
-    nav_status_dict = {
-        0: "Under way using engine", 1: "At anchor", 2: "Not under command", 3: "Restricted maneuverability",
-        4: "Constrained by draft", 5: "Moored", 6: "Aground", 7: "Engaged in fishing",
-        8: "Under way sailing", 9: "Reserved for future use", 10: "Reserved for future use",
-        11: "Power-driven vessel towing astern", 12: "Power-driven vessel pushing ahead/towing alongside",
-        14: "AIS-SART, MOB-AIS, EPIRB-AIS", 15: "Undefined"
-    }
-    
-    # Replace numeric codes with descriptions
-    df_selected["Navigation Status Description"] = df_selected["Navigation_Status"].map(nav_status_dict)
-
+    if st.button("📦 Generate Batch Reports", disabled=not batch_mmsis):
+        submit_job("batch_reports", (get_store().vessel_index, list(batch_mmsis)), f"Batch of {len(batch_mmsis):,} PDF reports")
 
-    # Navigation Status Table
-    elements.append(Paragraph("🚦 Navigation Status Analysis", styles['Heading2']))
-    nav_table_data = [["Time", "Navigation Status", "Description"]] + df_selected[["Formatted_Time", "Navigation_Status", "Navigation Status Description"]].values.tolist()
-    nav_table = Table(nav_table_data)
-    nav_table.setStyle(TableStyle([('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                                   ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                                   ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                                   ('GRID', (0, 0), (-1, -1), 1, colors.black)]))
-    elements.append(nav_table)
+    # ---------- 📊 Fleet Summary ----------
+    st.subheader("📊 Fleet Summary")
+    st.write("Per-vessel distance, top speed, voyages, stops and anomaly counts for the whole dataset.")
+    if st.button("📊 Generate Vessel Summary (CSV)"):
+        submit_job("vessel_summary", (get_store(),), f"Vessel summary – {len(get_store().mmsi_list):,} vessels")
 
+    jobs_panel()
 
 
-   # Keep only valid AIS Message Type codes
-    msg_type_dict = {
-        1: "Position Report (Class A)", 2: "Position Report (Class A, Assigned Schedule)",
-        3: "Position Report (Class A, Special)", 4: "Base Station Report",
-        5: "Static and Voyage Related Data", 6: "Binary Addressed Message",
-        7: "Binary Acknowledge", 8: "Binary Broadcast Message",
-        9: "Standard SAR Aircraft Position Report", 10: "UTC and Date Inquiry",
-        11: "UTC and Date Response", 12: "Addressed Safety-Related Message",
-        13: "Safety-Related Acknowledge", 14: "Safety-Related Broadcast Message",
-        15: "Interrogation", 16: "Assignment Mode Command",
-        17: "DGNSS Binary Broadcast Message", 18: "Standard Class B CS Position Report",
-        19: "Extended Class B Equipment Position Report", 20: "Data Link Management Message",
-        21: "Aid-to-Navigation Report", 22: "Channel Management",
-        23: "Group Assignment Command", 24: "Static Data Report",
-        25: "Single Slot Binary Message", 26: "Multiple Slot Binary Message with Communication State",
-        27: "Long Range AIS Broadcast Message"
-    }
+# ---------------- ⏳ BACKGROUND JOBS ----------------
+JOB_ICONS = {"queued": "⏳", "running": "⚙️", "done": "✅", "failed": "❌", "cancelled": "🚫"}
+MAX_LISTED_JOBS = 10
 
-    # Replace numeric codes with descriptions
-    df_selected["Message Type Description"] = df_selected["Message_Type"].map(msg_type_dict)
 
+def job_owner():
+    # Jobs belong to the logged-in user, so they can be collected from any session
+    if st.session_state.job_owner is None:
+        st.session_state.job_owner = st.session_state.username or uuid.uuid4().hex
+    return st.session_state.job_owner
 
 
+def submit_job(kind, args, label):
+    try:
+        job_id = get_job_queue().submit(kind, args, label, owner=job_owner())
+    except RuntimeError as e:
+        st.error(str(e))
+        return None
+    st.success(f"⏳ Queued job {job_id}: {label}. Keep browsing; collect the result under My Jobs.")
+    return job_id
+
+
+def jobs_panel():
+    st.subheader("🗂️ My Jobs")
+    queue = get_job_queue()
+    jobs = queue.jobs(job_owner())
+    if not jobs:
+        st.write("No jobs yet. Reports and summaries run in the background while you keep browsing.")
+        return
+    st.button("🔄 Refresh Jobs")
+
+    for job in jobs[:MAX_LISTED_JOBS]:
+        col1, col2 = st.columns([4, 1])
+        submitted = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(job["submitted"]))
+        col1.write(f"{JOB_ICONS.get(job['status'], '')} **{job['label']}** — {job['status']} (submitted {submitted}, id {job['id']})")
+        if job["status"] == "running":
+            col1.progress(min(max(job["progress"], 0.0), 1.0))
+        if job["error"]:
+            col1.error(job["error"])
+        if job["note"]:
+            col1.warning(job["note"])
+        if job["status"] == "done":
+            size = f", {job['size'] / 1024:,.0f} KB" if job.get("size") is not None else ""
+            col1.caption(f"📄 {job['file_name']}{size}")
+
+        if job["status"] == "queued":
+            if col2.button("🚫 Cancel", key=f"job_cancel_{job['id']}"):
+                queue.cancel(job["id"])
+                st.rerun()
+        if job["status"] not in ("queued", "running") and col2.button("🗑️ Remove", key=f"job_remove_{job['id']}"):
+            queue.remove(job["id"])
+            st.rerun()
 
-    # AIS Message Type Table
-    elements.append(Paragraph("📡 AIS Message Type Analysis", styles['Heading2']))
-    msg_table_data = [["Time", "Message Type", "Description"]] + df_selected[["Formatted_Time", "Message_Type", "Message Type Description"]].values.tolist()
-    msg_table = Table(msg_table_data)
-    msg_table.setStyle(TableStyle([('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                                   ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                                   ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                                   ('GRID', (0, 0), (-1, -1), 1, colors.black)]))
-    elements.append(msg_table)
+    # 📥 Only the picked job's artifact is read, not every finished one on each rerun
+    done = {job["id"]: job for job in jobs[:MAX_LISTED_JOBS] if job["status"] == "done"}
+    if done:
+        job_id = st.selectbox("📥 Download a finished job:", list(done),
+                              format_func=lambda j: f"{done[j]['label']} — {done[j]['file_name']} (id {j})")
+        data = queue.result(job_id)
+        if data is not None:
+            st.download_button("📥 Download", data=data, file_name=done[job_id]["file_name"], mime=done[job_id]["mime"],
+                               key=f"job_download_{job_id}")
+
+
+# ---------------- 🌐 FLEET OVERVIEW PAGE ----------------
+
+# FastMarkerCluster builds markers client-side from plain arrays: [lat, lon, popup]
+FLEET_MARKER_CALLBACK = """
+function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.bindPopup(row[2]);
+    return marker;
+}
+"""
 
+@profiled("page:fleet")
+def fleet_overview():
+    st.title("🌐 Fleet Overview")
 
+    store = get_store()
+    if store is None or len(store) == 0:
+        st.warning("Please upload data on the first page.")
+        return
 
-    # Build PDF
-    doc.build(elements)
-    
-    return pdf_filename
+    import folium
+    from folium.plugins import FastMarkerCluster
+    from streamlit_folium import folium_static
+
+    df = store.df
+    spatial_index = store.spatial_index
+    min_lat, min_lon, max_lat, max_lon = spatial_index.bounds
+
+    # 🧭 Area / time window, answered from the spatial grid index
+    bbox = None
+    time_window = (None, None)
+    with st.expander("🧭 Filter by area and time window"):
+        lat_bounds = (math.floor(min_lat), math.ceil(max_lat))
+        lon_bounds = (math.floor(min_lon), math.ceil(max_lon))
+        col1, col2 = st.columns(2)
+        lat_range = col1.slider("Latitude", float(lat_bounds[0]), float(max(lat_bounds[1], lat_bounds[0] + 1)), (float(lat_bounds[0]), float(lat_bounds[1])), step=0.1)
+        lon_range = col2.slider("Longitude", float(lon_bounds[0]), float(max(lon_bounds[1], lon_bounds[0] + 1)), (float(lon_bounds[0]), float(lon_bounds[1])), step=0.1)
+
+        t_min, t_max = (pd.Timestamp(t).to_pydatetime() for t in spatial_index.time_range)
+        if t_min < t_max:
+            time_window = st.slider("Time window (UTC)", min_value=t_min, max_value=t_max, value=(t_min, t_max))
+
+        if (lat_range, lon_range) != ((lat_bounds[0], lat_bounds[1]), (lon_bounds[0], lon_bounds[1])) or time_window != (t_min, t_max):
+            bbox = (lat_range[0], lon_range[0], lat_range[1], lon_range[1])
+
+    query_start = time.perf_counter()
+    with stage("spatial query"):
+        if bbox is None:
+            vessels = latest_positions(store.vessel_index)
+            pings = len(df)
+        else:
+            positions = spatial_index.query(bbox, *time_window)
+            vessels = latest_rows_per_vessel(df, positions)
+            pings = len(positions)
+    query_ms = (time.perf_counter() - query_start) * 1000
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Vessels", f"{len(vessels):,}")
+    col2.metric("Pings in Window", f"{pings:,}")
+    col3.metric("Query Time", f"{query_ms:,.1f} ms")
+
+    if len(vessels) == 0:
+        st.info("No vessels in the selected area and time window.")
+        return
 
-    # Generate and Download PDF
-    if st.button("📄 Generate PDF Report"):
-        pdf_filename = generate_pdf_report(df_selected, st.session_state.selected_mmsi)
-        with open(pdf_filename, "rb") as pdf_file:
-            st.download_button(label="📥 Download PDF Report", data=pdf_file, file_name=pdf_filename, mime="application/pdf")
+    # 🗺️ Latest position of every vessel, clustered client-side
+    with stage("map build"):
+        m = folium.Map(location=[float(vessels["Latitude"].mean()), float(vessels["Longitude"].mean())], zoom_start=4)
+        popups = [
+            f"<b>MMSI:</b> {mmsi}<br><b>Time:</b> {ts}<br><b>Speed:</b> {speed} knots"
+            for mmsi, ts, speed in zip(vessels["MMSI"], vessels["Timestamp"], vessels["Speed_over_ground"])
+        ]
+        marker_data = [[float(lat), float(lon), popup] for lat, lon, popup in zip(vessels["Latitude"], vessels["Longitude"], popups)]
+        FastMarkerCluster(marker_data, callback=FLEET_MARKER_CALLBACK).add_to(m)
+
+        if bbox is not None:
+            folium.Rectangle(bounds=[[bbox[0], bbox[1]], [bbox[2], bbox[3]]], color="blue", fill=False).add_to(m)
+    with stage("folium render"):
+        folium_static(m)
+
+    n_pages = max((len(vessels) + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+    page = st.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, value=1)
+    page_rows, _ = paginate(vessels[["MMSI", "Timestamp", "Latitude", "Longitude", "Speed_over_ground", "Navigation_Status"]], page)
+    st.write(page_rows)
+
+
+# ---------------- 🛠️ PROFILING DEBUG PANEL ----------------
+def debug_panel():
+    # Admin-only: stage timings of this run and totals across all sessions
+    with st.sidebar.expander("🛠️ Debug: Stage Timings"):
+        tracing = st.checkbox("Trace memory (slower, all sessions)", value=memory_tracing())
+        if tracing != memory_tracing():
+            set_memory_tracing(tracing)
+
+        records = run_records()
+        if records:
+            st.caption("⏱️ This run")
+            run_table = pd.DataFrame(records)
+            run_table["ms"] = (run_table["seconds"] * 1000).round(1)
+            columns = ["stage", "ms"]
+            if "alloc_peak_bytes" in run_table.columns:
+                run_table["peak_MB"] = (run_table["alloc_peak_bytes"] / 1024 ** 2).round(1)
+                columns.append("peak_MB")
+            st.dataframe(run_table[columns].set_index("stage"))
+
+        totals = stage_totals()
+        if totals:
+            st.caption("📈 All sessions since start")
+            st.dataframe(pd.DataFrame([
+                {"stage": name, "calls": t["calls"], "mean_ms": round(t["seconds"] / t["calls"] * 1000, 1),
+                 "max_ms": round(t["max_seconds"] * 1000, 1)}
+                for name, t in sorted(totals.items(), key=lambda item: -item[1]["seconds"])
+            ]).set_index("stage"))
+
+        st.download_button("📥 Run Log (JSON lines)", data=records_json_lines(records),
+                           file_name="stage_timings.jsonl", mime="application/x-ndjson")
+        st.download_button("📥 Prometheus Metrics", data=prometheus_text(),
+                           file_name="ships_metrics.prom", mime="text/plain")
+        if METRICS_FILE:
+            st.caption(f"Metrics file: {METRICS_FILE}")
 
 
 # ---------------- DEFINE NAVIGATION MENU ----------------
 PAGES = {
     "Ship Data & Select MMSI": "upload",
+    "Fleet Overview": "fleet",
     "Ship Route": "route",
     "Speed Analysis": "speed",
     "Ship Codes": "codes",
@@ -527,26 +847,57 @@ PAGES = {
 }
 
 # ---------------- MAIN APP LOGIC ----------------
-if not st.session_state.authenticated:
-    login()  # Show login screen first
-else:
-    st.sidebar.title("🚢 Ship Tracker Navigation")
-    selection = st.sidebar.radio("Go to:", list(PAGES.keys()))
-
-    # Logout button
-    if st.sidebar.button("Logout"):
-        logout()
-
-    # Show the selected page
-    if selection == "Ship Data & Select MMSI":
-        upload_page()
-    elif selection == "Ship Route":
-        ship_route()
-    elif selection == "Speed Analysis":
-        speed_analysis()
-    elif selection == "Ship Codes":
-        ship_codes()
-    elif selection == "Download Report":
-        report()
-
-
+def main():
+    st.set_page_config(page_title="Ships Data Tracker", page_icon="🚢", layout="wide")
+    init_session_state()
+    _run_store.store = None
+
+    if not st.session_state.authenticated:
+        login()  # Show login screen first
+    else:
+        st.sidebar.title("🚢 Ship Tracker Navigation")
+        selection = st.sidebar.radio("Go to:", list(PAGES.keys()))
+        start_run(PAGES[selection])
+
+        # Logout button
+        if st.sidebar.button("Logout"):
+            logout()
+
+        # Show the selected page
+        if selection == "Ship Data & Select MMSI":
+            upload_page()
+        elif selection == "Fleet Overview":
+            fleet_overview()
+        elif selection == "Ship Route":
+            ship_route()
+        elif selection == "Speed Analysis":
+            speed_analysis()
+        elif selection == "Ship Codes":
+            ship_codes()
+        elif selection == "Download Report":
+            report()
+
+        # 🗄️ Datasets held in memory, shared by all sessions
+        registry = registry_stats()
+        st.sidebar.caption(
+            f"🗄️ Shared datasets: {registry['datasets']} using {registry['bytes'] / 1024 ** 2:,.0f} MB "
+            f"of {registry['max_bytes'] / 1024 ** 2:,.0f} MB"
+        )
+
+        # ⏳ Background jobs keep running while the user browses other pages
+        jobs = get_job_queue().stats()
+        if jobs["queued"] or jobs["running"]:
+            st.sidebar.caption(f"⏳ Background jobs: {jobs['running']} running, {jobs['queued']} queued")
+
+        # 📡 Pages refresh by themselves while the dataset has a live feed
+        if get_feed(st.session_state.dataset_id) is not None:
+            with st.sidebar:
+                live_feed_status()
+
+        if st.session_state.username in ADMIN_USERS:
+            debug_panel()
+        write_prometheus_file()
+
+
+if __name__ == "__main__":
+    main()
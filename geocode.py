@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from kinematics import EARTH_RADIUS_NM
+
+
+# ---------------- OFFLINE REVERSE GEOCODING ----------------
+# Labels positions with the nearest port from a bundled gazetteer, with no
+# network access. Ports are indexed in a KD-tree over 3D unit vectors (chord
+# distance orders the same as great-circle distance), and results are
+# memoized in a SQLite file keyed by coordinates rounded to CACHE_DECIMALS.
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ports.csv")
+GEOCODE_CACHE_PATH = os.environ.get("SHIPS_GEOCODE_CACHE", ".geocode_cache.sqlite")
+
+# 2 decimals is ~1 km, well below the distances reported
+CACHE_DECIMALS = 2
+
+NEAR_PORT_NM = 15.0
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def _unit_vectors(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def load_gazetteer():
+    # (ports frame, KD-tree), loaded once per process
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            from scipy.spatial import cKDTree
+
+            ports = pd.read_csv(GAZETTEER_PATH)
+            ports["label"] = ports["name"] + " (" + ports["country"] + ")"
+            _gazetteer = (ports, cKDTree(_unit_vectors(ports["latitude"], ports["longitude"])))
+        return _gazetteer
+
+
+def _nearest_ports(lat, lon):
+    ports, tree = load_gazetteer()
+    chord, idx = tree.query(_unit_vectors(lat, lon))
+    distance_nm = 2 * EARTH_RADIUS_NM * np.arcsin(np.clip(chord / 2, 0.0, 1.0))
+    return ports["label"].to_numpy()[idx], distance_nm
+
+
+# ---------------- PERSISTENT LOOKUP CACHE ----------------
+def _open_cache():
+    conn = sqlite3.connect(GEOCODE_CACHE_PATH, timeout=10)
+    conn.execute("CREATE TABLE IF NOT EXISTS nearest_port (cell INTEGER PRIMARY KEY, port TEXT, distance_nm REAL)")
+    return conn
+
+
+def _cache_lookup(conn, cells):
+    found = {}
+    # SQLite caps the number of bound parameters, so query in batches
+    for start in range(0, len(cells), 900):
+        batch = cells[start:start + 900]
+        placeholders = ",".join("?" * len(batch))
+        for cell, port, distance in conn.execute(
+            f"SELECT cell, port, distance_nm FROM nearest_port WHERE cell IN ({placeholders})", batch
+        ):
+            found[cell] = (port, distance)
+    return found
+
+
+def nearest_port(lats, lons):
+    # Nearest gazetteer port and distance (NM) for every position
+    scale = 10 ** CACHE_DECIMALS
+    lat_keys = np.round(np.asarray(lats, dtype=np.float64) * scale).astype(np.int64)
+    lon_keys = np.round(np.asarray(lons, dtype=np.float64) * scale).astype(np.int64)
+    if len(lat_keys) == 0:
+        return np.array([], dtype=object), np.array([], dtype=np.float64)
+
+    # One integer per rounded (lat, lon) cell
+    cell_ids = (lat_keys + 90 * scale) * (360 * scale + 1) + (lon_keys + 180 * scale)
+    cells, inverse = np.unique(cell_ids, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    cell_list = cells.tolist()
+
+    try:
+        conn = _open_cache()
+        found = _cache_lookup(conn, cell_list)
+    except sqlite3.Error:
+        conn = None
+        found = {}
+
+    missing = np.array([i for i, cell in enumerate(cell_list) if cell not in found], dtype=np.int64)
+    if len(missing):
+        miss_lat = cells[missing] // (360 * scale + 1) - 90 * scale
+        miss_lon = cells[missing] % (360 * scale + 1) - 180 * scale
+        labels, distances = _nearest_ports(miss_lat / scale, miss_lon / scale)
+
+        new_rows = [(cell_list[i], label, float(distance)) for i, label, distance in zip(missing, labels, distances)]
+        found.update((cell, (label, distance)) for cell, label, distance in new_rows)
+        if conn is not None:
+            try:
+                with conn:
+                    conn.executemany("INSERT OR IGNORE INTO nearest_port VALUES (?, ?, ?)", new_rows)
+            except sqlite3.Error:
+                pass  # the cache is an optimisation; a locked or read-only file is fine
+
+    if conn is not None:
+        conn.close()
+
+    port_per_cell = np.array([found[cell][0] for cell in cell_list], dtype=object)
+    distance_per_cell = np.array([found[cell][1] for cell in cell_list], dtype=np.float64)
+    return port_per_cell[inverse], distance_per_cell[inverse]
+
+
+def location_labels(lats, lons):
+    # Human-readable "near X" / "N NM from X" labels
+    ports, distances = nearest_port(lats, lons)
+    return [
+        f"near {port}" if distance <= NEAR_PORT_NM else f"{distance:,.0f} NM from {port}"
+        for port, distance in zip(ports, distances)
+    ]
@@ -0,0 +1,272 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from batch_reports import _render_report, generate_batch_reports_zip, render_pool
+from pdf_report import report_cache_key, get_cached_report, store_cached_report, render_report_charts
+from profiling import add_records, stage, start_run, write_prometheus_file
+
+
+# ---------------- BACKGROUND JOB QUEUE ----------------
+# Report and heavy-analysis jobs run outside the Streamlit script, so a page
+# returns a job id at once and the user can keep browsing (or leave) while
+# the job runs. One queue per process, shared by all sessions:
+#   - at most MAX_RUNNING_JOBS jobs run at a time, on runner threads;
+#   - PDF pages are laid out in one spawned process pool of RENDER_WORKERS
+#     processes, shared by every job (single reports and batches alike), so
+#     the total number of render processes stays fixed and a core is left for
+#     the UI. A single report's charts are drawn on the runner thread first,
+#     through the chart cache the pages use, and sent to the worker as PNGs;
+#   - every job runs as a profiled stage "job:<kind>"; workers send their
+#     stage records back, so rendering shows in the totals and metrics file;
+#   - at most MAX_QUEUED_JOBS jobs wait in total, and MAX_JOBS_PER_OWNER per
+#     user, so a burst of clicks can't starve everyone else;
+#   - every job's status is a JSON file in JOBS_DIR and its artifact sits next
+#     to it, so finished results can be collected from any later session.
+# Jobs still queued or running when the process stops are marked failed on
+# the next start; jobs older than JOB_TTL_HOURS are deleted.
+
+JOBS_DIR = os.environ.get("SHIPS_JOBS_DIR", ".jobs")
+MAX_RUNNING_JOBS = int(os.environ.get("SHIPS_JOB_WORKERS", 2))
+MAX_QUEUED_JOBS = 50
+MAX_JOBS_PER_OWNER = 5
+JOB_TTL_HOURS = 24
+
+# Render processes shared by all jobs; leave a core for the UI
+RENDER_WORKERS = int(os.environ.get("SHIPS_RENDER_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+
+ACTIVE_STATES = ("queued", "running")
+
+
+# ---------------- JOB FUNCTIONS ----------------
+# Run on a runner thread: fn(progress, *args) -> (artifact bytes, file name,
+# mime type, note or None). progress(fraction) reports partial completion.
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def _render_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = render_pool(RENDER_WORKERS)
+        return _process_pool
+
+
+def report_job(progress, track, mmsi, include_details=False, segments=None, dataset_id=None):
+    # dataset_id is the vessel's cache id, so the charts drawn for the pages are reused
+    key = report_cache_key(track, mmsi, include_details)
+    pdf_bytes = get_cached_report(key)
+    if pdf_bytes is None:
+        charts = render_report_charts(track, mmsi, dataset_id)
+        progress(0.3)
+        pdf_bytes, records = _render_pool().submit(_render_report, mmsi, track, include_details, segments, charts).result()
+        add_records(records)
+        store_cached_report(key, pdf_bytes)
+    return pdf_bytes, f"Ship_Report_MMSI_{mmsi}.pdf", "application/pdf", None
+
+
+def batch_reports_job(progress, index, mmsis):
+    zip_bytes, failures = generate_batch_reports_zip(
+        index, mmsis, max_workers=RENDER_WORKERS, pool=_render_pool(),
+        progress_callback=lambda done, total, mmsi, error: progress(done / total),
+    )
+    note = None
+    if failures:
+        note = f"{len(failures)} reports failed: " + ", ".join(f"{mmsi} ({error})" for mmsi, error in failures.items())
+    return zip_bytes, "Ship_Reports.zip", "application/zip", note
+
+
+def vessel_summary_job(progress, store, mmsis=None):
+    from ais_store import vessel_summary
+    csv = vessel_summary(store, mmsis).to_csv(index=False).encode("utf-8")
+    return csv, f"Vessel_Summary_{store.dataset_id[:8]}.csv", "text/csv", None
+
+
+JOB_KINDS = {
+    "report": report_job,
+    "batch_reports": batch_reports_job,
+    "vessel_summary": vessel_summary_job,
+}
+
+
+# ---------------- QUEUE ----------------
+class JobQueue:
+    def __init__(self, jobs_dir=JOBS_DIR, max_running=MAX_RUNNING_JOBS, max_queued=MAX_QUEUED_JOBS,
+                 max_per_owner=MAX_JOBS_PER_OWNER):
+        self.jobs_dir = jobs_dir
+        self.max_queued = max_queued
+        self.max_per_owner = max_per_owner
+        self._executor = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix="ships-job")
+        self._jobs = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+        os.makedirs(jobs_dir, exist_ok=True)
+        self._recover()
+
+    def _status_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _artifact_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.bin")
+
+    def _save(self, job):
+        # Atomic, so a reader never sees half a status file
+        # A unique temp name, so queues sharing a jobs directory never write the same one
+        fd, tmp_path = tempfile.mkstemp(dir=self.jobs_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(job, f)
+            os.replace(tmp_path, self._status_path(job["id"]))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _load_all(self):
+        jobs = []
+        for file_name in os.listdir(self.jobs_dir):
+            if not file_name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.jobs_dir, file_name)) as f:
+                    jobs.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return jobs
+
+    def _recover(self):
+        # Jobs of a previous process: fail the interrupted ones, drop expired ones
+        cutoff = time.time() - JOB_TTL_HOURS * 3600
+        for job in self._load_all():
+            if job["submitted"] < cutoff:
+                self._delete(job["id"])
+            elif job["status"] in ACTIVE_STATES:
+                job.update(status="failed", error="Interrupted by a server restart", finished=time.time())
+                self._save(job)
+
+    def _delete(self, job_id):
+        for path in (self._status_path(job_id), self._artifact_path(job_id)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def submit(self, kind, args, label, owner=None):
+        # Returns the new job's id; raises RuntimeError when the queue is full
+        if kind not in JOB_KINDS:
+            raise KeyError(kind)
+        with self._lock:
+            active = [job for job in self._jobs.values() if job["status"] in ACTIVE_STATES]
+            if len(active) >= self.max_queued:
+                raise RuntimeError(f"The job queue is full ({self.max_queued} jobs); try again shortly.")
+            if sum(job["owner"] == owner for job in active) >= self.max_per_owner:
+                raise RuntimeError(f"You already have {self.max_per_owner} jobs queued or running.")
+
+            job = {
+                "id": uuid.uuid4().hex[:12], "kind": kind, "label": label, "owner": owner,
+                "status": "queued", "progress": 0.0, "submitted": time.time(), "started": None,
+                "finished": None, "error": None, "note": None, "file_name": None, "mime": None, "size": None,
+            }
+            self._jobs[job["id"]] = job
+            self._save(job)
+            self._futures[job["id"]] = self._executor.submit(self._run, job["id"], kind, args)
+        return job["id"]
+
+    def _update(self, job_id, persist=True, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields)
+            if persist:
+                self._save(job)
+
+    def _run(self, job_id, kind, args):
+        self._update(job_id, status="running", started=time.time())
+        fn = JOB_KINDS[kind]
+        start_run(f"job:{kind}")
+        try:
+            with stage(f"job:{kind}"):
+                data, file_name, mime, note = fn(lambda fraction: self._update(job_id, persist=False, progress=fraction), *args)
+            with open(self._artifact_path(job_id), "wb") as f:
+                f.write(data)
+            self._update(job_id, status="done", progress=1.0, finished=time.time(), file_name=file_name, mime=mime,
+                         size=len(data), note=note)
+        except Exception as e:
+            self._update(job_id, status="failed", finished=time.time(), error=str(e) or type(e).__name__)
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+            write_prometheus_file()
+
+    def cancel(self, job_id):
+        # Only jobs that have not started can be cancelled
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is None or not future.cancel():
+                return False
+            self._futures.pop(job_id)
+        self._update(job_id, status="cancelled", finished=time.time())
+        return True
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        try:
+            with open(self._status_path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def jobs(self, owner=None):
+        # This owner's jobs (all jobs if None), newest first, including earlier processes'
+        with self._lock:
+            live = {job_id: dict(job) for job_id, job in self._jobs.items()}
+        jobs = {job["id"]: job for job in self._load_all()}
+        jobs.update(live)
+        return sorted((job for job in jobs.values() if owner is None or job["owner"] == owner),
+                      key=lambda job: job["submitted"], reverse=True)
+
+    def result(self, job_id):
+        # Artifact bytes of a finished job, or None
+        job = self.get(job_id)
+        if job is None or job["status"] != "done":
+            return None
+        try:
+            with open(self._artifact_path(job_id), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def remove(self, job_id):
+        # Forget a finished job and delete its artifact
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job["status"] in ACTIVE_STATES:
+                return False
+            self._jobs.pop(job_id, None)
+        self._delete(job_id)
+        return True
+
+    def stats(self):
+        with self._lock:
+            states = [job["status"] for job in self._jobs.values()]
+        return {"queued": states.count("queued"), "running": states.count("running")}
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    # The process-wide queue, created on first use
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+
+# ---------------- VECTORIZED KINEMATICS ----------------
+# Derived per-ping quantities for a whole dataset in one NumPy pass. The input
+# must be sorted by (MMSI, Timestamp), as VesselIndex.df is; the first ping of
+# every vessel has no predecessor and gets NaN deltas.
+
+EARTH_RADIUS_NM = 3440.065
+
+# Anomaly thresholds
+MAX_IMPLIED_SPEED_KN = 50.0
+TELEPORT_DISTANCE_NM = 10.0
+TELEPORT_SPEED_KN = 100.0
+AIS_SILENCE_SECONDS = 30 * 60
+
+ANOMALY_COLUMNS = ["Teleport_jump", "Implied_speed_anomaly", "AIS_silence"]
+
+
+def haversine_nm(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def angle_difference(a, b):
+    # Signed a - b in degrees, wrapped into [-180, 180)
+    return (np.asarray(a, dtype=np.float64) - np.asarray(b, dtype=np.float64) + 180.0) % 360.0 - 180.0
+
+
+def compute_kinematics(df):
+    n = len(df)
+    mmsi = df["MMSI"].to_numpy()
+    lat = df["Latitude"].to_numpy(dtype=np.float64)
+    lon = df["Longitude"].to_numpy(dtype=np.float64)
+    t = df["Timestamp"].to_numpy(dtype="datetime64[ns]").astype(np.int64) / 1e9
+
+    # Deltas to the previous ping of the same vessel
+    same_vessel = np.zeros(n, dtype=bool)
+    same_vessel[1:] = mmsi[1:] == mmsi[:-1]
+
+    gap_s = np.full(n, np.nan)
+    distance_nm = np.full(n, np.nan)
+    if n > 1:
+        gap_s[1:] = np.diff(t)
+        distance_nm[1:] = haversine_nm(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    gap_s[~same_vessel] = np.nan
+    distance_nm[~same_vessel] = np.nan
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        implied_speed_kn = np.where(gap_s > 0, distance_nm / (gap_s / 3600.0), np.nan)
+
+    heading = df["True_heading"].to_numpy(dtype=np.float64)
+    cog = df["Course_over_ground"].to_numpy(dtype=np.float64)
+    # AIS reports 511 (heading) and 360 (COG) as "not available"
+    heading = np.where((heading >= 0) & (heading < 360), heading, np.nan)
+    cog = np.where((cog >= 0) & (cog < 360), cog, np.nan)
+    drift = angle_difference(cog, heading)
+
+    # Comparisons against NaN are False, so first pings are never flagged
+    with np.errstate(invalid="ignore"):
+        speed_anomaly = implied_speed_kn > MAX_IMPLIED_SPEED_KN
+        teleport = (distance_nm > TELEPORT_DISTANCE_NM) & (implied_speed_kn > TELEPORT_SPEED_KN)
+        silence = gap_s > AIS_SILENCE_SECONDS
+
+    return pd.DataFrame({
+        "Time_gap_s": gap_s.astype(np.float32),
+        "Segment_distance_nm": distance_nm.astype(np.float32),
+        "Implied_speed_kn": implied_speed_kn.astype(np.float32),
+        "Heading_COG_drift": drift.astype(np.float32),
+        "Teleport_jump": teleport,
+        "Implied_speed_anomaly": speed_anomaly,
+        "AIS_silence": silence,
+    }, index=df.index)
+
+
+def anomaly_summary(kinematics):
+    # Count of flagged pings per anomaly type
+    return {col: int(kinematics[col].sum()) for col in ANOMALY_COLUMNS}
@@ -0,0 +1,214 @@
+import io
+import os
+import socket
+import threading
+from collections import deque
+
+import pandas as pd
+
+from ais_ingest import clean_ais_chunk
+from ais_nmea import NMEADecoder, STATIC_COLUMNS, read_ais_file, looks_like_nmea
+
+
+# ---------------- LIVE AIS FEED SOURCES ----------------
+# Two local stand-ins for an AIS receiver, both drained in batches into
+# AISStore.append:
+#   - FileDropSource: CSV files (same columns as an upload) or raw NMEA logs
+#     dropped into a directory. Writers should write under another name and
+#     rename when complete; ingested files are moved to processed/, unreadable
+#     ones to rejected/.
+#   - SocketSource: a TCP listener on localhost taking one record per line:
+#     raw !AIVDM/!AIVDO sentences, or CSV records in FEED_COLUMNS order. Lines
+#     are buffered by a background thread and parsed together on drain, so the
+#     cost is per batch rather than per message.
+# A LiveFeed drains a dataset's sources every FEED_POLL_SECONDS on its own
+# thread. There is one per dataset per process (dataset_registry.start_feed),
+# not one per session, so a listener outlives the session that started it
+# and is only released by stopping the feed.
+
+DEFAULT_DROP_DIR = os.environ.get("SHIPS_DROP_DIR", "ais_drop")
+DEFAULT_FEED_PORT = 10110
+
+FEED_COLUMNS = [
+    "MMSI", "Timestamp", "Latitude", "Longitude", "Speed_over_ground", "Course_over_ground",
+    "True_heading", "Rate_of_turn", "Navigation_Status", "Message_Type",
+]
+
+# Lines held before the oldest are dropped, if nobody drains the socket
+MAX_BUFFERED_LINES = 1_000_000
+
+FEED_POLL_SECONDS = float(os.environ.get("SHIPS_FEED_POLL_SECONDS", 5))
+
+
+def _is_nmea(line):
+    return "VDM," in line or "VDO," in line
+
+
+class FileDropSource:
+    def __init__(self, directory=DEFAULT_DROP_DIR):
+        self.directory = directory
+        self.processed_dir = os.path.join(directory, "processed")
+        self.rejected_dir = os.path.join(directory, "rejected")
+
+    def drain(self):
+        # Rows from every complete file currently in the directory, oldest first.
+        # Returns (frame or None, rows dropped as invalid, static rows, file names ingested).
+        os.makedirs(self.processed_dir, exist_ok=True)
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                 if name.lower().endswith(".csv") or looks_like_nmea(name)]
+        paths.sort(key=os.path.getmtime)
+
+        frames = []
+        statics = []
+        names = []
+        rows_dropped = 0
+        for path in paths:
+            try:
+                df, dropped, static = read_ais_file(path)
+                if static is not None and len(static):
+                    statics.append(static)
+            except ValueError:
+                # Not an AIS CSV; set it aside so it isn't retried on every poll
+                os.makedirs(self.rejected_dir, exist_ok=True)
+                os.replace(path, os.path.join(self.rejected_dir, os.path.basename(path)))
+                continue
+            frames.append(df)
+            names.append(os.path.basename(path))
+            rows_dropped += dropped
+            os.replace(path, os.path.join(self.processed_dir, os.path.basename(path)))
+
+        static = pd.concat(statics, ignore_index=True) if statics else pd.DataFrame(columns=STATIC_COLUMNS)
+        frames = [df for df in frames if len(df)]
+        if not frames:
+            return None, rows_dropped, static, names
+        return pd.concat(frames, ignore_index=True), rows_dropped, static, names
+
+
+class SocketSource:
+    def __init__(self, host="127.0.0.1", port=DEFAULT_FEED_PORT, columns=FEED_COLUMNS):
+        self.host = host
+        self.port = port
+        self.columns = columns
+        self._lines = deque(maxlen=MAX_BUFFERED_LINES)
+        self._server = None
+        # Keeps multi-fragment NMEA messages that straddle two drains
+        self._decoder = NMEADecoder()
+
+    @property
+    def running(self):
+        return self._server is not None
+
+    def start(self):
+        if self._server is not None:
+            return
+        self._server = socket.create_server((self.host, self.port))
+        threading.Thread(target=self._accept_loop, args=(self._server,), daemon=True).start()
+
+    def stop(self):
+        if self._server is not None:
+            # shutdown() wakes the blocked accept(), so the port is released now
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+            self._server = None
+
+    def _accept_loop(self, server):
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return  # server closed
+            threading.Thread(target=self._read_loop, args=(conn,), daemon=True).start()
+
+    def _read_loop(self, conn):
+        with conn, conn.makefile("r", encoding="utf-8", errors="replace") as lines:
+            for line in lines:
+                line = line.strip()
+                if line:
+                    self._lines.append(line)
+
+    def drain(self, max_lines=None):
+        # Parse everything buffered so far; returns (frame or None, rows dropped
+        # as invalid, static rows)
+        batch = []
+        while self._lines and (max_lines is None or len(batch) < max_lines):
+            batch.append(self._lines.popleft())
+        if not batch:
+            return None, 0, pd.DataFrame(columns=STATIC_COLUMNS)
+
+        nmea = [line for line in batch if _is_nmea(line)]
+        records = [line for line in batch if not _is_nmea(line)]
+
+        frames = []
+        rows_dropped = 0
+        static = pd.DataFrame(columns=STATIC_COLUMNS)
+        if nmea:
+            rejected = self._decoder.stats["bad_checksum"] + self._decoder.stats["malformed"]
+            df, static = self._decoder.decode(nmea)
+            rows_dropped += self._decoder.stats["bad_checksum"] + self._decoder.stats["malformed"] - rejected
+            frames.append(df)
+        if records:
+            text = ",".join(self.columns) + "\n" + "\n".join(records)
+            chunk = pd.read_csv(io.StringIO(text), on_bad_lines="skip")
+            df = clean_ais_chunk(chunk)
+            rows_dropped += len(records) - len(df)
+            frames.append(df)
+        return pd.concat(frames, ignore_index=True), rows_dropped, static
+
+
+class LiveFeed:
+    # Polls a file-drop directory and/or a socket listener and passes each
+    # batch to append(new_rows, static) -> (rows added, duplicates, MMSIs).
+    # Raises OSError if the socket port cannot be bound.
+    def __init__(self, append, drop_dir=None, port=None, poll_seconds=FEED_POLL_SECONDS):
+        self.append = append
+        self.drop_source = FileDropSource(drop_dir) if drop_dir else None
+        self.socket_source = SocketSource(port=port) if port else None
+        self.poll_seconds = poll_seconds
+        self.rows_added = 0
+        self.last_message = None
+        self.last_error = None
+        if self.socket_source is not None:
+            self.socket_source.start()
+        self._stopped = threading.Event()
+        threading.Thread(target=self._poll_loop, daemon=True).start()
+
+    @property
+    def running(self):
+        return not self._stopped.is_set()
+
+    def stop(self):
+        self._stopped.set()
+        if self.socket_source is not None:
+            self.socket_source.stop()
+
+    def _poll_loop(self):
+        while not self._stopped.wait(self.poll_seconds):
+            try:
+                self.poll()
+            except Exception as e:  # keep polling; the panel shows the error
+                self.last_error = str(e) or type(e).__name__
+
+    def poll(self):
+        # Drain every source once; returns the rows added
+        batches = []
+        if self.drop_source is not None and os.path.isdir(self.drop_source.directory):
+            new_rows, _, static, files = self.drop_source.drain()
+            batches.append((new_rows, static, f"{len(files)} dropped files"))
+        if self.socket_source is not None:
+            new_rows, _, static = self.socket_source.drain()
+            batches.append((new_rows, static, "Socket feed"))
+
+        added_now = 0
+        for new_rows, static, label in batches:
+            if new_rows is None:
+                continue
+            added, duplicates, mmsis = self.append(new_rows, static)
+            added_now += added
+            self.last_message = (f"{label}: added {added:,} new rows for {len(mmsis):,} vessels "
+                                 f"({duplicates:,} duplicates skipped).")
+        self.rows_added += added_now
+        self.last_error = None
+        return added_now
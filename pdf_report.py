@@ -0,0 +1,252 @@
+import hashlib
+import io
+import os
+
+import pandas as pd
+
+from ais_codes import NAV_STATUS_DESCRIPTIONS, MESSAGE_TYPE_DESCRIPTIONS, state_intervals, state_summary
+from ais_ingest import CODE_DESCRIPTIONS
+from artifact_cache import BytesLRUCache
+from profiling import profiled, stage
+from charts import render_chart_png
+from kinematics import compute_kinematics
+from segmentation import compute_segments
+
+
+# ---------------- PDF REPORT ----------------
+# Kept free of Streamlit so reports can be rendered from worker processes and scripts.
+# ReportLab is imported on first render, so importing this module stays cheap.
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Dfy Graviti Logo.png")
+
+# Tables are split into LongTables of this many rows so doc.build never has
+# to lay out one huge flowable
+TABLE_CHUNK_ROWS = 500
+
+# Charts in every report, in order
+REPORT_CHARTS = ("rate_of_turn", "speed", "heading_cog")
+
+# Default reports list only the longest state intervals; the full run-length
+# list (often O(pings) when message types interleave) is a detail table
+MAX_REPORT_INTERVALS = 50
+MIN_REPORT_INTERVAL = pd.Timedelta(minutes=10)
+
+
+def _table_style():
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+    return TableStyle([('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                       ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                       ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                       ('GRID', (0, 0), (-1, -1), 1, colors.black)])
+
+
+def _paged_tables(header, rows):
+    from reportlab.platypus import LongTable
+    style = _table_style()
+    tables = []
+    for start in range(0, max(len(rows), 1), TABLE_CHUNK_ROWS):
+        table = LongTable([header] + rows[start:start + TABLE_CHUNK_ROWS], repeatRows=1)
+        table.setStyle(style)
+        tables.append(table)
+    return tables
+
+
+def _format_duration(duration):
+    minutes = int(duration.total_seconds() // 60)
+    return f"{minutes // 60}h {minutes % 60:02d}m"
+
+
+def render_report_charts(df_selected, mmsi, dataset_id=None):
+    # {chart type: PNG} from the shared chart pipeline (and its cache when
+    # dataset_id is known), so the report shows the same charts as the pages
+    charts = {}
+    for chart_type in REPORT_CHARTS:
+        with stage(f"chart:{chart_type}"):
+            charts[chart_type] = render_chart_png(df_selected, chart_type, dataset_id=dataset_id, mmsi=mmsi)
+    return charts
+
+
+@profiled("pdf")
+def generate_pdf_report(df_selected, mmsi, dataset_id=None, include_details=False, segments=None, charts=None):
+    # Charts and the PDF are rendered entirely in memory; returns the PDF bytes.
+    # segments is the vessel's voyage/stop table; derived from the track if not given.
+    # charts are render_report_charts() PNGs made elsewhere (e.g. by the parent
+    # of a worker process); rendered here if not given.
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Image, Spacer
+    from reportlab.lib.pagesizes import letter
+
+    pdf_buffer = io.BytesIO()
+    
+    # Create PDF document
+    doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
+    elements = []
+    styles = getSampleStyleSheet()
+
+    # 🔹 **Custom Subtitle Style (Centered)**
+    subtitle_style = ParagraphStyle(
+        name="SubtitleStyle",
+        parent=styles["Normal"],
+        fontSize=12,
+        textColor="navy",
+        alignment=1,  # 1 = Centered
+        spaceAfter=10  # Add space below
+    )
+
+    tagline_style = ParagraphStyle(
+        name="TaglineStyle",
+        parent=styles["Normal"],
+        fontSize=10,
+        textColor="gray",
+        alignment=1,
+        spaceAfter=20
+    )
+
+    # 🔹 **Add Logo (Centered)**
+
+
+
+    
+
+    # Convert logo 
+    logo_path = LOGO_PATH
+    
+    try:
+        # reportlab only opens the image at build time, so check it up front
+        if not os.path.exists(logo_path):
+            raise FileNotFoundError(logo_path)
+        logo = Image(logo_path, width=80, height=80)  # Adjust size
+        logo.hAlign = "CENTER"  
+        elements.append(logo)
+
+        # Space after logo
+        elements.append(Spacer(1, 10))
+
+        # 🔹 **Add Subtitle (Now Centered & Styled)**
+        elements.append(Paragraph("🚢 Navigating the Vastness of Oceans and the Cosmos", subtitle_style))
+        elements.append(Paragraph("Uncover critical maritime and space anomalies with precision", tagline_style))
+
+        # Space after subtitle
+        elements.append(Spacer(1, 20))
+
+    except Exception as e:
+        print("Error loading logo:", e)  # Handle missing image gracefully
+
+    # 🔹 **Main Title**
+    elements.append(Paragraph(f"📄 Ship Report for MMSI: {mmsi}", styles['Title']))
+    elements.append(Spacer(1, 20))  # Space before next section
+
+
+    df_selected = df_selected.copy()
+
+    # Timestamps were parsed once at load; only format them for the tables
+    df_selected["Formatted_Time"] = df_selected["Timestamp_IST"].dt.strftime("%Y-%m-%d %H:%M:%S")
+
+  
+    # 📍 Voyages and stops, with stops labelled by the nearest port
+    if segments is None:
+        with stage("segments"):
+            segments = compute_segments(df_selected, compute_kinematics(df_selected))
+    if len(segments):
+        elements.append(Paragraph("📍 Voyages & Stops", styles['Heading2']))
+        elements.extend(_paged_tables(
+            ["Segment", "From (UTC)", "To (UTC)", "Duration", "Distance", "Location"],
+            [[kind, f"{start:%Y-%m-%d %H:%M}", f"{end:%Y-%m-%d %H:%M}", _format_duration(duration), f"{distance:,.1f} NM", location]
+             for kind, start, end, duration, distance, location
+             in segments[["Kind", "Start", "End", "Duration", "Distance_nm", "Location"]].itertuples(index=False)],
+        ))
+        elements.append(Spacer(1, 20))
+
+    if charts is None:
+        charts = render_report_charts(df_selected, mmsi, dataset_id)
+    for chart_type in REPORT_CHARTS:
+        elements.append(Image(io.BytesIO(charts[chart_type]), width=400, height=200))
+
+
+    # Status and message type sections: run-length intervals plus per-code
+    # totals by default, full per-ping tables only when asked for
+    for title, column, label, descriptions in (
+        ("🚦 Navigation Status Analysis", "Navigation_Status", "Navigation Status", NAV_STATUS_DESCRIPTIONS),
+        ("📡 AIS Message Type Analysis", "Message_Type", "Message Type", MESSAGE_TYPE_DESCRIPTIONS),
+    ):
+        description_column = CODE_DESCRIPTIONS[column][0]
+        elements.append(Paragraph(title, styles['Heading2']))
+        with stage(f"intervals:{column}"):
+            intervals = state_intervals(df_selected["Timestamp_IST"], df_selected[column], descriptions)
+
+        summary = state_summary(intervals)
+        elements.extend(_paged_tables(
+            [label, "Description", "Intervals", "Pings", "Total Time"],
+            [[code, description, count, pings, _format_duration(duration)]
+             for code, description, count, pings, duration in summary.itertuples(index=False)],
+        ))
+        elements.append(Spacer(1, 10))
+
+        listed = intervals
+        if not include_details:
+            listed = intervals[intervals["Duration"] >= MIN_REPORT_INTERVAL]
+            if len(listed) > MAX_REPORT_INTERVALS:
+                listed = listed.nlargest(MAX_REPORT_INTERVALS, "Duration").sort_values("Start")
+            if len(listed) < len(intervals):
+                elements.append(Paragraph(
+                    f"Longest {len(listed)} of {len(intervals):,} intervals (at least {_format_duration(MIN_REPORT_INTERVAL)}); "
+                    f"the detailed report lists them all.", styles['Normal']))
+        elements.extend(_paged_tables(
+            [label, "Description", "From", "To", "Duration", "Pings"],
+            [[code, description, f"{start:%Y-%m-%d %H:%M}", f"{end:%Y-%m-%d %H:%M}", _format_duration(duration), pings]
+             for code, description, start, end, duration, pings in listed.itertuples(index=False)],
+        ))
+        elements.append(Spacer(1, 20))
+
+        if include_details:
+            codes = df_selected[column]
+            elements.extend(_paged_tables(
+                ["Time", label, "Description"],
+                [list(row) for row in zip(df_selected["Formatted_Time"], codes.tolist(), df_selected[description_column].tolist())],
+            ))
+            elements.append(Spacer(1, 20))
+
+
+
+    # Build PDF
+    with stage("doc.build"):
+        doc.build(elements)
+    
+    return pdf_buffer.getvalue()
+
+
+# ---------------- CONTENT-ADDRESSED REPORT CACHE ----------------
+# Reports are keyed by a hash of the vessel's rows, so regenerating an
+# unchanged report is a dictionary lookup. The cache is process-wide and
+# shared by all Streamlit sessions; nothing is written to disk.
+
+REPORT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_report_cache = BytesLRUCache(REPORT_CACHE_MAX_BYTES)
+
+
+def report_cache_key(df_selected, mmsi, include_details=False):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{mmsi}|{include_details}".encode("utf-8"))
+    h.update(",".join(df_selected.columns).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df_selected, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def get_cached_report(key):
+    return _report_cache.get(key)
+
+
+def store_cached_report(key, pdf_bytes):
+    _report_cache.put(key, pdf_bytes)
+
+
+def get_pdf_report(df_selected, mmsi, dataset_id=None, include_details=False, segments=None):
+    # Cached front door to generate_pdf_report
+    key = report_cache_key(df_selected, mmsi, include_details)
+    pdf_bytes = get_cached_report(key)
+    if pdf_bytes is None:
+        pdf_bytes = generate_pdf_report(df_selected, mmsi, dataset_id=dataset_id, include_details=include_details, segments=segments)
+        store_cached_report(key, pdf_bytes)
+    return pdf_bytes
@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+
+# ---------------- STAGE PROFILING ----------------
+# Wall-clock timers (and, when memory tracing is on, tracemalloc peaks) around
+# the stages of every page and of the PDF build:
+#
+#   with stage("map build"):
+#       ...
+#
+#   @profiled("page:route")
+#   def ship_route(): ...
+#
+# Stages nest; a record's name is the "/"-joined path of its parents, e.g.
+# "page:report/pdf/doc.build". Each Streamlit run is a thread, so the stack
+# and the run's records are thread-local, while per-stage totals are kept
+# process-wide for all sessions. Results can be exported as:
+#   - structured logs: one JSON object per stage on the "ships.profile" logger
+#     (also appended to the file in SHIPS_PROFILE_LOG, if set);
+#   - a Prometheus text-format file (SHIPS_METRICS_FILE), e.g. for the
+#     node_exporter textfile collector.
+# Timing costs two perf_counter calls per stage. Memory tracing slows
+# allocation-heavy code noticeably, so it is off until switched on; its
+# peaks are process-wide, so stages of concurrent sessions blur each other.
+
+PROFILE_LOG_PATH = os.environ.get("SHIPS_PROFILE_LOG")
+METRICS_FILE = os.environ.get("SHIPS_METRICS_FILE")
+
+# Histogram bucket bounds for stage durations (seconds)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+MAX_RUN_RECORDS = 1_000
+
+logger = logging.getLogger("ships.profile")
+if PROFILE_LOG_PATH:
+    _handler = logging.FileHandler(PROFILE_LOG_PATH)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+_local = threading.local()
+_totals = {}
+_totals_lock = threading.Lock()
+
+
+def _state():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+        _local.records = []
+        _local.run = None
+    return _local
+
+
+# ---------------- MEMORY TRACING ----------------
+def memory_tracing():
+    return tracemalloc.is_tracing()
+
+
+def set_memory_tracing(enabled):
+    # Process-wide: affects every session until switched off
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+# ---------------- STAGES ----------------
+def start_run(label=None):
+    # Begin a new run (one Streamlit script run, one CLI command) on this thread
+    state = _state()
+    state.stack = []
+    state.records = []
+    state.run = label
+
+
+def run_records():
+    # Stage records of the current run on this thread, in completion order
+    return list(_state().records)
+
+
+@contextmanager
+def stage(name):
+    state = _state()
+    frame = {"name": name, "peak": 0}
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        if state.stack:
+            state.stack[-1]["peak"] = max(state.stack[-1]["peak"], peak)
+        tracemalloc.reset_peak()
+        frame["start_bytes"] = current
+
+    path = "/".join([parent["name"] for parent in state.stack] + [name])
+    state.stack.append(frame)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        state.stack.pop()
+        record = {"stage": path, "seconds": seconds, "run": state.run, "time": time.time()}
+
+        # Peaks are absolute; a child's peak counts toward its parent's too
+        if tracing and tracemalloc.is_tracing():
+            peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+            if state.stack:
+                state.stack[-1]["peak"] = max(state.stack[-1]["peak"], peak)
+            tracemalloc.reset_peak()
+            record["alloc_peak_bytes"] = max(peak - frame["start_bytes"], 0)
+
+        if len(state.records) < MAX_RUN_RECORDS:
+            state.records.append(record)
+        _add_to_totals(record)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(record))
+
+
+def add_records(records):
+    # Stage records measured in another process (a render worker), nested under
+    # this thread's open stages and counted in the totals. The worker has
+    # already logged them, so they are not logged again.
+    state = _state()
+    prefix = "/".join(frame["name"] for frame in state.stack)
+    for record in records:
+        record = dict(record, stage=f"{prefix}/{record['stage']}" if prefix else record["stage"], run=state.run)
+        if len(state.records) < MAX_RUN_RECORDS:
+            state.records.append(record)
+        _add_to_totals(record)
+
+
+def profiled(name):
+    # Decorator form of stage() for whole functions (pages, report builders)
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ---------------- PROCESS-WIDE TOTALS ----------------
+def _add_to_totals(record):
+    seconds = record["seconds"]
+    with _totals_lock:
+        totals = _totals.get(record["stage"])
+        if totals is None:
+            totals = _totals[record["stage"]] = {
+                "calls": 0, "seconds": 0.0, "max_seconds": 0.0, "last_seconds": 0.0,
+                "buckets": [0] * len(DURATION_BUCKETS), "alloc_peak_bytes": 0,
+            }
+        totals["calls"] += 1
+        totals["seconds"] += seconds
+        totals["max_seconds"] = max(totals["max_seconds"], seconds)
+        totals["last_seconds"] = seconds
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                totals["buckets"][i] += 1
+        totals["alloc_peak_bytes"] = max(totals["alloc_peak_bytes"], record.get("alloc_peak_bytes", 0))
+
+
+def stage_totals():
+    # {stage path: calls, seconds, max_seconds, last_seconds, buckets, alloc_peak_bytes}
+    with _totals_lock:
+        return {name: dict(totals, buckets=list(totals["buckets"])) for name, totals in _totals.items()}
+
+
+def reset_totals():
+    with _totals_lock:
+        _totals.clear()
+
+
+# ---------------- EXPORT ----------------
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(totals=None):
+    # Prometheus text exposition format (version 0.0.4)
+    totals = stage_totals() if totals is None else totals
+    lines = [
+        "# HELP ships_stage_duration_seconds Wall-clock time spent in a dashboard stage.",
+        "# TYPE ships_stage_duration_seconds histogram",
+    ]
+    for name, t in sorted(totals.items()):
+        label = f'stage="{_label(name)}"'
+        for bound, count in zip(DURATION_BUCKETS, t["buckets"]):
+            lines.append(f'ships_stage_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+        lines.append(f'ships_stage_duration_seconds_bucket{{{label},le="+Inf"}} {t["calls"]}')
+        lines.append(f"ships_stage_duration_seconds_sum{{{label}}} {t['seconds']:.6f}")
+        lines.append(f"ships_stage_duration_seconds_count{{{label}}} {t['calls']}")
+
+    lines += [
+        "# HELP ships_stage_max_duration_seconds Slowest call of a stage since start.",
+        "# TYPE ships_stage_max_duration_seconds gauge",
+    ]
+    lines += [f'ships_stage_max_duration_seconds{{stage="{_label(name)}"}} {t["max_seconds"]:.6f}'
+              for name, t in sorted(totals.items())]
+
+    traced = {name: t for name, t in totals.items() if t["alloc_peak_bytes"]}
+    if traced:
+        lines += [
+            "# HELP ships_stage_alloc_peak_bytes Largest traced allocation peak of a stage (memory tracing on).",
+            "# TYPE ships_stage_alloc_peak_bytes gauge",
+        ]
+        lines += [f'ships_stage_alloc_peak_bytes{{stage="{_label(name)}"}} {t["alloc_peak_bytes"]}'
+                  for name, t in sorted(traced.items())]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_file(path=None):
+    # Atomic write, so a scraper never reads half a file; returns the path
+    path = path or METRICS_FILE
+    if not path:
+        return None
+    # A unique temp name: runner threads of one process write concurrently
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(prometheus_text())
+        os.chmod(tmp_path, 0o644)  # mkstemp's 0600 would hide it from a scraper running as another user
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def records_json_lines(records):
+    return "".join(json.dumps(record) + "\n" for record in records)
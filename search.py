@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# ---------------- TRACK SEARCH ----------------
+# Structured filters run as vectorized predicates over the typed columns, with
+# the time range resolved by binary search on the (already sorted) Timestamp.
+# Free text is matched against one precomputed lowercase string per row that
+# is built once per vessel and cached, instead of stringifying every column on
+# every rerun. The cached strings are keyed by position within the vessel's
+# track, not by row label: appending another vessel's rows shifts the labels
+# of every later vessel without changing its rows or its cache id.
+
+PAGE_SIZE = 500
+MAX_TEXT_INDEXES = 16
+
+_text_indexes = OrderedDict()
+_text_lock = threading.Lock()
+
+
+def time_slice(track, start=None, end=None, column="Timestamp", end_inclusive=True):
+    # Zero-copy slice of the rows with start <= column <= end, or < end when
+    # not end_inclusive (chart date windows end at the next midnight). The
+    # track must be sorted by column, as every vessel track is.
+    times = track[column].to_numpy()
+    lo = 0 if start is None else int(np.searchsorted(times, np.datetime64(pd.Timestamp(start)), side="left"))
+    hi = len(times) if end is None else int(np.searchsorted(times, np.datetime64(pd.Timestamp(end)),
+                                                               side="right" if end_inclusive else "left"))
+    return track.iloc[lo:hi]
+
+
+def structured_query(track, start=None, end=None, bbox=None, speed_range=None, statuses=None):
+    # bbox is (min_lat, min_lon, max_lat, max_lon); speed_range is (min, max) knots
+    result = time_slice(track, start, end)
+    mask = np.ones(len(result), dtype=bool)
+
+    if bbox is not None:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        lat = result["Latitude"].to_numpy()
+        lon = result["Longitude"].to_numpy()
+        mask &= (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+
+    if speed_range is not None:
+        speed = result["Speed_over_ground"].to_numpy()
+        mask &= (speed >= speed_range[0]) & (speed <= speed_range[1])
+
+    if statuses:
+        mask &= np.isin(result["Navigation_Status"].to_numpy(), list(statuses))
+
+    return result if mask.all() else result[mask]
+
+
+def build_text_index(track):
+    # One lowercase " | "-joined string per row of the track, indexed 0..n-1
+    columns = [track[col].astype(str) for col in track.columns]
+    return columns[0].str.cat(columns[1:], sep=" | ").str.lower().reset_index(drop=True)
+
+
+def get_text_index(track, cache_key):
+    with _text_lock:
+        text = _text_indexes.get(cache_key)
+        if text is not None:
+            _text_indexes.move_to_end(cache_key)
+            return text
+
+    text = build_text_index(track)
+    with _text_lock:
+        _text_indexes[cache_key] = text
+        while len(_text_indexes) > MAX_TEXT_INDEXES:
+            _text_indexes.popitem(last=False)
+    return text
+
+
+def text_search(frame, query, text_index, track):
+    # Rows of frame (a subset of track, the indexed vessel track) whose text contains query
+    positions = frame.index.to_numpy() - track.index[0] if len(track) else []
+    matches = text_index.iloc[positions].str.contains(query.lower(), regex=False).to_numpy()
+    return frame[matches]
+
+
+def paginate(frame, page, page_size=PAGE_SIZE):
+    # 1-based page number; returns the page and the total page count
+    n_pages = max((len(frame) + page_size - 1) // page_size, 1)
+    page = min(max(page, 1), n_pages)
+    return frame.iloc[(page - 1) * page_size:page * page_size], n_pages
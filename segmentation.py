@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+from geocode import location_labels
+from kinematics import haversine_nm
+
+
+# ---------------- VOYAGE / STOP SEGMENTATION ----------------
+# Splits every vessel's track into alternating voyages and stops in one linear,
+# vectorized pass over the (MMSI, Timestamp) sorted frame. A ping counts as
+# stationary when the vessel is slow by reported SOG (or by position-derived
+# speed when SOG is missing), or reports at anchor/moored while nearly still.
+# Stationary runs shorter than MIN_STOP_MINUTES are folded into the voyage
+# around them, so brief slow-downs don't split a passage. So are runs that
+# stray more than STOP_RADIUS_NM from their first fix (a slow drift or a bad
+# SOG on a moving vessel is not a stop); the radius leaves room for swinging
+# at anchor.
+
+STOP_SPEED_KN = 0.5
+MOORED_SPEED_KN = 2.0
+MOORED_STATUSES = (1, 5)  # At anchor, Moored
+MIN_STOP_MINUTES = 30
+STOP_RADIUS_NM = 0.5
+
+SEGMENT_COLUMNS = [
+    "MMSI", "Kind", "Start", "End", "Duration", "Pings",
+    "Distance_nm", "Max_speed_kn", "Latitude", "Longitude", "Location",
+]
+
+
+def stationary_mask(df, kinematics):
+    sog = df["Speed_over_ground"].to_numpy(dtype=np.float64)
+    implied = kinematics["Implied_speed_kn"].to_numpy(dtype=np.float64)
+    speed = np.where(np.isnan(sog), implied, sog)
+
+    with np.errstate(invalid="ignore"):
+        slow = speed < STOP_SPEED_KN
+        moored = np.isin(df["Navigation_Status"].to_numpy(), MOORED_STATUSES) & (speed < MOORED_SPEED_KN)
+    return slow | moored
+
+
+def _run_starts(mmsi, state):
+    # Start positions of runs of equal state within each vessel
+    n = len(state)
+    change = np.ones(n, dtype=bool)
+    change[1:] = (state[1:] != state[:-1]) | (mmsi[1:] != mmsi[:-1])
+    return np.flatnonzero(change)
+
+
+def compute_segments(df, kinematics):
+    # df must be sorted by (MMSI, Timestamp); kinematics is row-aligned with it
+    n = len(df)
+    if n == 0:
+        return pd.DataFrame(columns=SEGMENT_COLUMNS)
+
+    mmsi = df["MMSI"].to_numpy()
+    times = df["Timestamp"].to_numpy()
+    stopped = stationary_mask(df, kinematics)
+
+    lat = df["Latitude"].to_numpy(dtype=np.float64)
+    lon = df["Longitude"].to_numpy(dtype=np.float64)
+
+    # Pass 1: raw stationary/moving runs; keep stops that dwell long enough
+    # within STOP_RADIUS_NM of where they began
+    starts = _run_starts(mmsi, stopped)
+    ends = np.r_[starts[1:], n] - 1
+    lengths = np.diff(np.r_[starts, n])
+    long_enough = (times[ends] - times[starts]) >= np.timedelta64(MIN_STOP_MINUTES, "m")
+    first = np.repeat(starts, lengths)
+    drift = np.nan_to_num(haversine_nm(lat[first], lon[first], lat, lon))
+    in_place = np.maximum.reduceat(drift, starts) <= STOP_RADIUS_NM
+    is_stop = np.repeat(stopped[starts] & long_enough & in_place, lengths)
+
+    # Pass 2: merge neighbouring runs that now share a state
+    starts = _run_starts(mmsi, is_stop)
+    ends = np.r_[starts[1:], n] - 1
+    counts = ends - starts + 1
+
+    distance = np.nan_to_num(kinematics["Segment_distance_nm"].to_numpy(dtype=np.float64))
+    # The first ping's distance belongs to the step into the segment, not inside it
+    distance_in = np.add.reduceat(distance, starts) - distance[starts]
+    speed = np.nan_to_num(df["Speed_over_ground"].to_numpy(dtype=np.float64))
+
+    segments = pd.DataFrame({
+        "MMSI": mmsi[starts],
+        "Kind": np.where(is_stop[starts], "Stop", "Voyage"),
+        "Start": times[starts],
+        "End": times[ends],
+        "Duration": times[ends] - times[starts],
+        "Pings": counts,
+        "Distance_nm": distance_in.astype(np.float32),
+        "Max_speed_kn": np.maximum.reduceat(speed, starts).astype(np.float32),
+        "Latitude": (np.add.reduceat(lat, starts) / counts).astype(np.float32),
+        "Longitude": (np.add.reduceat(lon, starts) / counts).astype(np.float32),
+    })
+
+    # Only stops get a place name; voyages span many
+    segments["Location"] = ""
+    stop_rows = np.flatnonzero(segments["Kind"].to_numpy() == "Stop")
+    if len(stop_rows):
+        segments.loc[stop_rows, "Location"] = location_labels(
+            segments["Latitude"].to_numpy()[stop_rows], segments["Longitude"].to_numpy()[stop_rows]
+        )
+    return segments
+
+
+def update_segments(segments, vessel_index, kinematics, mmsis):
+    # Recompute only the given vessels (e.g. after new rows were appended for
+    # them), in one linear pass over their tracks alone
+    positions = vessel_index.positions(mmsis)
+    if len(positions) == 0:
+        return segments
+
+    fresh = compute_segments(vessel_index.df.iloc[positions], kinematics.iloc[positions])
+    kept = segments[~segments["MMSI"].isin(list(mmsis))]
+    merged = pd.concat([kept, fresh], ignore_index=True)
+    return merged.sort_values(["MMSI", "Start"], kind="mergesort").reset_index(drop=True)
+
+
+def vessel_segments(segments, mmsi):
+    # Segments are sorted by MMSI, so one vessel's rows are a binary-searched slice
+    values = segments["MMSI"].to_numpy()
+    lo = np.searchsorted(values, mmsi, side="left")
+    hi = np.searchsorted(values, mmsi, side="right")
+    return segments.iloc[lo:hi]
@@ -0,0 +1,242 @@
+import argparse
+import os
+import sys
+
+
+# ---------------- HEADLESS COMMAND LINE ----------------
+# Ingest, analysis and report runs without a Streamlit server, e.g. from cron:
+#
+#   python ships_cli.py ingest feeds/2025-03-01.csv
+#   python ships_cli.py analyze feeds/2025-03-01.csv -o summary.csv --segments segments.csv
+#   python ships_cli.py series feeds/2025-03-01.csv --mmsi 419000001 --start 2025-03-01 --buckets 500
+#   python ships_cli.py report feeds/2025-03-01.csv --mmsi 419000001 -o report.pdf
+#   python ships_cli.py report <dataset id> --mmsi all -o reports.zip
+#
+# A SOURCE is an AIS CSV / NMEA log, or the id of a dataset already in the
+# Parquet dataset cache (see `datasets`). Files are hashed first, so a file
+# that was ingested before (here or through the app) is not parsed again.
+# Only argparse is imported up front; pandas and the analysis modules load
+# when a command runs, and ReportLab/Matplotlib only when a report is drawn.
+# --profile prints per-stage timings afterwards; with SHIPS_METRICS_FILE set,
+# every run also writes them as a Prometheus text file (see profiling.py).
+
+
+def _log(message):
+    print(message, file=sys.stderr)
+
+
+def load_source(source):
+    # AIS file or cached dataset id -> AISStore
+    from ais_store import AISStore
+    from ais_nmea import read_ais_file
+    from dataset_cache import file_digest, resolve_dataset_id, store_cached_dataset
+    from dataset_registry import load_cached_store
+    from profiling import stage
+
+    if os.path.isfile(source):
+        with open(source, "rb") as f:
+            dataset_id = file_digest(f)
+        with stage("cache read"):
+            store = load_cached_store(dataset_id)
+        if store is None:
+            with stage("parse"):
+                df, rows_dropped, static = read_ais_file(source)
+            if rows_dropped:
+                _log(f"Dropped {rows_dropped:,} invalid rows from {source}")
+            with stage("build store"):
+                store = AISStore(dataset_id, df, static)
+            with stage("cache write"):
+                store_cached_dataset(dataset_id, store.df, os.path.basename(source), vessel_info=store.vessel_info)
+        return store
+
+    # A dataset that received live rows is read from its latest appended copy
+    with stage("cache read"):
+        store = load_cached_store(resolve_dataset_id(source))
+    if store is None:
+        raise SystemExit(f"error: {source} is neither a file nor a cached dataset id")
+    return store
+
+
+def _parse_mmsis(value, store):
+    if value is None or value.strip().lower() == "all":
+        return store.mmsi_list
+    mmsis = [int(mmsi) for mmsi in value.replace(",", " ").split()]
+    missing = [mmsi for mmsi in mmsis if mmsi not in store.vessel_index]
+    if missing:
+        _log(f"Skipping {len(missing)} MMSIs not in the data: {missing[:10]}")
+    return [mmsi for mmsi in mmsis if mmsi in store.vessel_index]
+
+
+def _write_table(frame, path):
+    # CSV by default, JSON records for a .json path, stdout for "-"
+    if path == "-":
+        frame.to_csv(sys.stdout, index=False)
+    elif path.lower().endswith(".json"):
+        frame.to_json(path, orient="records", date_format="iso", indent=1)
+    else:
+        frame.to_csv(path, index=False)
+
+
+# ---------------- COMMANDS ----------------
+def cmd_ingest(args):
+    # Parse files into the dataset cache so the app and later runs open them instantly
+    from ais_nmea import read_ais_file, latest_static
+    from dataset_cache import cache_enabled, file_digest, load_cached_dataset, store_cached_dataset
+
+    if not cache_enabled():
+        raise SystemExit("error: the dataset cache needs pyarrow")
+
+    for path in args.files:
+        with open(path, "rb") as f:
+            dataset_id = file_digest(f)
+        if load_cached_dataset(dataset_id, columns=["MMSI"]) is not None:
+            print(f"{dataset_id}\t{path}\talready cached")
+            continue
+
+        df, rows_dropped, static = read_ais_file(path)
+        # Stored in index order, as the app stores it
+        df = df.sort_values(["MMSI", "Timestamp"], kind="mergesort").reset_index(drop=True)
+        vessel_info = latest_static(static) if static is not None else None
+        store_cached_dataset(dataset_id, df, os.path.basename(path), vessel_info=vessel_info)
+        print(f"{dataset_id}\t{path}\t{len(df):,} rows, {df['MMSI'].nunique():,} vessels, {rows_dropped:,} dropped")
+    return 0
+
+
+def cmd_datasets(args):
+    from dataset_cache import list_cached_datasets
+
+    for entry in list_cached_datasets():
+        print(f"{entry['dataset_id']}\t{entry['name']}\t{entry['rows']:,} rows\t{entry['bytes'] / 1024 ** 2:,.1f} MB")
+    return 0
+
+
+def cmd_analyze(args):
+    from ais_store import vessel_summary
+
+    store = load_source(args.source)
+    mmsis = _parse_mmsis(args.mmsi, store)
+    _write_table(vessel_summary(store, mmsis), args.output)
+
+    if args.segments:
+        segments = store.segments[store.segments["MMSI"].isin(mmsis)]
+        segments = segments.assign(Duration=segments["Duration"].dt.total_seconds() / 3600).rename(columns={"Duration": "Duration_h"})
+        _write_table(segments, args.segments)
+    return 0
+
+
+def cmd_series(args):
+    # Time-bucketed min/max/mean of one vessel's signals (see timeseries.py)
+    import numpy as np
+    import pandas as pd
+    from ais_ingest import HEADING_NOT_AVAILABLE
+    from timeseries import vessel_timeseries
+
+    store = load_source(args.source)
+    mmsis = _parse_mmsis(args.mmsi, store)
+    if len(mmsis) != 1:
+        raise SystemExit("error: --mmsi must name one vessel in the data")
+
+    frame = pd.concat([store.vessel_index.track(mmsis[0]), store.vessel_index.rows(store.kinematics, mmsis[0])], axis=1)
+    columns = [column.strip() for column in args.columns.split(",")]
+    unknown = [column for column in columns if column not in frame.columns]
+    if unknown:
+        raise SystemExit(f"error: unknown columns {unknown}")
+    if "True_heading" in columns:
+        frame = frame.assign(True_heading=frame["True_heading"].replace(HEADING_NOT_AVAILABLE, np.nan))
+
+    series = vessel_timeseries(frame, columns, start=args.start, end=args.end, max_buckets=args.buckets)
+    _log(f"{len(series):,} buckets of {series.attrs.get('bucket_seconds', 0):,} s")
+    _write_table(series, args.output)
+    return 0
+
+
+def cmd_report(args):
+    store = load_source(args.source)
+    mmsis = _parse_mmsis(args.mmsi, store)
+    if not mmsis:
+        raise SystemExit("error: no vessels to report on")
+
+    # One vessel -> a PDF; several -> a zip rendered across worker processes
+    if len(mmsis) == 1 and not (args.output or "").lower().endswith(".zip"):
+        from pdf_report import get_pdf_report
+        from segmentation import vessel_segments
+
+        mmsi = mmsis[0]
+        output = args.output or f"Ship_Report_MMSI_{mmsi}.pdf"
+        pdf_bytes = get_pdf_report(store.vessel_index.track(mmsi), mmsi, dataset_id=store.cache_id(mmsi),
+                                   include_details=args.details, segments=vessel_segments(store.segments, mmsi))
+        with open(output, "wb") as f:
+            f.write(pdf_bytes)
+        print(f"Wrote report for MMSI {mmsi} to {output}")
+        return 0
+
+    from batch_reports import generate_batch_reports
+
+    def report_progress(done, total, mmsi, error):
+        status = f"FAILED: {error}" if error else "ok"
+        _log(f"[{done}/{total}] MMSI {mmsi} {status}")
+
+    output = args.output or "ship_reports.zip"
+    failures = generate_batch_reports(store.vessel_index, mmsis, output, max_workers=args.workers,
+                                      progress_callback=report_progress)
+    print(f"Wrote {len(mmsis) - len(failures)} reports to {output}")
+    return 1 if failures else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Ships Data Reports without the web app: ingest, analyze and report.")
+    parser.add_argument("--profile", action="store_true", help="Print per-stage timings to stderr when done")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Parse AIS CSV/NMEA files into the dataset cache")
+    ingest.add_argument("files", nargs="+", help="AIS CSV files or NMEA logs")
+    ingest.set_defaults(func=cmd_ingest)
+
+    datasets = commands.add_parser("datasets", help="List cached datasets, most recently used first")
+    datasets.set_defaults(func=cmd_datasets)
+
+    analyze = commands.add_parser("analyze", help="Per-vessel summary: distance, speed, voyages, stops, anomalies")
+    analyze.add_argument("source", help="AIS file or cached dataset id")
+    analyze.add_argument("--mmsi", default=None, help='Comma-separated MMSIs, or "all" (default)')
+    analyze.add_argument("-o", "--output", default="-", help="Summary CSV, or .json (default: stdout)")
+    analyze.add_argument("--segments", default=None, help="Also write the voyage/stop table (CSV or .json)")
+    analyze.set_defaults(func=cmd_analyze)
+
+    series = commands.add_parser("series", help="Time-bucketed min/max/mean signals of one vessel")
+    series.add_argument("source", help="AIS file or cached dataset id")
+    series.add_argument("--mmsi", required=True, help="The vessel's MMSI")
+    series.add_argument("--columns", default="Speed_over_ground,Implied_speed_kn,Rate_of_turn",
+                        help="Comma-separated signal columns, kinematics ones included (means of angles wrap badly)")
+    series.add_argument("--start", default=None, help="Window start, local (IST) time, e.g. 2025-03-01 or 2025-03-01T06:00")
+    series.add_argument("--end", default=None, help="Window end (exclusive), local (IST) time")
+    series.add_argument("--buckets", type=int, default=2_000, help="Most buckets to return (default: 2000)")
+    series.add_argument("-o", "--output", default="-", help="CSV, or .json (default: stdout)")
+    series.set_defaults(func=cmd_series)
+
+    report = commands.add_parser("report", help="PDF report for one vessel, or a zip of reports for several")
+    report.add_argument("source", help="AIS file or cached dataset id")
+    report.add_argument("--mmsi", default="all", help='Comma-separated MMSIs, or "all" (default)')
+    report.add_argument("-o", "--output", default=None, help="PDF (one vessel) or zip file to write")
+    report.add_argument("--details", action="store_true", help="Include full per-ping status and message tables")
+    report.add_argument("-j", "--workers", type=int, default=None, help="Worker processes for batches (default: CPU count)")
+    report.set_defaults(func=cmd_report)
+    return parser
+
+
+def main(argv=None):
+    from profiling import stage, start_run, run_records, write_prometheus_file
+
+    args = build_parser().parse_args(argv)
+    start_run(args.command)
+    try:
+        with stage(f"cli:{args.command}"):
+            return args.func(args)
+    finally:
+        if args.profile:
+            for record in run_records():
+                _log(f"{record['seconds'] * 1000:10.1f} ms  {record['stage']}")
+        write_prometheus_file()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import numpy as np
+
+
+# ---------------- SPATIAL GRID INDEX ----------------
+# Positions are bucketed into a regular lat/lon grid at ingestion. Row
+# positions are stored sorted by cell id, and cell ids run row-major, so each
+# row of grid cells that a bounding box covers is one contiguous range found
+# by binary search. Only the candidate rows in those ranges are then tested
+# exactly.
+
+DEFAULT_CELL_DEG = 0.5
+
+
+def _position_dtype(n_rows):
+    return np.int32 if n_rows < 2 ** 31 else np.int64
+
+
+class SpatialGridIndex:
+    def __init__(self, df, cell_deg=DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.n_cols = int(np.ceil(360.0 / cell_deg)) + 1
+
+        self.lat = df["Latitude"].to_numpy()
+        self.lon = df["Longitude"].to_numpy()
+        self.times = df["Timestamp"].to_numpy()
+
+        # Dataset extent, for the defaults of area/time filters
+        if len(df):
+            self.bounds = (float(self.lat.min()), float(self.lon.min()), float(self.lat.max()), float(self.lon.max()))
+            self.time_range = (self.times.min(), self.times.max())
+        else:
+            self.bounds = None
+            self.time_range = None
+
+        cells = self._cell_ids(self.lat, self.lon)
+        self.order = np.argsort(cells, kind="stable").astype(_position_dtype(len(df)))
+        self.sorted_cells = cells[self.order]
+
+    def with_inserted_rows(self, df, positions):
+        # Index for df, the indexed frame with new rows inserted before the
+        # ascending old-row `positions` (np.insert semantics). Existing buckets
+        # are kept; only the new rows are bucketed and merged into the order.
+        positions = np.asarray(positions, dtype=np.int64)
+        new_rows = positions + np.arange(len(positions))
+        old_rows = np.asarray(self.order, dtype=np.int64)
+        old_rows += np.searchsorted(positions, old_rows, side="right")
+
+        merged = object.__new__(SpatialGridIndex)
+        merged.cell_deg = self.cell_deg
+        merged.n_cols = self.n_cols
+        merged.lat = df["Latitude"].to_numpy()
+        merged.lon = df["Longitude"].to_numpy()
+        merged.times = df["Timestamp"].to_numpy()
+
+        lat = merged.lat[new_rows]
+        lon = merged.lon[new_rows]
+        times = merged.times[new_rows]
+        if self.bounds is None:
+            merged.bounds = (float(lat.min()), float(lon.min()), float(lat.max()), float(lon.max()))
+            merged.time_range = (times.min(), times.max())
+        else:
+            merged.bounds = (min(self.bounds[0], float(lat.min())), min(self.bounds[1], float(lon.min())),
+                             max(self.bounds[2], float(lat.max())), max(self.bounds[3], float(lon.max())))
+            merged.time_range = (min(self.time_range[0], times.min()), max(self.time_range[1], times.max()))
+
+        cells = self._cell_ids(lat, lon)
+        by_cell = np.argsort(cells, kind="stable")
+        slots = np.searchsorted(self.sorted_cells, cells[by_cell], side="right")
+        merged.order = np.insert(old_rows, slots, new_rows[by_cell]).astype(_position_dtype(len(df)))
+        merged.sorted_cells = np.insert(self.sorted_cells, slots, cells[by_cell])
+        return merged
+
+    def _cell_row_col(self, lat, lon):
+        row = np.floor((np.asarray(lat, dtype=np.float64) + 90.0) / self.cell_deg).astype(np.int64)
+        col = np.floor((np.asarray(lon, dtype=np.float64) + 180.0) / self.cell_deg).astype(np.int64)
+        return row, col
+
+    def _cell_ids(self, lat, lon):
+        row, col = self._cell_row_col(lat, lon)
+        return row * self.n_cols + col
+
+    def query(self, bbox, start=None, end=None):
+        # Row positions (ascending) inside bbox = (min_lat, min_lon, max_lat, max_lon),
+        # optionally restricted to start <= Timestamp <= end
+        min_lat, min_lon, max_lat, max_lon = bbox
+        (row_lo, row_hi), (col_lo, col_hi) = self._cell_row_col([min_lat, max_lat], [min_lon, max_lon])
+
+        ranges = []
+        for row in range(row_lo, row_hi + 1):
+            lo = np.searchsorted(self.sorted_cells, row * self.n_cols + col_lo, side="left")
+            hi = np.searchsorted(self.sorted_cells, row * self.n_cols + col_hi, side="right")
+            if hi > lo:
+                ranges.append(self.order[lo:hi])
+        if not ranges:
+            return np.array([], dtype=np.int64)
+
+        candidates = np.concatenate(ranges)
+        lat = self.lat[candidates]
+        lon = self.lon[candidates]
+        mask = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        if start is not None:
+            mask &= self.times[candidates] >= np.datetime64(start)
+        if end is not None:
+            mask &= self.times[candidates] <= np.datetime64(end)
+
+        return np.sort(candidates[mask])
+
+
+def latest_positions(vessel_index):
+    # Last row of every vessel; the index is sorted by (MMSI, Timestamp)
+    stops = np.array([stop for _, stop in vessel_index.offsets.values()], dtype=np.int64)
+    return vessel_index.df.iloc[stops - 1]
+
+
+def latest_rows_per_vessel(df, positions):
+    # Latest of the given row positions for each vessel in them
+    if len(positions) == 0:
+        return df.iloc[[]]
+    mmsi = df["MMSI"].to_numpy()[positions]
+    last_of_group = np.r_[mmsi[1:] != mmsi[:-1], True]
+    return df.iloc[positions[last_of_group]]
@@ -0,0 +1,53 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from ais_ingest import AIS_SCHEMA, clean_ais_chunk, compact_ais_frame, frame_memory, read_ais_csv
+from benchmarks import write_synthetic_csv
+
+CSV = """MMSI,Timestamp,Latitude,Longitude,Speed_over_ground,Course_over_ground,True_heading,Rate_of_turn,Navigation_Status,Message_Type
+419000001,2025-03-01 00:00:00,18.9,72.8,10.5,90.0,90,0.0,0,1
+419000001,2025-03-01 00:05:00,18.9,72.9,10.5,90.0,,0.0,99,1
+12345,2025-03-01 00:05:00,18.9,72.9,10.5,90.0,90,0.0,0,1
+419000002,not a time,18.9,72.9,10.5,90.0,90,0.0,0,1
+419000002,2025-03-01 00:10:00,91,72.9,10.5,90.0,90,0.0,0,1
+419000002,2025-03-01 00:15:00,18.9,72.9,10.5,90.0,700,0.0,5,3
+"""
+
+
+def test_invalid_rows_are_dropped_and_codes_clamped():
+    df, dropped = read_ais_csv(io.BytesIO(CSV.encode()))
+    # Bad MMSI, unparseable time and latitude 91 are dropped
+    assert dropped == 3
+    assert df["MMSI"].tolist() == [419000001, 419000001, 419000002]
+    # Missing / out-of-range headings become 511, unknown statuses 15
+    assert df["True_heading"].tolist() == [90, 511, 511]
+    assert df["Navigation_Status"].tolist() == [0, 15, 5]
+    assert df["Navigation_Status_Description"].tolist()[2] == "Moored"
+    assert df["Timestamp_IST"].iloc[0] == pd.Timestamp("2025-03-01 05:30")
+
+
+def test_schema_dtypes_and_compactness(tmp_path):
+    path = tmp_path / "tracks.csv"
+    write_synthetic_csv(str(path), 20_000, n_vessels=10, seed=11)
+    df, _ = read_ais_csv(str(path), chunksize=3_000)
+    for col, dtype in AIS_SCHEMA.items():
+        assert df[col].dtype == np.dtype(dtype), col
+    assert isinstance(df["Message_Type_Description"].dtype, pd.CategoricalDtype)
+    assert frame_memory(df) < df.attrs["raw_bytes"] / 2
+
+    # Chunking does not change the result
+    whole, _ = read_ais_csv(str(path))
+    pd.testing.assert_frame_equal(df, whole)
+
+
+def test_compact_frame_is_idempotent():
+    chunk = pd.read_csv(io.StringIO(CSV))
+    df = clean_ais_chunk(chunk)
+    assert compact_ais_frame(df) is df
+    # A plain frame, e.g. from an older cache, is brought to the schema
+    plain = df.astype({"MMSI": "int64", "Latitude": "float64"}).drop(columns="Navigation_Status_Description")
+    compact = compact_ais_frame(plain)
+    assert compact["MMSI"].dtype == np.uint32 and compact["Latitude"].dtype == np.float32
+    assert compact["Navigation_Status_Description"].tolist() == df["Navigation_Status_Description"].tolist()
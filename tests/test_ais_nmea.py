@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from ais_nmea import NMEADecoder, latest_static, synthetic_sentences
+
+# Published sample sentences with their well-known decodes
+POSITION = "!AIVDM,1,1,,B,15M67FC000G?ufbE`FepT@3n00Sa,0*5C"
+STATIC_VOYAGE = [
+    "!AIVDM,2,1,1,A,55?MbV02;H;s<HtKR20EHE:0@T4@Dn2222222216L961O5Gf0NSQEp6ClRp8,0*1C",
+    "!AIVDM,2,2,1,A,88888888880,2*25",
+]
+STATIC_PART_A = "!AIVDM,1,1,,A,H42O55i18tMET00000000000000,2*6D"
+STATIC_PART_B = "!AIVDM,1,1,,A,H42O55lti4hhhilD3nink000?050,0*40"
+
+
+@pytest.mark.parametrize("bad", ["!*00", "!*", "garbage"])
+def test_malformed_sentences_are_counted_not_raised(bad):
+    valid = synthetic_sentences(3)
+    decoder = NMEADecoder(default_time=pd.Timestamp("2025-03-01"))
+
+    positions, _ = decoder.decode(valid + [bad])
+
+    assert len(positions) == 3
+    assert decoder.stats["malformed"] == 1
+
+
+def test_empty_body_among_valid_sentences():
+    valid = synthetic_sentences(4)
+    decoder = NMEADecoder(default_time=pd.Timestamp("2025-03-01"))
+
+    positions, _ = decoder.decode([valid[0], "!*00", valid[1], "!*00", valid[2], valid[3]])
+
+    assert len(positions) == 4
+    assert (decoder.stats["malformed"], decoder.stats["bad_checksum"]) == (2, 0)
+
+
+def _decoder():
+    return NMEADecoder(default_time=pd.Timestamp("2025-03-01"))
+
+
+def test_position_report_fields():
+    positions, _ = _decoder().decode([POSITION])
+    row = positions.iloc[0]
+    assert (row["MMSI"], row["Message_Type"], row["Navigation_Status"]) == (366053209, 1, 3)
+    assert row["Latitude"] == pytest.approx(37.80212, abs=1e-5)
+    assert row["Longitude"] == pytest.approx(-122.3416, abs=1e-4)
+    assert row["Speed_over_ground"] == 0 and row["Course_over_ground"] == pytest.approx(219.3)
+    assert row["Timestamp_IST"] - row["Timestamp"] == pd.Timedelta(hours=5, minutes=30)
+
+
+def test_type_5_static_and_voyage_data():
+    _, statics = _decoder().decode(STATIC_VOYAGE)
+    row = statics.iloc[0]
+    assert (row["MMSI"], row["Name"], row["Callsign"], row["IMO"]) == (351759000, "EVER DIADEM", "3FOF8", 9134270)
+    assert (row["Ship_type"], row["Destination"]) == (70, "NEW YORK")
+    assert row["Draught"] == pytest.approx(12.2)
+
+
+def test_type_5_fragments_split_across_batches():
+    decoder = _decoder()
+    assert len(decoder.decode(STATIC_VOYAGE[:1])[1]) == 0
+    _, statics = decoder.decode(STATIC_VOYAGE[1:])
+    assert statics["Name"].tolist() == ["EVER DIADEM"]
+
+
+def test_type_24_parts_merge_per_vessel():
+    _, statics = _decoder().decode([STATIC_PART_A, STATIC_PART_B])
+    assert statics["Message_Type"].tolist() == [24, 24]
+    info = latest_static(statics).loc[271041815]
+    assert (info["Name"], info["Callsign"], info["Ship_type"]) == ("PROGUY", "TC6163", 60)
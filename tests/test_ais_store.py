@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from ais_ingest import clean_ais_chunk, read_ais_csv
+from ais_store import AISStore
+from benchmarks import write_synthetic_csv
+from live_feed import FEED_COLUMNS
+from search import get_text_index, text_search, time_slice
+
+
+@pytest.fixture(scope="module")
+def ais_frame(tmp_path_factory):
+    path = tmp_path_factory.mktemp("ais") / "tracks.csv"
+    write_synthetic_csv(str(path), 5_000, n_vessels=5, seed=3)
+    df, _ = read_ais_csv(str(path))
+    return df.sort_values(["MMSI", "Timestamp"], kind="mergesort").reset_index(drop=True)
+
+
+def _split_lowest_vessel(df, n_new=5):
+    # Hold back the last pings of the lowest MMSI, so appending them shifts every later vessel
+    lowest = df.index[df["MMSI"] == df["MMSI"].min()][-n_new:]
+    return df.drop(index=lowest).reset_index(drop=True), df.loc[lowest].reset_index(drop=True)
+
+
+def _expected_matches(frame, query):
+    # Row-by-row reference for the cached text index
+    text = frame.astype(str).apply(lambda row: " | ".join(row).lower(), axis=1)
+    return frame[text.str.contains(query.lower(), regex=False).to_numpy()]
+
+
+def test_append_matches_full_rebuild(ais_frame):
+    base, new_rows = _split_lowest_vessel(ais_frame)
+    appended, added, skipped, mmsis = AISStore("base", base).append(new_rows)
+    rebuilt = AISStore("full", ais_frame)
+
+    assert (added, skipped, mmsis) == (len(new_rows), 0, [ais_frame["MMSI"].min()])
+    pd.testing.assert_frame_equal(appended.df, rebuilt.df)
+    pd.testing.assert_frame_equal(appended.kinematics, rebuilt.kinematics)
+    pd.testing.assert_frame_equal(appended.segments.reset_index(drop=True), rebuilt.segments.reset_index(drop=True))
+    for mmsi in rebuilt.mmsi_list:
+        assert appended.vessel_index.offsets[mmsi] == rebuilt.vessel_index.offsets[mmsi]
+
+
+def test_text_index_survives_append_to_other_vessel(ais_frame):
+    base, new_rows = _split_lowest_vessel(ais_frame)
+    store = AISStore("text", base)
+    highest = max(store.mmsi_list)
+    key = (store.cache_id(highest), highest)
+    get_text_index(store.vessel_index.track(highest), key)
+
+    store, _, _, _ = store.append(new_rows)
+    # Unchanged vessel: same cache id, so the index built before the append is reused
+    assert store.cache_id(highest) == key[0]
+    track = store.vessel_index.track(highest)
+    text_index = get_text_index(track, key)
+
+    query = str(track["Latitude"].iloc[-1])
+    expected = _expected_matches(track, query)
+    pd.testing.assert_frame_equal(text_search(track, query, text_index, track), expected)
+    subset = track.iloc[10:20]
+    pd.testing.assert_frame_equal(text_search(subset, query, text_index, track), _expected_matches(subset, query))
+
+
+def test_appended_feed_rows_get_local_time(ais_frame):
+    # Feed records carry UTC only; the rows must still show up in an IST window
+    store = AISStore("feed", ais_frame)
+    mmsi = max(store.mmsi_list)
+    last = store.vessel_index.track(mmsi)["Timestamp"].iloc[-1]
+    times = [last + pd.Timedelta(minutes=minutes) for minutes in (10, 20, 30)]
+    records = pd.DataFrame([[mmsi, str(t), 12.5, 72.8, 10.0, 90.0, 90, 0.0, 0, 1] for t in times], columns=FEED_COLUMNS)
+
+    store, added, _, _ = store.append(clean_ais_chunk(records))
+    track = store.vessel_index.track(mmsi)
+    assert added == 3
+    assert track["Timestamp_IST"].notna().all()
+
+    ist_start = times[0] + pd.Timedelta(hours=5, minutes=30)
+    window = time_slice(track, ist_start, ist_start + pd.Timedelta(hours=1), column="Timestamp_IST", end_inclusive=False)
+    assert window["Timestamp"].tolist() == times
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import charts
+from charts import minmax_decimate, render_chart_png
+
+pytest.importorskip("matplotlib")
+
+
+def test_minmax_decimate_keeps_spikes_within_the_bound():
+    values = np.zeros(100_000)
+    values[12_345], values[67_890] = 50.0, -50.0
+    keep = minmax_decimate(values, max_points=1_000)
+    assert len(keep) <= 1_000
+    assert {12_345, 67_890} <= set(keep.tolist())
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_short_series_is_not_decimated():
+    assert minmax_decimate(np.arange(10.0), max_points=100).tolist() == list(range(10))
+
+
+def _frame(n=5_000):
+    times = pd.date_range("2025-03-01", periods=n, freq="min")
+    return pd.DataFrame({
+        "Timestamp": times,
+        "Timestamp_IST": times + pd.Timedelta(hours=5, minutes=30),
+        "Speed_over_ground": np.linspace(0, 12, n).astype(np.float32),
+    })
+
+
+def test_rendered_charts_are_cached_per_dataset_vessel_and_filters(monkeypatch):
+    monkeypatch.setattr(charts, "_chart_cache", charts.BytesLRUCache(charts.CHART_CACHE_MAX_BYTES))
+    builds = []
+    build_chart = charts.build_chart
+
+    def counting_build(frame, chart_type):
+        builds.append(chart_type)
+        return build_chart(frame, chart_type)
+
+    monkeypatch.setattr(charts, "build_chart", counting_build)
+
+    frame = _frame()
+    png = render_chart_png(frame, "speed", "dataset", 1)
+    assert png.startswith(b"\x89PNG")
+    assert render_chart_png(frame, "speed", "dataset", 1) == png
+    assert len(builds) == 1
+
+    render_chart_png(frame.iloc[:100], "speed", "dataset", 1, filters=("day 1",))
+    render_chart_png(frame, "speed", "dataset+1", 1)  # the vessel got new rows
+    render_chart_png(frame, "speed")  # unidentified data is never cached
+    render_chart_png(frame, "speed")
+    assert len(builds) == 5
@@ -0,0 +1,121 @@
+import pandas as pd
+import pytest
+
+import dataset_cache
+import dataset_registry
+from ais_ingest import read_ais_csv
+from ais_nmea import STATIC_COLUMNS
+from benchmarks import write_synthetic_csv
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    # Empty registry over a private dataset cache
+    monkeypatch.setattr(dataset_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(dataset_registry, "_stores", type(dataset_registry._stores)())
+    monkeypatch.setattr(dataset_registry, "_versions", {})
+    monkeypatch.setattr(dataset_registry, "_dataset_locks", {})
+    return dataset_registry
+
+
+@pytest.fixture(scope="module")
+def uploads(tmp_path_factory):
+    # Two uploads; the first one's last pings are held back to append later
+    frames = []
+    for seed in (1, 2):
+        path = tmp_path_factory.mktemp("ais") / f"tracks_{seed}.csv"
+        write_synthetic_csv(str(path), 2_000, n_vessels=4, seed=seed)
+        frames.append(read_ais_csv(str(path))[0])
+    return frames[0].iloc[:-20].reset_index(drop=True), frames[0].iloc[-20:].reset_index(drop=True), frames[1]
+
+
+def _restart(registry, monkeypatch):
+    # A new process starts with an empty registry
+    monkeypatch.setattr(registry, "_stores", type(registry._stores)())
+    monkeypatch.setattr(registry, "_versions", {})
+
+
+def test_appended_dataset_is_evicted_and_reloads_with_its_rows(registry, uploads, monkeypatch):
+    base, new_rows, other = uploads
+    store = registry.register_dataset("upload", base)
+    dataset_cache.store_cached_dataset("upload", store.df, "upload.csv")
+
+    added, _, _ = registry.append_to_dataset("upload", new_rows.iloc[:10])
+    added += registry.append_to_dataset("upload", new_rows.iloc[10:])[0]
+    appended_rows = len(registry.get_dataset("upload"))
+    assert added == len(new_rows) and appended_rows == len(base) + len(new_rows)
+
+    # Opening another dataset past the bound evicts the appended one
+    monkeypatch.setattr(registry, "MAX_REGISTRY_BYTES", 1)
+    registry.register_dataset("other", other)
+    assert registry.registry_stats()["datasets"] == 1
+
+    reloaded = registry.get_dataset("upload")
+    assert len(reloaded) == appended_rows
+    assert reloaded.dataset_id != "upload"  # per-vessel caches see a new version
+
+    # One appended copy is kept, listed under the upload's id with its rows
+    entries = {entry["dataset_id"]: entry for entry in dataset_cache.list_cached_datasets()}
+    assert entries["upload"]["rows"] == appended_rows and entries["upload"]["name"] == "upload.csv"
+    assert len(dataset_cache._cache_entries()) == 2
+
+
+def test_restart_reloads_appended_rows(registry, uploads, monkeypatch):
+    base, new_rows, _ = uploads
+    store = registry.register_dataset("upload", base)
+    dataset_cache.store_cached_dataset("upload", store.df, "upload.csv")
+    registry.append_to_dataset("upload", new_rows)
+
+    _restart(registry, monkeypatch)
+    reloaded = registry.get_dataset("upload")
+    pd.testing.assert_frame_equal(reloaded.df, registry.AISStore("full", pd.concat([base, new_rows])).df)
+
+
+def test_later_appends_are_written_as_deltas(registry, uploads, monkeypatch):
+    base, new_rows, _ = uploads
+    store = registry.register_dataset("upload", base)
+    dataset_cache.store_cached_dataset("upload", store.df, "upload.csv")
+    monkeypatch.setattr(dataset_cache, "MAX_APPEND_FILES", 2)
+
+    batches = [new_rows.iloc[i:i + 5] for i in range(0, len(new_rows), 5)]
+    registry.append_to_dataset("upload", batches[0])
+    copy = dataset_cache.resolve_dataset_id("upload")
+    for batch in batches[1:3]:
+        registry.append_to_dataset("upload", batch)
+    # The first append wrote a full copy, the next two only their own rows
+    assert dataset_cache.resolve_dataset_id("upload") == copy
+    assert dataset_cache._read_meta(copy)["appends"] == 2
+
+    registry.append_to_dataset("upload", batches[3])
+    # Past MAX_APPEND_FILES deltas the dataset is written out as a new copy
+    assert dataset_cache.resolve_dataset_id("upload") != copy
+    assert len(dataset_cache._cache_entries()) == 2
+
+    registry.append_to_dataset("upload", batches[1])  # duplicates only: nothing written
+    _restart(registry, monkeypatch)
+    reloaded = registry.get_dataset("upload")
+    pd.testing.assert_frame_equal(reloaded.df, registry.AISStore("full", pd.concat([base, new_rows])).df)
+
+
+def test_vessel_names_survive_a_restart(registry, uploads, monkeypatch):
+    base, new_rows, _ = uploads
+    first, last = base["MMSI"].min(), base["MMSI"].max()
+
+    def static(mmsi, name):
+        row = dict.fromkeys(STATIC_COLUMNS)
+        row.update(MMSI=mmsi, Timestamp=base["Timestamp"].max(), Message_Type=5, Name=name)
+        return pd.DataFrame([row], columns=STATIC_COLUMNS)
+
+    store = registry.register_dataset("upload", base, static(first, "FIRST LIGHT"))
+    dataset_cache.store_cached_dataset("upload", store.df, "upload.nmea", vessel_info=store.vessel_info)
+    _restart(registry, monkeypatch)
+    assert registry.get_dataset("upload").vessel_name(first) == "FIRST LIGHT"
+
+    # Names decoded from appended sentences are kept with the appended rows
+    registry.append_to_dataset("upload", new_rows.iloc[:10])
+    registry.append_to_dataset("upload", new_rows.iloc[10:], static(last, "LAST ORDERS"))
+    _restart(registry, monkeypatch)
+    reloaded = registry.get_dataset("upload")
+    assert (reloaded.vessel_name(first), reloaded.vessel_name(last)) == ("FIRST LIGHT", "LAST ORDERS")
@@ -0,0 +1,45 @@
+import pytest
+
+import geocode
+from kinematics import haversine_nm
+
+pytest.importorskip("scipy")
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "geocode.sqlite")
+    monkeypatch.setattr(geocode, "GEOCODE_CACHE_PATH", path)
+    return path
+
+
+def test_labels_near_and_far_from_ports(cache_path):
+    near, far = geocode.location_labels([1.27, -30.0], [103.85, -120.0])
+    assert near == "near Singapore (SG)"
+    port, distance = geocode.nearest_port([-30.0], [-120.0])
+    assert far == f"{distance[0]:,.0f} NM from {port[0]}"
+    assert distance[0] > geocode.NEAR_PORT_NM
+
+
+def test_distance_is_great_circle_to_the_port(cache_path):
+    ports, _ = geocode.load_gazetteer()
+    rotterdam = ports[ports["name"] == "Rotterdam"].iloc[0]
+    port, distance = geocode.nearest_port([52.0], [4.0])
+    assert port[0] == "Rotterdam (NL)"
+    assert distance[0] == pytest.approx(haversine_nm(52.0, 4.0, rotterdam["latitude"], rotterdam["longitude"]), rel=1e-6)
+
+
+def test_repeat_lookups_come_from_the_cache(cache_path, monkeypatch):
+    first = geocode.location_labels([18.95, 51.95], [72.84, 4.14])
+
+    def no_tree(lat, lon):
+        raise AssertionError("looked up again")
+
+    monkeypatch.setattr(geocode, "_nearest_ports", no_tree)
+    # Same cells after rounding to CACHE_DECIMALS
+    assert geocode.location_labels([51.951, 18.949], [4.141, 72.841]) == first[::-1]
+
+
+def test_unusable_cache_file_is_not_an_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(geocode, "GEOCODE_CACHE_PATH", str(tmp_path / "missing" / "geocode.sqlite"))
+    assert geocode.location_labels([1.27], [103.85]) == ["near Singapore (SG)"]
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+import job_queue
+from job_queue import JobQueue
+
+
+def _wait(queue, job_id, timeout=10):
+    # Status once the job has left the queued/running states
+    for _ in range(int(timeout / 0.05)):
+        job = queue.get(job_id)
+        if job["status"] not in job_queue.ACTIVE_STATES:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    def ok_job(progress, text):
+        progress(0.5)
+        return text.encode(), "result.txt", "text/plain", "a note"
+
+    def failing_job(progress):
+        raise ValueError("bad input")
+
+    def blocked_job(progress, release):
+        release.wait(10)
+        return b"", "blocked.txt", "text/plain", None
+
+    monkeypatch.setattr(job_queue, "JOB_KINDS", {"ok": ok_job, "fail": failing_job, "blocked": blocked_job})
+    return JobQueue(jobs_dir=str(tmp_path / "jobs"), max_running=1, max_queued=3, max_per_owner=2)
+
+
+def test_finished_job_has_its_artifact(queue):
+    job_id = queue.submit("ok", ("hello",), "Greeting", owner="a")
+    job = _wait(queue, job_id)
+    assert (job["status"], job["progress"], job["file_name"], job["size"], job["note"]) == ("done", 1.0, "result.txt", 5, "a note")
+    assert queue.result(job_id) == b"hello"
+    assert [j["id"] for j in queue.jobs("a")] == [job_id] and queue.jobs("b") == []
+
+    # A later process finds it on disk
+    assert JobQueue(jobs_dir=queue.jobs_dir).result(job_id) == b"hello"
+    assert queue.remove(job_id) and queue.get(job_id) is None
+
+
+def test_failed_job_reports_the_error(queue):
+    job_id = queue.submit("fail", (), "Broken", owner="a")
+    job = _wait(queue, job_id)
+    assert (job["status"], job["error"]) == ("failed", "bad input")
+    assert queue.result(job_id) is None
+
+
+def test_limits_and_cancel(queue):
+    release = threading.Event()
+    try:
+        running = queue.submit("blocked", (release,), "Running", owner="a")
+        waiting = queue.submit("blocked", (release,), "Waiting", owner="a")
+        with pytest.raises(RuntimeError):
+            queue.submit("ok", ("x",), "Third", owner="a")  # per-owner limit
+        queue.submit("blocked", (release,), "Other user", owner="b")
+        with pytest.raises(RuntimeError):
+            queue.submit("ok", ("x",), "Fourth", owner="c")  # whole queue full
+
+        assert queue.cancel(waiting)
+        assert queue.get(waiting)["status"] == "cancelled"
+        assert not queue.remove(running)  # still active
+    finally:
+        release.set()
+    assert _wait(queue, running)["status"] == "done"
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kinematics import anomaly_summary, compute_kinematics, haversine_nm
+
+
+def _pings(rows):
+    # rows: (MMSI, minutes since start, latitude, longitude, COG, heading)
+    df = pd.DataFrame(rows, columns=["MMSI", "Minutes", "Latitude", "Longitude", "Course_over_ground", "True_heading"])
+    df["Timestamp"] = pd.Timestamp("2025-03-01") + pd.to_timedelta(df.pop("Minutes"), unit="min")
+    return df
+
+
+def test_one_arc_minute_is_one_nautical_mile():
+    assert haversine_nm(10.0, 70.0, 10.0 + 1 / 60, 70.0) == pytest.approx(1.0, abs=1e-3)
+
+
+def test_deltas_restart_at_every_vessel():
+    # Vessel 1 steams north at 10 kn (1 nm per 6 minutes); vessel 2 starts far away
+    df = _pings([
+        (1, 0, 10.0, 70.0, 0, 0),
+        (1, 6, 10.0 + 1 / 60, 70.0, 0, 0),
+        (1, 12, 10.0 + 2 / 60, 70.0, 0, 0),
+        (2, 3, 20.0, 60.0, 90, 80),
+        (2, 9, 20.0, 60.0, 90, 511),
+    ])
+    k = compute_kinematics(df)
+
+    assert np.isnan(k["Segment_distance_nm"].iloc[[0, 3]]).all()
+    assert np.isnan(k["Time_gap_s"].iloc[[0, 3]]).all()
+    assert k["Segment_distance_nm"].iloc[[1, 2, 4]].tolist() == pytest.approx([1.0, 1.0, 0.0], abs=1e-3)
+    assert k["Implied_speed_kn"].iloc[[1, 2, 4]].tolist() == pytest.approx([10.0, 10.0, 0.0], abs=1e-2)
+    assert k["Time_gap_s"].iloc[4] == 360
+    # The jump from vessel 1's last fix to vessel 2's first is not an anomaly
+    assert anomaly_summary(k) == {"Teleport_jump": 0, "Implied_speed_anomaly": 0, "AIS_silence": 0}
+    # COG/heading drift, unless the heading is "not available" (511)
+    assert k["Heading_COG_drift"].iloc[3] == 10
+    assert np.isnan(k["Heading_COG_drift"].iloc[4])
+
+
+def test_anomaly_flags():
+    df = _pings([
+        (1, 0, 10.0, 70.0, 0, 0),
+        (1, 5, 10.5, 70.0, 0, 0),    # 30 nm in 5 minutes: teleport
+        (1, 65, 10.5, 70.0, 0, 0),   # an hour of silence
+        (1, 66, 10.5 + 1 / 60, 70.0, 0, 0),  # 60 kn
+    ])
+    k = compute_kinematics(df)
+    assert k["Teleport_jump"].tolist() == [False, True, False, False]
+    assert k["Implied_speed_anomaly"].tolist() == [False, True, False, True]
+    assert k["AIS_silence"].tolist() == [False, False, True, False]
@@ -0,0 +1,34 @@
+import pandas as pd
+
+from benchmarks import write_synthetic_csv
+from live_feed import FileDropSource, LiveFeed
+
+
+def test_file_drop_reports_only_ingested_files(tmp_path):
+    write_synthetic_csv(str(tmp_path / "tracks.csv"), 200, n_vessels=2, seed=4)
+    (tmp_path / "notes.csv").write_text("a,b\n1,2\n")
+
+    new_rows, _, _, names = FileDropSource(str(tmp_path)).drain()
+    assert names == ["tracks.csv"]
+    assert len(new_rows) == 200
+    assert sorted(p.name for p in (tmp_path / "rejected").iterdir()) == ["notes.csv"]
+    assert sorted(p.name for p in (tmp_path / "processed").iterdir()) == ["tracks.csv"]
+
+
+def test_live_feed_poll_appends_dropped_rows(tmp_path):
+    batches = []
+
+    def append(new_rows, static):
+        batches.append(new_rows)
+        return len(new_rows), 0, sorted(new_rows["MMSI"].unique())
+
+    # A long poll interval, so only the explicit poll() below drains
+    feed = LiveFeed(append, drop_dir=str(tmp_path), poll_seconds=3600)
+    try:
+        assert feed.poll() == 0
+        write_synthetic_csv(str(tmp_path / "tracks.csv"), 100, n_vessels=2, seed=5)
+        assert feed.poll() == 100
+    finally:
+        feed.stop()
+    assert feed.rows_added == 100 and not feed.running
+    assert len(pd.concat(batches)) == 100
@@ -0,0 +1,63 @@
+import pandas as pd
+
+from search import build_text_index, paginate, structured_query, text_search, time_slice
+
+
+def _track():
+    times = pd.date_range("2025-03-01", periods=48, freq="h")
+    return pd.DataFrame({"Timestamp": times, "Timestamp_IST": times + pd.Timedelta(hours=5, minutes=30), "Value": range(48)})
+
+
+def test_time_slice_end_is_inclusive_by_default():
+    track = _track()
+    sliced = time_slice(track, "2025-03-01 10:00", "2025-03-01 12:00")
+    assert sliced["Value"].tolist() == [10, 11, 12]
+
+
+def test_time_slice_exclusive_end_on_another_column():
+    # A chart date window: the whole IST day, up to the next midnight
+    track = _track()
+    sliced = time_slice(track, pd.Timestamp("2025-03-02"), pd.Timestamp("2025-03-03"), column="Timestamp_IST", end_inclusive=False)
+    assert sliced["Timestamp_IST"].dt.date.unique().tolist() == [pd.Timestamp("2025-03-02").date()]
+    assert len(sliced) == 24
+
+
+def test_time_slice_open_ends():
+    track = _track()
+    assert len(time_slice(track)) == 48
+    assert time_slice(track, start="2025-03-02 23:00")["Value"].tolist() == [47]
+
+
+def _vessel():
+    # One vessel's track as it sits in the dataset: a slice with a non-zero index
+    track = _track()
+    track.index += 1_000
+    track["Latitude"] = [10.0 + i / 100 for i in range(48)]
+    track["Longitude"] = 70.0
+    track["Speed_over_ground"] = [float(i % 12) for i in range(48)]
+    track["Navigation_Status"] = [5 if i < 6 else 0 for i in range(48)]
+    return track
+
+
+def test_structured_query_combines_filters():
+    track = _vessel()
+    assert len(structured_query(track)) == 48
+    result = structured_query(track, start="2025-03-01 12:00", bbox=(10.0, 69.0, 10.3, 71.0), speed_range=(0, 5))
+    assert result["Value"].tolist() == [12, 13, 14, 15, 16, 17, 24, 25, 26, 27, 28, 29]
+    assert structured_query(track, statuses=[5])["Value"].tolist() == [0, 1, 2, 3, 4, 5]
+
+
+def test_text_search_on_a_filtered_subset():
+    track = _vessel()
+    text_index = build_text_index(track)
+    subset = structured_query(track, start="2025-03-02")
+    found = text_search(subset, "10.4", text_index, track)
+    assert found["Value"].tolist() == [40, 41, 42, 43, 44, 45, 46, 47]
+
+
+def test_paginate_clamps_the_page():
+    track = _vessel()
+    page, n_pages = paginate(track, 3, page_size=20)
+    assert n_pages == 3 and page["Value"].tolist() == list(range(40, 48))
+    assert paginate(track, 99, page_size=20)[0]["Value"].iloc[0] == 40
+    assert paginate(track.iloc[:0], 1)[1] == 1
@@ -0,0 +1,68 @@
+import pandas as pd
+
+from kinematics import compute_kinematics
+from segmentation import compute_segments
+
+PING_MINUTES = 5
+
+
+def _track(mmsi, legs, start="2025-03-01"):
+    # legs: (pings, SOG knots, eastward step in nm per ping, navigation status).
+    # On the equator one minute of longitude is one nautical mile.
+    rows = []
+    time, lon = pd.Timestamp(start), 72.0
+    for pings, sog, step_nm, status in legs:
+        for _ in range(pings):
+            rows.append({"MMSI": mmsi, "Timestamp": time, "Latitude": 0.0, "Longitude": lon,
+                         "Speed_over_ground": sog, "Course_over_ground": 90.0, "True_heading": 90,
+                         "Navigation_Status": status})
+            time += pd.Timedelta(minutes=PING_MINUTES)
+            lon += step_nm / 60
+    return pd.DataFrame(rows)
+
+
+def _segments(*tracks):
+    df = pd.concat(tracks, ignore_index=True)
+    return compute_segments(df, compute_kinematics(df))
+
+
+def test_stop_splits_two_voyages():
+    track = _track(1, [(12, 10.0, 0.8, 0), (24, 0.0, 0.0, 5), (12, 10.0, 0.8, 0)])
+    segments = _segments(track)
+    assert segments["Kind"].tolist() == ["Voyage", "Stop", "Voyage"]
+    assert segments["Pings"].tolist() == [12, 24, 12]
+    stop = segments.iloc[1]
+    assert stop["Start"] == track["Timestamp"].iloc[12]
+    assert stop["Duration"] == pd.Timedelta(minutes=23 * PING_MINUTES)
+    assert stop["Distance_nm"] == 0
+
+
+def test_short_stop_is_part_of_the_voyage():
+    # Three 5-minute steps stay under MIN_STOP_MINUTES
+    segments = _segments(_track(1, [(12, 10.0, 0.8, 0), (4, 0.0, 0.0, 0), (12, 10.0, 0.8, 0)]))
+    assert segments["Kind"].tolist() == ["Voyage"]
+    assert segments["Pings"].tolist() == [28]
+
+
+def test_slow_drift_away_from_the_first_fix_is_not_a_stop():
+    # Two hours under STOP_SPEED_KN, but 2.4 nm from where it began
+    drifting = _segments(_track(1, [(6, 10.0, 0.8, 0), (24, 0.3, 0.1, 0)]))
+    assert drifting["Kind"].tolist() == ["Voyage"]
+    # Swinging at anchor stays well inside STOP_RADIUS_NM
+    swinging = _segments(_track(1, [(6, 10.0, 0.8, 0), (12, 0.3, 0.02, 1), (12, 0.3, -0.02, 1)]))
+    assert swinging["Kind"].tolist() == ["Voyage", "Stop"]
+
+
+def test_moored_status_counts_below_the_moored_speed():
+    segments = _segments(_track(1, [(12, 10.0, 0.8, 0), (12, 1.5, 0.0, 5), (12, 10.0, 0.8, 0)]))
+    assert segments["Kind"].tolist() == ["Voyage", "Stop", "Voyage"]
+
+
+def test_segments_do_not_span_vessels():
+    # The first vessel ends stopped and the second starts stopped at the same place
+    first = _track(1, [(12, 10.0, 0.8, 0), (12, 0.0, 0.0, 5)])
+    second = _track(2, [(12, 0.0, 0.0, 5), (12, 10.0, 0.8, 0)], start="2025-03-01 01:00")
+    segments = _segments(first, second)
+    assert list(zip(segments["MMSI"], segments["Kind"], segments["Pings"])) == [
+        (1, "Voyage", 12), (1, "Stop", 12), (2, "Stop", 12), (2, "Voyage", 12),
+    ]
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from spatial_index import SpatialGridIndex
+
+
+def _positions(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Latitude": rng.uniform(-5, 5, n).astype(np.float32),
+        "Longitude": rng.uniform(175, 180, n).astype(np.float32),
+        "Timestamp": pd.Timestamp("2025-03-01") + pd.to_timedelta(rng.integers(0, 86_400, n), unit="s"),
+    })
+
+
+def _brute_force(df, bbox, start=None, end=None):
+    min_lat, min_lon, max_lat, max_lon = bbox
+    mask = df["Latitude"].between(min_lat, max_lat) & df["Longitude"].between(min_lon, max_lon)
+    if start is not None:
+        mask &= df["Timestamp"] >= start
+    if end is not None:
+        mask &= df["Timestamp"] <= end
+    return np.flatnonzero(mask.to_numpy())
+
+
+BOXES = [
+    (-1.0, 176.0, 1.0, 177.0),     # inside one grid row
+    (-5.0, 175.0, 5.0, 180.0),     # the whole extent, up to the antimeridian
+    (0.25, 178.1, 0.3, 178.2),     # smaller than a cell
+    (20.0, 10.0, 30.0, 20.0),      # no data
+]
+
+
+def test_query_matches_a_full_scan():
+    df = _positions(5_000, seed=7)
+    index = SpatialGridIndex(df)
+    for bbox in BOXES:
+        assert index.query(bbox).tolist() == _brute_force(df, bbox).tolist()
+    start, end = pd.Timestamp("2025-03-01 06:00"), pd.Timestamp("2025-03-01 12:00")
+    assert index.query(BOXES[0], start, end).tolist() == _brute_force(df, BOXES[0], start, end).tolist()
+    assert index.bounds == (float(df["Latitude"].min()), float(df["Longitude"].min()),
+                            float(df["Latitude"].max()), float(df["Longitude"].max()))
+
+
+def test_inserted_rows_match_a_rebuilt_index():
+    df = _positions(3_000, seed=8)
+    new_at = np.sort(np.random.default_rng(9).choice(3_000, 200, replace=False))
+    old = df.drop(index=df.index[new_at]).reset_index(drop=True)
+    # np.insert positions of the held-back rows among the remaining ones
+    positions = new_at - np.arange(len(new_at))
+
+    merged = SpatialGridIndex(old).with_inserted_rows(df, positions)
+    rebuilt = SpatialGridIndex(df)
+    assert np.array_equal(merged.sorted_cells, rebuilt.sorted_cells)
+    assert (merged.bounds, merged.time_range) == (rebuilt.bounds, rebuilt.time_range)
+    for bbox in BOXES:
+        assert merged.query(bbox).tolist() == _brute_force(df, bbox).tolist()
+
+
+def test_insert_into_an_empty_index():
+    df = _positions(50, seed=10)
+    merged = SpatialGridIndex(df.iloc[:0]).with_inserted_rows(df, np.zeros(50, dtype=np.int64))
+    assert merged.query(BOXES[1]).tolist() == list(range(50))
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from timeseries import bucket_width, lttb_indices, vessel_timeseries, window_aggregate
+
+
+def _times(n, freq="s", start="2025-03-01"):
+    return pd.date_range(start, periods=n, freq=freq).to_numpy()
+
+
+def test_bucket_width_is_the_smallest_round_width_that_fits():
+    assert bucket_width("2025-03-01", "2025-03-01 01:00", max_buckets=100) == 60
+    assert bucket_width("2025-03-01", "2025-03-01 00:01:39", max_buckets=100) == 1
+    assert bucket_width("2025-03-01", "2025-03-01 00:01:40", max_buckets=100) == 2
+    # Past the largest candidate, the span is split evenly
+    assert bucket_width("2025-03-01", "2026-03-01", max_buckets=10) == 365 * 86400 // 9
+
+
+def test_window_aggregate_buckets_are_aligned_and_half_open():
+    # Samples at :00, :30, 1:00 and 1:59 with 1-minute buckets: 1:00 opens the second bucket
+    times = pd.to_datetime(["2025-03-01 00:00:00", "2025-03-01 00:00:30", "2025-03-01 00:01:00",
+                            "2025-03-01 00:01:59", "2025-03-01 00:05:10"]).to_numpy()
+    values = np.array([1.0, 3.0, 5.0, np.nan, 7.0])
+    buckets = window_aggregate(times, values, width=60)
+    assert buckets["Time"].dt.strftime("%H:%M").tolist() == ["00:00", "00:01", "00:05"]
+    assert buckets["Min"].tolist() == [1.0, 5.0, 7.0]
+    assert buckets["Max"].tolist() == [3.0, 5.0, 7.0]
+    assert buckets["Mean"].tolist() == [2.0, 5.0, 7.0]
+    # NaNs are skipped, not counted; empty minutes are left out
+    assert buckets["Count"].tolist() == [2, 1, 1]
+
+
+def test_window_aggregate_matches_resample():
+    rng = np.random.default_rng(12)
+    times = np.sort(pd.Timestamp("2025-03-01").to_datetime64() + rng.integers(0, 86_400, 20_000).astype("timedelta64[s]"))
+    values = rng.normal(10, 3, len(times))
+    buckets = window_aggregate(times, values, max_buckets=500)
+    assert len(buckets) <= 500
+
+    width = f"{bucket_width(times[0], times[-1], 500)}s"
+    expected = pd.Series(values, index=times).resample(width).agg(["min", "max", "mean", "count"])
+    expected = expected[expected["count"] > 0]
+    assert buckets["Time"].tolist() == expected.index.tolist()
+    np.testing.assert_allclose(buckets[["Min", "Max", "Mean"]].to_numpy(), expected[["min", "max", "mean"]].to_numpy())
+
+
+def test_lttb_keeps_ends_and_peaks():
+    times = _times(10_000)
+    values = np.zeros(10_000)
+    values[4_321] = 100.0
+    values[:3] = np.nan
+    keep = lttb_indices(times, values, max_points=200)
+    assert len(keep) == 200
+    assert keep[0] == 3 and keep[-1] == 9_999  # first and last valid samples
+    assert 4_321 in keep
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_lttb_returns_short_series_whole():
+    values = np.array([1.0, np.nan, 2.0, 3.0])
+    assert lttb_indices(_times(4), values, max_points=10).tolist() == [0, 2, 3]
+
+
+def test_vessel_timeseries_window_end_is_exclusive():
+    times = pd.date_range("2025-03-01", periods=48 * 60, freq="min")
+    frame = pd.DataFrame({"Timestamp": times, "Speed_over_ground": np.arange(len(times), dtype=np.float32)})
+    series = vessel_timeseries(frame, ["Speed_over_ground"], start="2025-03-01 12:00", end="2025-03-02 00:00", max_buckets=12)
+    assert series.attrs["bucket_seconds"] == 3600
+    assert len(series) == 12 and series["Pings"].sum() == 12 * 60
+    assert series["Speed_over_ground_min"].iloc[0] == 12 * 60
+    assert series["Speed_over_ground_max"].iloc[-1] == 24 * 60 - 1
+    assert series["Speed_over_ground_mean"].dtype == np.float32
+    assert len(vessel_timeseries(frame, ["Speed_over_ground"], start="2026-01-01")) == 0
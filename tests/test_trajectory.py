@@ -0,0 +1,38 @@
+import numpy as np
+
+from trajectory import key_event_indices, simplify_track
+
+
+def test_straight_track_keeps_only_its_ends():
+    lat = np.linspace(10.0, 11.0, 500)
+    lon = np.linspace(70.0, 71.0, 500)
+    assert simplify_track(lat, lon, zoom=12).tolist() == [0, 499]
+
+
+def test_corner_is_kept():
+    # East for 100 pings, then north for 100
+    lat = np.r_[np.full(100, 10.0), np.linspace(10.0, 11.0, 101)[1:]]
+    lon = np.r_[np.linspace(70.0, 71.0, 100), np.full(100, 71.0)]
+    assert simplify_track(lat, lon, zoom=12).tolist() == [0, 99, 199]
+
+
+def test_zoom_sets_the_detail_and_max_points_bounds_it():
+    # A wobble of ~0.001 degrees: invisible at zoom 4, several pixels at zoom 16
+    lon = np.linspace(70.0, 72.0, 2_000)
+    lat = 10.0 + 0.001 * np.sin(np.arange(2_000) / 5.0)
+    assert len(simplify_track(lat, lon, zoom=4)) == 2
+    detailed = simplify_track(lat, lon, zoom=16)
+    assert len(detailed) > 100
+
+    bounded = simplify_track(lat, lon, zoom=16, max_points=50)
+    assert len(bounded) == 50
+    assert bounded[0] == 0 and bounded[-1] == 1_999
+    assert np.all(np.diff(bounded) > 0)
+
+
+def test_key_events_are_start_end_stops_and_sharp_turns():
+    speed = np.array([10, 10, 10, 0, 0, 10, 10, 10, 10, 10], dtype=float)
+    course = np.array([90, 90, 90, 90, 90, 90, 180, 180, 185, 185], dtype=float)
+    assert key_event_indices(speed, course) == {0: "Start", 3: "Stop", 6: "Turn", 9: "End"}
+    assert key_event_indices(speed, course, stops=False) == {0: "Start", 6: "Turn", 9: "End"}
+    assert key_event_indices(speed, course, max_markers=2) == {0: "Start", 9: "End"}
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from search import time_slice
+
+
+# ---------------- TIME-WINDOW AGGREGATION ----------------
+# Long tracks are reduced to a bounded number of points before anything is
+# drawn or exported:
+#   - window_aggregate() puts one signal into fixed-width time buckets and
+#     keeps min / max / mean / count per bucket. The width is the smallest
+#     "round" width (1 s, 5 s, ... 1 h, ... 30 d) that fits the span into
+#     max_buckets buckets, and buckets are aligned to multiples of it, so
+#     the same data always lands in the same buckets;
+#   - lttb_indices() picks max_points real samples with Largest-Triangle-
+#     Three-Buckets, which keeps the visual shape of the line;
+#   - windows are cut with search.time_slice(), by binary search.
+# Times must be sorted, as every vessel track is. All of it is vectorized
+# except LTTB's loop over output buckets, which is bounded by max_points.
+
+MAX_BUCKETS = 2_000
+
+# Candidate bucket widths, in seconds
+BUCKET_WIDTHS = (
+    1, 2, 5, 10, 15, 30,
+    60, 2 * 60, 5 * 60, 10 * 60, 15 * 60, 30 * 60,
+    3600, 2 * 3600, 3 * 3600, 6 * 3600, 12 * 3600,
+    86400, 2 * 86400, 7 * 86400, 14 * 86400, 30 * 86400,
+)
+
+AGGREGATES = ("min", "max", "mean")
+
+
+def _nanoseconds(times):
+    return np.asarray(times, dtype="datetime64[ns]").view(np.int64)
+
+
+def bucket_width(start, end, max_buckets=MAX_BUCKETS):
+    # Smallest candidate width (seconds) that covers start..end in max_buckets buckets
+    span = (pd.Timestamp(end) - pd.Timestamp(start)).total_seconds()
+    for width in BUCKET_WIDTHS:
+        if span / width < max_buckets:
+            return width
+    return int(np.ceil(span / max(max_buckets - 1, 1)))
+
+
+def _buckets(times, width):
+    # Start time of every occupied bucket and the row position where it begins
+    width_ns = np.int64(width) * 1_000_000_000
+    bucket = _nanoseconds(times) // width_ns
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    return (bucket[starts] * width_ns).view("datetime64[ns]"), starts
+
+
+def window_aggregate(times, values, max_buckets=MAX_BUCKETS, width=None):
+    # Per-bucket Time (bucket start), Min, Max, Mean and Count of one signal.
+    # NaNs are skipped; a bucket of only NaNs has NaN aggregates and Count 0.
+    # Buckets without any sample are left out, not filled.
+    times = np.asarray(times, dtype="datetime64[ns]")
+    values = np.asarray(values, dtype=np.float64)
+    if len(times) == 0:
+        return pd.DataFrame({"Time": times, "Min": values, "Max": values, "Mean": values, "Count": np.zeros(0, dtype=np.int64)})
+
+    if width is None:
+        width = bucket_width(times[0], times[-1], max_buckets)
+    bucket_times, starts = _buckets(times, width)
+
+    valid = ~np.isnan(values)
+    count = np.add.reduceat(valid.astype(np.int64), starts)
+    total = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+    return pd.DataFrame({
+        "Time": bucket_times,
+        # fmin/fmax ignore NaN unless the whole bucket is NaN
+        "Min": np.fmin.reduceat(values, starts),
+        "Max": np.fmax.reduceat(values, starts),
+        "Mean": mean,
+        "Count": count,
+    })
+
+
+def lttb_indices(times, values, max_points=MAX_BUCKETS):
+    # Indices of at most max_points samples chosen by Largest-Triangle-Three-
+    # Buckets. NaN samples are never chosen; the first and last valid ones are.
+    y_all = np.asarray(values, dtype=np.float64)
+    valid = np.flatnonzero(~np.isnan(y_all))
+    n = len(valid)
+    if n <= max_points or max_points < 3:
+        return valid if n <= max_points else valid[np.linspace(0, n - 1, max_points).astype(np.int64)]
+
+    x = (_nanoseconds(times)[valid] - _nanoseconds(times)[valid[0]]) / 1e9
+    y = y_all[valid]
+
+    # Interior points split into max_points - 2 buckets
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        if i + 2 < len(edges):
+            next_x, next_y = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        area = np.abs((x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return valid[keep]
+
+
+# ---------------- PER-VESSEL TIME SERIES ----------------
+def vessel_timeseries(frame, columns, start=None, end=None, max_buckets=MAX_BUCKETS, time_column=None):
+    # One row per time bucket with <column>_min/_max/_mean for each signal and
+    # the number of pings, over start <= time < end of one vessel's time-sorted frame
+    if time_column is None:
+        time_column = "Timestamp_IST" if "Timestamp_IST" in frame.columns else "Timestamp"
+    frame = time_slice(frame, start, end, column=time_column, end_inclusive=False)
+    times = frame[time_column].to_numpy()
+    if len(times) == 0:
+        return pd.DataFrame(columns=["Time", "Pings"] + [f"{column}_{agg}" for column in columns for agg in AGGREGATES])
+
+    # Every column shares the buckets, which depend on the times only
+    width = bucket_width(times[0], times[-1], max_buckets)
+    bucket_times, starts = _buckets(times, width)
+    series = pd.DataFrame({"Time": bucket_times, "Pings": np.diff(np.r_[starts, len(times)])})
+    for column in columns:
+        values = frame[column].to_numpy(dtype=np.float64)
+        aggregated = window_aggregate(times, values, width=width)
+        # Computed in float64, returned in the column's own precision
+        dtype = np.float32 if frame[column].dtype == np.float32 else np.float64
+        for agg in AGGREGATES:
+            series[f"{column}_{agg}"] = aggregated[agg.capitalize()].to_numpy().astype(dtype)
+    series.attrs["bucket_seconds"] = width
+    return series
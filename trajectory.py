@@ -0,0 +1,112 @@
+import heapq
+
+import numpy as np
+
+
+# ---------------- TRAJECTORY SIMPLIFICATION ----------------
+# The route map draws a Douglas-Peucker simplified polyline whose tolerance is
+# tied to the map zoom, and only places markers on key events (start, end,
+# stops and big turns), so the HTML payload stays bounded for any track length.
+
+MAX_ROUTE_POINTS = 2_000
+MAX_EVENT_MARKERS = 200
+
+STOP_SPEED_KNOTS = 0.5
+TURN_THRESHOLD_DEG = 60.0
+
+# How many screen pixels of deviation the simplified line may have
+TOLERANCE_PIXELS = 1.5
+
+
+def tolerance_for_zoom(zoom):
+    # Degrees of longitude covered by one pixel at this web-mercator zoom level
+    return TOLERANCE_PIXELS * 360.0 / (256 * 2 ** zoom)
+
+
+def _farthest_point(x, y, start, end):
+    # (distance, index) of the point between start and end farthest from the chord
+    xs = x[start + 1:end] - x[start]
+    ys = y[start + 1:end] - y[start]
+    dx = x[end] - x[start]
+    dy = y[end] - y[start]
+    seg_len = np.hypot(dx, dy)
+    if seg_len == 0:
+        dist = np.hypot(xs, ys)
+    else:
+        dist = np.abs(dy * xs - dx * ys) / seg_len
+
+    i = int(np.argmax(dist))
+    return float(dist[i]), start + 1 + i
+
+
+def douglas_peucker(x, y, tolerance, max_points=None):
+    # Returns a boolean mask of the points to keep. Segments are split in
+    # order of largest deviation, so stopping at max_points keeps the most
+    # significant vertices; iterative so long tracks cannot hit the recursion limit.
+    n = len(x)
+    keep = np.zeros(n, dtype=bool)
+    if n <= 2:
+        keep[:] = True
+        return keep
+
+    keep[0] = keep[-1] = True
+    kept = 2
+    heap = []
+    dist, split = _farthest_point(x, y, 0, n - 1)
+    heapq.heappush(heap, (-dist, 0, n - 1, split))
+
+    while heap and (max_points is None or kept < max_points):
+        neg_dist, start, end, split = heapq.heappop(heap)
+        if -neg_dist <= tolerance:
+            break
+        keep[split] = True
+        kept += 1
+        for seg_start, seg_end in ((start, split), (split, end)):
+            if seg_end - seg_start >= 2:
+                dist, i = _farthest_point(x, y, seg_start, seg_end)
+                heapq.heappush(heap, (-dist, seg_start, seg_end, i))
+
+    return keep
+
+
+def simplify_track(lat, lon, zoom, max_points=MAX_ROUTE_POINTS):
+    # Indices of the points to draw, never more than max_points
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    if len(lat) <= 2:
+        return np.arange(len(lat))
+
+    # Equirectangular projection so a degree of longitude is not over-weighted
+    x = lon * np.cos(np.radians(np.nanmean(lat)))
+    return np.flatnonzero(douglas_peucker(x, lat, tolerance_for_zoom(zoom), max_points))
+
+
+def key_event_indices(speed, course, max_markers=MAX_EVENT_MARKERS, stops=True):
+    # Returns {index: label} for the start, end, the first ping of every stop
+    # (unless stops=False) and the sharpest course changes, capped at max_markers
+    speed = np.asarray(speed, dtype=np.float64)
+    course = np.asarray(course, dtype=np.float64)
+    n = len(speed)
+    if n == 0:
+        return {}
+
+    events = {0: "Start", n - 1: "End"}
+    budget = max(max_markers - len(events), 0)
+
+    stopped = speed < STOP_SPEED_KNOTS
+    if stops:
+        stop_starts = np.flatnonzero(stopped & ~np.r_[False, stopped[:-1]])
+        for i in stop_starts[:budget].tolist():
+            events.setdefault(i, "Stop")
+        budget = max(max_markers - len(events), 0)
+
+    # Course change with 0/360 wraparound, ignored while drifting at a stop
+    turn = np.abs((np.diff(course) + 180.0) % 360.0 - 180.0)
+    turn[stopped[1:] | np.isnan(turn)] = 0.0
+    turn_idx = np.flatnonzero(turn > TURN_THRESHOLD_DEG) + 1
+    if budget and len(turn_idx):
+        sharpest = turn_idx[np.argsort(turn[turn_idx - 1])[::-1][:budget]]
+        for i in np.sort(sharpest).tolist():
+            events.setdefault(i, "Turn")
+
+    return dict(sorted(events.items()))
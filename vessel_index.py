@@ -0,0 +1,102 @@
+import numpy as np
+
+
+# ---------------- PER-MMSI VESSEL INDEX ----------------
+# The uploaded frame is sorted once by (MMSI, Timestamp) and an offset table
+# maps every MMSI to its [start, stop) row range, so a vessel's track is a
+# positional slice instead of a boolean-mask scan of the whole dataset.
+
+class VesselIndex:
+    def __init__(self, df, presorted=False):
+        if presorted:
+            self.df = df.reset_index(drop=True)
+        else:
+            self.df = df.sort_values(["MMSI", "Timestamp"], kind="mergesort").reset_index(drop=True)
+
+        mmsi = self.df["MMSI"].to_numpy()
+        if len(mmsi):
+            starts = np.flatnonzero(np.r_[True, mmsi[1:] != mmsi[:-1]])
+        else:
+            starts = np.array([], dtype=np.int64)
+        stops = np.r_[starts[1:], len(mmsi)].astype(np.int64)
+
+        self.mmsi_list = mmsi[starts].tolist()
+        self.starts = starts.astype(np.int64)
+        self.offsets = dict(zip(self.mmsi_list, zip(starts.tolist(), stops.tolist())))
+
+    def __len__(self):
+        return len(self.df)
+
+    def __contains__(self, mmsi):
+        return mmsi in self.offsets
+
+    def track(self, mmsi):
+        # Zero-copy slice of one vessel's rows, already in time order
+        start, stop = self.offsets.get(mmsi, (0, 0))
+        return self.df.iloc[start:stop]
+
+    def rows(self, frame, mmsi):
+        # Same slice of any frame aligned row-for-row with self.df
+        start, stop = self.offsets.get(mmsi, (0, 0))
+        return frame.iloc[start:stop]
+
+    def track_size(self, mmsi):
+        start, stop = self.offsets.get(mmsi, (0, 0))
+        return stop - start
+
+    def positions(self, mmsis):
+        # Row positions of the given vessels' tracks, in index order
+        ranges = sorted(self.offsets[mmsi] for mmsi in set(mmsis) if mmsi in self.offsets)
+        if not ranges:
+            return np.array([], dtype=np.int64)
+        starts, stops = (np.array(bounds, dtype=np.int64) for bounds in zip(*ranges))
+        lengths = stops - starts
+        # Every range's start repeated over its length, plus 0..length-1 within it
+        offsets_within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return np.repeat(starts, lengths) + offsets_within
+
+    def _vessel_groups(self, new_mmsi):
+        # (mmsi, lo, hi) runs of a batch sorted by MMSI
+        if len(new_mmsi) == 0:
+            return []
+        starts = np.flatnonzero(np.r_[True, new_mmsi[1:] != new_mmsi[:-1]])
+        stops = np.r_[starts[1:], len(new_mmsi)]
+        return [(int(new_mmsi[lo]), lo, hi) for lo, hi in zip(starts.tolist(), stops.tolist())]
+
+    def insert_positions(self, new_rows):
+        # Row positions in self.df before which each of new_rows (sorted by
+        # MMSI, Timestamp) belongs; a binary search within each vessel's range
+        new_times = new_rows["Timestamp"].to_numpy()
+        times = self.df["Timestamp"].to_numpy()
+        vessels = np.asarray(self.mmsi_list, dtype=np.int64)
+
+        positions = np.empty(len(new_rows), dtype=np.int64)
+        for mmsi, lo, hi in self._vessel_groups(new_rows["MMSI"].to_numpy()):
+            if mmsi in self.offsets:
+                start, stop = self.offsets[mmsi]
+                positions[lo:hi] = start + np.searchsorted(times[start:stop], new_times[lo:hi], side="right")
+            else:
+                # A new vessel goes in front of the first vessel with a larger MMSI
+                k = int(np.searchsorted(vessels, mmsi))
+                positions[lo:hi] = self.starts[k] if k < len(vessels) else len(self.df)
+        return positions
+
+    def existing_rows(self, new_rows, key_column="Message_Type"):
+        # True for each of new_rows (sorted by MMSI, Timestamp) whose
+        # (MMSI, Timestamp, key_column) is already in the index
+        new_times = new_rows["Timestamp"].to_numpy()
+        new_keys = new_rows[key_column].to_numpy()
+        times = self.df["Timestamp"].to_numpy()
+        keys = self.df[key_column].to_numpy()
+
+        found = np.zeros(len(new_rows), dtype=bool)
+        for mmsi, lo, hi in self._vessel_groups(new_rows["MMSI"].to_numpy()):
+            if mmsi not in self.offsets:
+                continue
+            start, stop = self.offsets[mmsi]
+            first = start + np.searchsorted(times[start:stop], new_times[lo:hi], side="left")
+            last = start + np.searchsorted(times[start:stop], new_times[lo:hi], side="right")
+            # Only rows sharing a timestamp with an indexed row need their key compared
+            for i in np.flatnonzero(last > first).tolist():
+                found[lo + i] = bool((keys[first[i]:last[i]] == new_keys[lo + i]).any())
+        return found